@@ -0,0 +1,317 @@
+"""
+Benchmarks for the recognition hot paths.
+
+    python scripts/benchmark.py                  # compare with the stored baseline
+    python scripts/benchmark.py --save-baseline  # store the results as the new baseline
+    python scripts/benchmark.py -k recognize     # only run matching benchmarks
+
+Exits with status 1 when a benchmark is slower than the baseline by more than
+the threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from endfield_essence_recognizer import generated_template_dir, screenshot_template_dir
+from endfield_essence_recognizer.essence_scanner import (
+    DEPRECATE_BUTTON_ROI,
+    STATS_LEVEL_ICONS,
+    STATS_ROIS,
+    EssenceScanner,
+    judge_essence_quality,
+    recognize_level_from_icon_points,
+)
+from endfield_essence_recognizer.fake_window import FakeGameWindow, FakeWindowBackend
+from endfield_essence_recognizer.game_data.weapon import (
+    all_attribute_stats,
+    all_secondary_stats,
+    all_skill_stats,
+    weapon_stats_dict,
+)
+from endfield_essence_recognizer.icon_classifier import IconStateClassifier
+from endfield_essence_recognizer.recognizer import Recognizer
+from endfield_essence_recognizer.stat_classifier import (
+    STAT_CLASSIFIER_WEIGHTS_FILENAME,
+    StatClassifier,
+)
+from endfield_essence_recognizer.synthetic import (
+    Augmentation,
+    FrameComposer,
+    SyntheticEssence,
+    generate_frames,
+)
+from endfield_essence_recognizer.utils.clock import VirtualClock
+from endfield_essence_recognizer.utils.image import (
+    linear_operation,
+    scope_to_slice,
+    to_gray_image,
+)
+from endfield_essence_recognizer.utils.log import logger
+from endfield_essence_recognizer.utils.window import set_window_backend
+
+baseline_path = Path("scripts/benchmark_baseline.json")
+
+TEXT_LABELS = all_attribute_stats + all_secondary_stats + all_skill_stats
+ICON_LABELS = ["已弃用", "未弃用", "已锁定", "未锁定"]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    rounds: int
+    ops_per_sec: float
+    """每秒执行次数，按中位耗时计算"""
+    median_us: float
+    p95_us: float
+    peak_alloc_kib: float
+    """单次执行期间 Python 堆（含 numpy 数组）的峰值分配量"""
+    net_blocks: int
+    """单次执行后仍存活的内存块数量变化，持续增长说明有缓存或泄漏"""
+
+
+@dataclass
+class Benchmark:
+    name: str
+    func: Callable[[], object]
+    min_rounds: int = 20
+    max_rounds: int = 100_000
+
+
+def measure(benchmark: Benchmark, min_time: float) -> BenchmarkResult:
+    benchmark.func()  # 预热，触发惰性加载和缓存
+
+    durations: list[float] = []
+    deadline = time.perf_counter() + min_time
+    while len(durations) < benchmark.max_rounds and (
+        len(durations) < benchmark.min_rounds or time.perf_counter() < deadline
+    ):
+        start = time.perf_counter()
+        benchmark.func()
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    current_before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    benchmark.func()
+    _, peak = tracemalloc.get_traced_memory()
+    net_blocks = sys.getallocatedblocks() - blocks_before
+    tracemalloc.stop()
+
+    median = statistics.median(durations)
+    p95 = (
+        statistics.quantiles(durations, n=20)[-1]
+        if len(durations) >= 2
+        else durations[0]
+    )
+    return BenchmarkResult(
+        name=benchmark.name,
+        rounds=len(durations),
+        ops_per_sec=1 / median,
+        median_us=median * 1e6,
+        p95_us=p95 * 1e6,
+        peak_alloc_kib=(peak - current_before) / 1024,
+        net_blocks=net_blocks,
+    )
+
+
+def build_benchmarks(scan_size: int) -> list[Benchmark]:
+    text_recognizer = Recognizer(TEXT_LABELS, generated_template_dir)
+    icon_recognizer = Recognizer(
+        ICON_LABELS, screenshot_template_dir, classifier=IconStateClassifier()
+    )
+    classified_recognizer = Recognizer(
+        TEXT_LABELS,
+        generated_template_dir,
+        classifier=StatClassifier(
+            generated_template_dir / STAT_CLASSIFIER_WEIGHTS_FILENAME
+        ),
+    )
+    text_recognizer.load_templates()
+    icon_recognizer.load_templates()
+    classified_recognizer.load_templates()
+
+    weapon_stats = next(iter(weapon_stats_dict.values()))
+    stats = (
+        weapon_stats["attribute"],
+        weapon_stats["secondary"],
+        weapon_stats["skill"],
+    )
+    essence = SyntheticEssence(stats=stats, levels=(3, 1, 2))
+    frame = FrameComposer().compose([essence], essence)
+    stat_roi = frame[scope_to_slice(STATS_ROIS[0])].copy()
+    stat_gray = to_gray_image(stat_roi)
+    icon_roi = frame[scope_to_slice(DEPRECATE_BUTTON_ROI)].copy()
+
+    frames = generate_frames(
+        augmentation=Augmentation(noise_sigma=6, blur_sigma=0.8, brightness=15)
+    )
+
+    def scan() -> None:
+        clock = VirtualClock()
+        essences = [
+            SyntheticEssence(
+                stats=(
+                    all_attribute_stats[i % len(all_attribute_stats)],
+                    all_secondary_stats[i % len(all_secondary_stats)],
+                    all_skill_stats[i % len(all_skill_stats)],
+                ),
+                seed=i,
+            )
+            for i in range(scan_size)
+        ]
+        window = FakeGameWindow(essences=essences, clock=clock)
+        set_window_backend(FakeWindowBackend(window))
+        try:
+            EssenceScanner(
+                text_recognizer, icon_recognizer, [window.title], clock=clock
+            ).run()
+        finally:
+            set_window_backend(None)
+
+    return [
+        Benchmark("linear_operation", lambda: linear_operation(stat_gray, 100, 255)),
+        Benchmark(
+            "recognize_roi_text", lambda: text_recognizer.recognize_roi(stat_roi)
+        ),
+        Benchmark(
+            "recognize_roi_detailed_text",
+            lambda: text_recognizer.recognize_roi_detailed(stat_roi),
+        ),
+        Benchmark(
+            "recognize_roi_detailed_text_classifier",
+            lambda: classified_recognizer.recognize_roi_detailed(stat_roi),
+        ),
+        Benchmark(
+            "recognize_roi_icon", lambda: icon_recognizer.recognize_roi(icon_roi)
+        ),
+        Benchmark(
+            "recognize_level_from_icon_points",
+            lambda: recognize_level_from_icon_points(frame, STATS_LEVEL_ICONS[0]),
+        ),
+        Benchmark(
+            "judge_essence_quality",
+            lambda: judge_essence_quality(list(stats), [3, 1, 2]),
+        ),
+        Benchmark(
+            "load_templates",
+            lambda: Recognizer(TEXT_LABELS, generated_template_dir).load_templates(),
+            min_rounds=3,
+        ),
+        Benchmark("generate_frame", lambda: next(frames)),
+        Benchmark(f"scan_{scan_size}", scan, min_rounds=3),
+    ]
+
+
+def compare(
+    results: list[BenchmarkResult], baseline: dict[str, dict], threshold: float
+) -> list[str]:
+    """返回比基线慢超过阈值的基准测试名称。"""
+    regressions: list[str] = []
+    for result in results:
+        reference = baseline.get(result.name)
+        if reference is None:
+            print(f"{result.name:<34} no baseline")
+            continue
+        change = result.ops_per_sec / reference["ops_per_sec"] - 1
+        regressed = change < -threshold
+        if regressed:
+            regressions.append(result.name)
+        print(
+            f"{result.name:<34} {change:+7.1%} ops/s"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "-k", "--filter", default="", help="只运行名称包含该字符串的基准"
+    )
+    parser.add_argument("--baseline", type=Path, default=baseline_path)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="ops/s 低于基线的比例超过该值时视为性能回退（默认 0.25）",
+    )
+    parser.add_argument(
+        "--min-time", type=float, default=1.0, help="每个基准至少运行的秒数"
+    )
+    parser.add_argument(
+        "--scan-size", type=int, default=45, help="端到端扫描的基质数量"
+    )
+    parser.add_argument(
+        "--keep-logs", action="store_true", help="保留日志输出（默认关闭所有日志输出）"
+    )
+    args = parser.parse_args()
+
+    if not args.keep_logs:
+        # 只移除输出，日志消息本身的构造开销仍计入耗时
+        logger.remove()
+
+    benchmarks = [
+        benchmark
+        for benchmark in build_benchmarks(args.scan_size)
+        if args.filter in benchmark.name
+    ]
+    results: list[BenchmarkResult] = []
+    print(
+        f"{'name':<34} {'ops/s':>10} {'median µs':>11} {'p95 µs':>10}"
+        f" {'peak KiB':>9} {'blocks':>7}"
+    )
+    for benchmark in benchmarks:
+        result = measure(benchmark, args.min_time)
+        results.append(result)
+        print(
+            f"{result.name:<34} {result.ops_per_sec:>10.1f} {result.median_us:>11.1f}"
+            f" {result.p95_us:>10.1f} {result.peak_alloc_kib:>9.1f}"
+            f" {result.net_blocks:>7d}"
+        )
+
+    if args.save_baseline:
+        baseline: dict[str, dict] = {}
+        if args.baseline.is_file():
+            baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results"]
+        baseline.update({result.name: asdict(result) for result in results})
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "results": baseline,
+                },
+                ensure_ascii=False,
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        print(f"Saved baseline: {args.baseline}")
+        return 0
+
+    if not args.baseline.is_file():
+        print(f"No baseline at {args.baseline}, run with --save-baseline first.")
+        return 0
+    print()
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results"]
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"Regressed: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,401 @@
+"""
+Build the stat name template banks for every language in one step.
+
+    python scripts/build_templates.py --font path/to/HarmonyOS_Sans_SC_Regular.ttf
+    python scripts/build_templates.py --font JP=NotoSansJP.ttf --languages JP
+    python scripts/build_templates.py --font font.ttf --max-variants auto
+    python scripts/build_templates.py --font font.ttf --languages CN --check
+
+Every label is rendered for each language, font size and anti-aliasing mode in a
+process pool. Near-identical variants are dropped, the number of variants per label
+is optionally chosen by measured accuracy against matching cost, and each language
+is written as `<out>/<language>/<label>.png` (main variant) plus
+`<out>/<language>/<label>/<variant>.png`, with `manifest.json` describing the bank.
+Templates are drawn on the same fixed 160x24 canvas as the shipped CN bank, so a
+rebuild with the original font reproduces it byte for byte and keeps the trained
+stat classifier valid. `--check` renders the main variants and compares them with
+the bank on disk without writing anything.
+
+The fonts are not part of the repository. In CI, point --font (or EER_TEMPLATE_FONT)
+at a font installed on the runner. Retrain the stat classifier with
+train_stat_classifier.py after rebuilding a bank.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+from PIL import Image, ImageDraw, ImageFont
+
+default_out_dir = Path("src/endfield_essence_recognizer/templates/generated")
+default_sizes = [22, 20, 24, 21, 23]
+"""字号，第一个为主模板的字号"""
+default_antialias = [True, False]
+"""抗锯齿模式，第一个为主模板的模式"""
+roi_size = (192, 32)
+"""属性截图区域的尺寸 (宽, 高)，模板不能超过此尺寸"""
+template_canvas = (160, 24)
+"""模板的最小画布尺寸 (宽, 高)，与已发布的模板库一致"""
+dedup_threshold = 0.98
+"""与已保留的变体匹配分数高于此值的变体视为重复"""
+
+
+@dataclass(frozen=True)
+class RenderJob:
+    language: str
+    label: str
+    text: str
+    font: str
+    size: float
+    antialias: bool
+
+    @property
+    def variant(self) -> str:
+        return f"{self.size:g}{'' if self.antialias else '_aliased'}"
+
+
+def render(job: RenderJob) -> npt.NDArray[np.uint8]:
+    """
+    渲染白色文字、黑色背景的模板，文字从左上角开始绘制。
+
+    画布至少为 `template_canvas`，只有文字或字号超出时才扩大，因此主模板与已发布的模板库
+    尺寸相同。
+    """
+    font = ImageFont.truetype(job.font, size=job.size)
+    _, _, right, _ = font.getbbox(job.text)
+    width = min(roi_size[0] - 2, max(template_canvas[0], int(right) + 2))
+    height = min(roi_size[1] - 2, max(template_canvas[1], round(job.size * 1.1)))
+    image = Image.new("L", (width, height), color=0)
+    draw = ImageDraw.Draw(image)
+    draw.fontmode = "L" if job.antialias else "1"
+    draw.text((0, 0), job.text, font=font, fill=255)
+    return np.asarray(image, dtype=np.uint8)
+
+
+def similarity(a: npt.NDArray[np.uint8], b: npt.NDArray[np.uint8]) -> float:
+    """两张模板在最佳对齐位置的归一化相关系数。"""
+    height = max(a.shape[0], b.shape[0]) + 2
+    width = max(a.shape[1], b.shape[1]) + 2
+    canvas = np.zeros((height, width), dtype=np.uint8)
+    canvas[: a.shape[0], : a.shape[1]] = a
+    score = cv2.matchTemplate(canvas, b, cv2.TM_CCOEFF_NORMED).max()
+    return float(np.nan_to_num(score))
+
+
+def deduplicate(
+    variants: list[tuple[RenderJob, npt.NDArray[np.uint8]]],
+) -> list[tuple[RenderJob, npt.NDArray[np.uint8]]]:
+    """按顺序保留与已保留变体都不相似的变体。"""
+    kept: list[tuple[RenderJob, npt.NDArray[np.uint8]]] = []
+    for job, image in variants:
+        if all(similarity(other, image) < dedup_threshold for _, other in kept):
+            kept.append((job, image))
+    return kept
+
+
+def make_sample(
+    image: npt.NDArray[np.uint8], rng: np.random.Generator
+) -> npt.NDArray[np.uint8]:
+    """把一次渲染放入属性截图区域，并叠加噪声和模糊，用作评估样本。"""
+    roi = np.zeros((roi_size[1], roi_size[0]), dtype=np.float32)
+    top = int(rng.integers(0, roi_size[1] - image.shape[0] + 1))
+    left = int(rng.integers(0, min(8, roi_size[0] - image.shape[1]) + 1))
+    roi[top : top + image.shape[0], left : left + image.shape[1]] = image
+    roi = cv2.GaussianBlur(roi, (0, 0), rng.uniform(0.3, 0.8))
+    roi += rng.normal(0, 6, roi.shape)
+    return np.clip(roi, 0, 255).astype(np.uint8)
+
+
+def evaluate(
+    args: tuple[
+        list[npt.NDArray[np.uint8]], list[int], list[list[npt.NDArray[np.uint8]]]
+    ],
+) -> tuple[int, float]:
+    """用给定的模板库识别样本，返回 (正确数量, 总耗时)。"""
+    samples, truths, bank = args
+    correct = 0
+    start = time.perf_counter()
+    for sample, truth in zip(samples, truths, strict=True):
+        scores = [
+            max(
+                cv2.matchTemplate(sample, template, cv2.TM_CCOEFF_NORMED).max()
+                for template in templates
+            )
+            for templates in bank
+        ]
+        correct += int(np.argmax(scores)) == truth
+    return correct, time.perf_counter() - start
+
+
+def choose_variant_count(
+    pool: ProcessPoolExecutor,
+    banks: dict[str, list[npt.NDArray[np.uint8]]],
+    holdout: dict[str, list[npt.NDArray[np.uint8]]],
+    tolerance: float,
+) -> int:
+    """
+    评估每个标签保留前 k 个变体时的准确率和匹配耗时，返回准确率与最佳值相差不超过
+    `tolerance` 的最小 k。
+    """
+    rng = np.random.default_rng(0)
+    labels = list(banks)
+    samples: list[npt.NDArray[np.uint8]] = []
+    truths: list[int] = []
+    for index, label in enumerate(labels):
+        for image in holdout[label]:
+            samples.append(make_sample(image, rng))
+            truths.append(index)
+    chunks = [
+        (samples[i : i + 64], truths[i : i + 64]) for i in range(0, len(samples), 64)
+    ]
+
+    max_count = max(len(variants) for variants in banks.values())
+    results: list[tuple[int, float, float]] = []
+    print(f"{'variants':>8} {'accuracy':>9} {'templates':>9} {'ms/roi':>7}")
+    for count in range(1, max_count + 1):
+        bank = [banks[label][:count] for label in labels]
+        outcomes = list(
+            pool.map(evaluate, [(chunk, truth, bank) for chunk, truth in chunks])
+        )
+        accuracy = sum(correct for correct, _ in outcomes) / len(samples)
+        cost = sum(elapsed for _, elapsed in outcomes) / len(samples) * 1000
+        templates = sum(len(variants) for variants in bank)
+        results.append((count, accuracy, cost))
+        print(f"{count:>8} {accuracy:>9.4f} {templates:>9} {cost:>7.2f}")
+
+    best = max(accuracy for _, accuracy, _ in results)
+    return next(count for count, accuracy, _ in results if accuracy >= best - tolerance)
+
+
+def parse_fonts(values: list[str]) -> tuple[str | None, dict[str, str]]:
+    """解析 --font 参数，返回 (默认字体, {语言: 字体})。"""
+    default = os.environ.get("EER_TEMPLATE_FONT")
+    per_language: dict[str, str] = {}
+    for value in values:
+        language, sep, path = value.partition("=")
+        if sep and language.isupper():
+            per_language[language] = path
+        else:
+            default = value
+    return default, per_language
+
+
+def load_texts(languages: list[str]) -> dict[str, dict[str, str]]:
+    """获取每种语言下各属性标签的显示文本。"""
+    from endfield_essence_recognizer.game_data import load_i18n_text_table
+    from endfield_essence_recognizer.game_data.weapon import (
+        all_attribute_stats,
+        all_secondary_stats,
+        all_skill_stats,
+        get_gem_tag_name,
+    )
+
+    labels = all_attribute_stats + all_secondary_stats + all_skill_stats
+    texts: dict[str, dict[str, str]] = {}
+    for language in languages:
+        load_i18n_text_table(language)
+        texts[language] = {label: get_gem_tag_name(label, language) for label in labels}
+    return texts
+
+
+def write_bank(
+    out_dir: Path,
+    language: str,
+    banks: dict[str, list[tuple[RenderJob, npt.NDArray[np.uint8]]]],
+) -> None:
+    """写入一种语言的模板库和清单，替换该语言原有的模板，保留属性分类器权重等其他文件。"""
+    bank_dir = out_dir / language
+    bank_dir.mkdir(parents=True, exist_ok=True)
+    for entry in bank_dir.iterdir():
+        if entry.is_dir():
+            shutil.rmtree(entry)
+        elif entry.suffix == ".png" or entry.name == "manifest.json":
+            entry.unlink()
+
+    manifest: dict[str, object] = {"language": language, "labels": {}}
+    for label, variants in banks.items():
+        entries = []
+        for i, (job, image) in enumerate(variants):
+            path = (
+                bank_dir / f"{label}.png"
+                if i == 0
+                else bank_dir / label / f"{job.variant}.png"
+            )
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _, buffer = cv2.imencode(".png", image)
+            path.write_bytes(buffer.tobytes())
+            entries.append(
+                {
+                    "file": path.relative_to(bank_dir).as_posix(),
+                    "text": job.text,
+                    "font": Path(job.font).name,
+                    "size": job.size,
+                    "antialias": job.antialias,
+                    "sha1": hashlib.sha1(image.tobytes()).hexdigest(),
+                }
+            )
+        manifest["labels"][label] = entries  # type: ignore[index]
+    (bank_dir / "manifest.json").write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+
+
+def check_bank(
+    out_dir: Path,
+    language: str,
+    banks: dict[str, list[tuple[RenderJob, npt.NDArray[np.uint8]]]],
+) -> list[str]:
+    """比较渲染出的主模板与已有模板库，返回缺失或像素不一致的标签。"""
+    mismatched: list[str] = []
+    for label, variants in banks.items():
+        path = out_dir / language / f"{label}.png"
+        shipped = (
+            cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+            if path.is_file()
+            else None
+        )
+        _, image = variants[0]
+        if shipped is None or not np.array_equal(shipped, image):
+            mismatched.append(label)
+    return mismatched
+
+
+def main() -> int:
+    from endfield_essence_recognizer.game_data import i18n_languages
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--font",
+        action="append",
+        default=[],
+        help="font file, or LANG=path to use a font for one language",
+    )
+    parser.add_argument("--languages", nargs="+", default=i18n_languages)
+    parser.add_argument("--sizes", nargs="+", type=float, default=default_sizes)
+    parser.add_argument("--out", type=Path, default=default_out_dir)
+    parser.add_argument(
+        "--max-variants",
+        default="1",
+        help='variants kept per label, or "auto" to choose by measured accuracy',
+    )
+    parser.add_argument(
+        "--accuracy-tolerance",
+        type=float,
+        default=0.005,
+        help='accuracy loss accepted for fewer variants with "--max-variants auto"',
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="compare the main variants with the bank in --out instead of writing",
+    )
+    args = parser.parse_args()
+
+    default_font, fonts = parse_fonts(args.font)
+    missing = [
+        lang for lang in args.languages if lang not in fonts and not default_font
+    ]
+    if missing:
+        parser.error(f"no font for {', '.join(missing)}; pass --font")
+    font_of = {lang: fonts.get(lang) or str(default_font) for lang in args.languages}
+
+    texts = load_texts(args.languages)
+    if args.check:
+        return check(args.out, args.languages, texts, font_of, args.sizes[0])
+    jobs = [
+        RenderJob(language, label, text, font_of[language], size, antialias)
+        for language in args.languages
+        for label, text in texts[language].items()
+        for antialias in default_antialias
+        for size in args.sizes
+    ]
+    # 评估用的字号取相邻字号的中点，不与模板重复
+    sizes = sorted(args.sizes)
+    holdout_sizes = [(a + b) / 2 for a, b in zip(sizes, sizes[1:])] or sizes
+    holdout_jobs = [
+        RenderJob(language, label, text, font_of[language], size, True)
+        for language in args.languages
+        for label, text in texts[language].items()
+        for size in holdout_sizes
+    ]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers) as pool:
+        images = list(pool.map(render, jobs + holdout_jobs, chunksize=32))
+        print(f"Rendered {len(images)} images in {time.perf_counter() - start:.1f} s")
+
+        rendered: dict[tuple[str, str], list] = defaultdict(list)
+        for job, image in zip(jobs, images):
+            rendered[job.language, job.label].append((job, image))
+        holdout: dict[tuple[str, str], list] = defaultdict(list)
+        for job, image in zip(holdout_jobs, images[len(jobs) :]):
+            holdout[job.language, job.label].append(image)
+
+        for language in args.languages:
+            variants = {
+                label: deduplicate(rendered[language, label])
+                for label in texts[language]
+            }
+            if args.max_variants == "auto":
+                count = choose_variant_count(
+                    pool,
+                    {
+                        label: [image for _, image in kept]
+                        for label, kept in variants.items()
+                    },
+                    {label: holdout[language, label] for label in texts[language]},
+                    args.accuracy_tolerance,
+                )
+            else:
+                count = int(args.max_variants)
+            banks = {label: kept[:count] for label, kept in variants.items()}
+            write_bank(args.out, language, banks)
+            total = sum(len(v) for v in banks.values())
+            print(f"{language}: {total} templates, up to {count} per label")
+
+    print(f"Done in {time.perf_counter() - start:.1f} s")
+    return 0
+
+
+def check(
+    out_dir: Path,
+    languages: list[str],
+    texts: dict[str, dict[str, str]],
+    font_of: dict[str, str],
+    size: float,
+) -> int:
+    """渲染每种语言的主模板并与已有模板库比较，全部一致时返回 0。"""
+    failed = False
+    for language in languages:
+        banks: dict[str, list[tuple[RenderJob, npt.NDArray[np.uint8]]]] = {}
+        for label, text in texts[language].items():
+            job = RenderJob(
+                language, label, text, font_of[language], size, default_antialias[0]
+            )
+            banks[label] = [(job, render(job))]
+        mismatched = check_bank(out_dir, language, banks)
+        if mismatched:
+            failed = True
+            print(f"{language}: {len(mismatched)} templates differ from the bank")
+            for label in mismatched:
+                print(f"  {label}")
+        else:
+            print(f"{language}: {len(banks)} templates match the bank")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,54 @@
+"""
+Train the stat name classifier of each template bank and store its weights.
+
+    python scripts/train_stat_classifier.py              # every language
+    python scripts/train_stat_classifier.py --languages CN
+
+Run this after rebuilding the templates with build_templates.py. At runtime the
+weights are only used when they were trained from exactly the same templates.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import cv2
+
+from endfield_essence_recognizer.stat_classifier import (
+    STAT_CLASSIFIER_WEIGHTS_FILENAME,
+    StatClassifier,
+)
+from endfield_essence_recognizer.utils.image import load_image
+
+templates_root = Path("src/endfield_essence_recognizer/templates/generated")
+
+
+def train_bank(bank_dir: Path) -> None:
+    templates = {
+        path.stem: [
+            load_image(variant, cv2.IMREAD_GRAYSCALE)
+            for variant in [path, *sorted((bank_dir / path.stem).glob("**/*.png"))]
+        ]
+        for path in sorted(bank_dir.glob("*.png"))
+    }
+    weights_path = bank_dir / STAT_CLASSIFIER_WEIGHTS_FILENAME
+    classifier = StatClassifier()
+    classifier.train(templates)
+    classifier.save(weights_path)
+    print(
+        f"Saved weights for {len(classifier.labels)} labels: {weights_path} "
+        f"({weights_path.stat().st_size} bytes)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--languages", nargs="+")
+    args = parser.parse_args()
+
+    for bank_dir in sorted(templates_root.iterdir()):
+        if bank_dir.is_dir() and (
+            args.languages is None or bank_dir.name in args.languages
+        ):
+            train_bank(bank_dir)
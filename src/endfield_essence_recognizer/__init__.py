@@ -3,13 +3,14 @@ from __future__ import annotations
 import importlib.resources
 from typing import TYPE_CHECKING, cast
 
-from endfield_essence_recognizer.utils.log import logger
+from endfield_essence_recognizer.utils.log import logger, setup_file_logging
 from endfield_essence_recognizer.version import __version__ as __version__
 
 if TYPE_CHECKING:
     import threading
 
     from endfield_essence_recognizer.essence_scanner import EssenceScanner
+    from endfield_essence_recognizer.recognition_worker import RecognitionWorker
     from endfield_essence_recognizer.recognizer import Recognizer
 
 
@@ -20,9 +21,12 @@ enable_sound_path = (
 disable_sound_path = (
     importlib.resources.files("endfield_essence_recognizer") / "sounds/disable.wav"
 )
-generated_template_dir = (
+generated_template_root = (
     importlib.resources.files("endfield_essence_recognizer") / "templates/generated"
 )
+"""各语言属性模板库所在目录"""
+generated_template_dir = generated_template_root / "CN"
+"""默认语言的属性模板库"""
 screenshot_template_dir = (
     importlib.resources.files("endfield_essence_recognizer") / "templates/screenshot"
 )
@@ -39,6 +43,30 @@ server_thread: threading.Thread | None = None
 # 构造识别器实例
 text_recognizer: Recognizer | None = None
 icon_recognizer: Recognizer | None = None
+recognition_worker: RecognitionWorker | None = None
+"""识别子进程，未启用时为 None"""
+
+
+def create_recognizers() -> tuple[Recognizer, Recognizer]:
+    """构造属性词条识别器和按钮状态识别器，返回 (text_recognizer, icon_recognizer)。"""
+    from endfield_essence_recognizer.game_data.weapon import (
+        all_attribute_stats,
+        all_secondary_stats,
+        all_skill_stats,
+    )
+    from endfield_essence_recognizer.icon_classifier import IconStateClassifier
+    from endfield_essence_recognizer.recognizer import Recognizer
+    from endfield_essence_recognizer.stat_language import create_stat_recognizer
+
+    text_recognizer = create_stat_recognizer(
+        all_attribute_stats + all_secondary_stats + all_skill_stats
+    )
+    icon_recognizer = Recognizer(
+        labels=["已弃用", "未弃用", "已锁定", "未锁定"],
+        templates_dir=screenshot_template_dir,
+        classifier=IconStateClassifier(),
+    )
+    return text_recognizer, icon_recognizer
 
 
 def on_bracket_left():
@@ -59,6 +87,7 @@ def toggle_scan():
     """切换基质扫描状态"""
     import winsound
 
+    from endfield_essence_recognizer.config import config
     from endfield_essence_recognizer.essence_scanner import EssenceScanner
 
     global essence_scanner_thread
@@ -69,6 +98,8 @@ def toggle_scan():
             text_recognizer=cast("Recognizer", text_recognizer),
             icon_recognizer=cast("Recognizer", icon_recognizer),
             supported_window_titles=supported_window_titles,
+            multi_page=config.multi_page_scan_enabled,
+            frame_recognizer=recognition_worker,
         )
         essence_scanner_thread.start()
         with importlib.resources.as_file(
@@ -119,7 +150,9 @@ def on_exit():
 def main():
     """主函数"""
 
-    global text_recognizer, icon_recognizer, essence_scanner_thread
+    global text_recognizer, icon_recognizer, essence_scanner_thread, recognition_worker
+
+    setup_file_logging()
 
     # 打印欢迎信息
     message = """
@@ -148,24 +181,29 @@ def main():
 
     config.load_and_update()
 
-    # 构造识别器实例
-    from endfield_essence_recognizer.game_data.weapon import (
-        all_attribute_stats,
-        all_secondary_stats,
-        all_skill_stats,
+    # 监视配置文件的修改，并在后台保存配置
+    from endfield_essence_recognizer.config_sync import (
+        start_config_sync,
+        stop_config_sync,
     )
-    from endfield_essence_recognizer.recognizer import Recognizer
 
-    text_recognizer = Recognizer(
-        labels=all_attribute_stats + all_secondary_stats + all_skill_stats,
-        templates_dir=generated_template_dir,
-        # preprocess_roi=preprocess_text_roi,
-        # preprocess_template=preprocess_text_template,
-    )
-    icon_recognizer = Recognizer(
-        labels=["已弃用", "未弃用", "已锁定", "未锁定"],
-        templates_dir=screenshot_template_dir,
-    )
+    start_config_sync()
+
+    # 构造识别器实例
+    text_recognizer, icon_recognizer = create_recognizers()
+
+    # 启动识别子进程
+    from endfield_essence_recognizer.core.config import get_server_config
+
+    if get_server_config().recognition_worker_enabled:
+        from endfield_essence_recognizer.recognition_worker import RecognitionWorker
+
+        recognition_worker = RecognitionWorker()
+        try:
+            recognition_worker.start()
+        except RuntimeError as e:
+            logger.error(f"{e}，将在主进程中识别。")
+            recognition_worker = None
 
     # 注册热键
     import keyboard
@@ -201,10 +239,18 @@ def main():
             essence_scanner_thread.stop()
             essence_scanner_thread = None
 
+        # 停止识别子进程
+        if recognition_worker is not None:
+            recognition_worker.stop()
+            recognition_worker = None
+
         # 关闭后端
         server.should_exit = True
         server_thread.join()
 
+        # 写入尚未保存的配置
+        stop_config_sync()
+
         # 解除热键绑定
         keyboard.unhook_all()
         logger.info("程序已退出。")
@@ -1,4 +1,8 @@
+import multiprocessing
+
 from endfield_essence_recognizer import main
 
 if __name__ == "__main__":
+    # 打包后的程序需要此调用才能启动识别子进程
+    multiprocessing.freeze_support()
     main()
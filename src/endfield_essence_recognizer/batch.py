@@ -0,0 +1,275 @@
+"""
+Headless batch recognition of screenshot folders, archives and screen recordings.
+
+    eer-batch captures/ -o results.jsonl
+    eer-batch captures.zip -o results.csv -j 8
+    eer-batch inventory.mp4 -o results.jsonl
+
+Screenshots are distributed across a process pool; every worker builds the recognizers
+and loads the template bank once. Results are written in input order. Videos are
+decoded in a background thread and only frames showing a new selection are recognized.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+import zipfile
+from collections.abc import Iterator, Sequence
+from contextlib import ExitStack
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Literal, Protocol
+
+from endfield_essence_recognizer.recognition_pool import (
+    create_recognition_pool,
+    ordered_map,
+    recognize_file,
+    recognize_video_frame,
+)
+from endfield_essence_recognizer.utils.log import logger, setup_file_logging
+
+if TYPE_CHECKING:
+    from endfield_essence_recognizer.video import VideoFrameSource
+
+type OutputFormat = Literal["jsonl", "csv"]
+
+VIDEO_SUFFIXES = frozenset({".mp4", ".mkv", ".mov", ".avi", ".webm", ".flv"})
+"""作为视频读取的文件扩展名"""
+IMAGE_SUFFIXES = frozenset({".png", ".jpg", ".jpeg", ".bmp", ".webp", ".tif", ".tiff"})
+"""作为截图读取的文件扩展名"""
+PROGRESS_INTERVAL = 5.0
+"""输出进度日志的间隔（秒）"""
+CSV_FIELDS = [
+    "index",
+    "source",
+    "frame",
+    "time",
+    *(f"stat_{k}" for k in range(3)),
+    *(f"stat_name_{k}" for k in range(3)),
+    *(f"level_{k}" for k in range(3)),
+    *(f"stat_score_{k}" for k in range(3)),
+    "deprecated",
+    "locked",
+    "deprecated_score",
+    "locked_score",
+    "quality",
+    "error",
+]
+"""CSV 输出的列"""
+
+
+def list_images(source: Path) -> list[str]:
+    """
+    列出目录或 zip 压缩包中的截图。
+
+    Returns:
+        目录中按相对路径排序的文件列表，或压缩包中按存储顺序排列的成员名列表。
+    """
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            return [
+                info.filename
+                for info in archive.infolist()
+                if not info.is_dir()
+                and not info.filename.startswith("__MACOSX/")
+                and Path(info.filename).suffix.lower() in IMAGE_SUFFIXES
+            ]
+    if source.is_dir():
+        return sorted(
+            path.relative_to(source).as_posix()
+            for path in source.rglob("*")
+            if path.is_file() and path.suffix.lower() in IMAGE_SUFFIXES
+        )
+    raise ValueError(f"{source} 既不是目录也不是 zip 压缩包")
+
+
+class ResultWriter(Protocol):
+    def write(self, record: dict[str, Any]) -> None: ...
+
+
+class JsonlResultWriter:
+    def __init__(self, file: IO[str]) -> None:
+        self._file = file
+
+    def write(self, record: dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class CsvResultWriter:
+    def __init__(self, file: IO[str]) -> None:
+        self._writer = csv.DictWriter(file, CSV_FIELDS, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, record: dict[str, Any]) -> None:
+        row = {key: value for key, value in record.items() if key in CSV_FIELDS}
+        for key in ("stats", "stat_names", "levels", "stat_scores"):
+            for k, value in enumerate(record.get(key) or []):
+                row[f"{key[:-1]}_{k}"] = value
+        self._writer.writerow(row)
+
+
+def create_result_writer(file: IO[str], output_format: OutputFormat) -> ResultWriter:
+    if output_format == "csv":
+        return CsvResultWriter(file)
+    return JsonlResultWriter(file)
+
+
+def recognize_batch(
+    source: Path, jobs: int, chunksize: int | None = None
+) -> Iterator[dict[str, Any]]:
+    """
+    使用进程池识别目录或压缩包中的所有截图，按输入顺序逐个产出结果记录。
+
+    Args:
+        source: 截图目录或 zip 压缩包
+        jobs: 子进程数量
+        chunksize: 每次分配给子进程的截图数量，为 None 时自动选择
+    """
+    names = list_images(source)
+    if not names:
+        return
+    jobs = max(1, min(jobs, len(names)))
+    if chunksize is None:
+        # 每个子进程至少分到几批，以平衡负载
+        chunksize = max(1, min(16, len(names) // (jobs * 4)))
+
+    with create_recognition_pool(jobs, source) as pool:
+        for index, record in enumerate(
+            pool.map(recognize_file, names, chunksize=chunksize)
+        ):
+            yield {"index": index, **record}
+
+
+def recognize_video(frames: VideoFrameSource, jobs: int) -> Iterator[dict[str, Any]]:
+    """
+    使用进程池识别视频中每个新选中的基质，按时间顺序逐个产出结果记录。
+
+    Args:
+        frames: 视频帧来源
+        jobs: 子进程数量
+    """
+    with create_recognition_pool(jobs, frames.path) as pool:
+        items = ((frame.index, frame.timestamp, frame.image) for frame in frames)
+        for index, record in enumerate(
+            ordered_map(pool, recognize_video_frame, items, jobs * 2)
+        ):
+            yield {"index": index, **record}
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="eer-batch", description="批量识别截图目录、zip 压缩包或录屏视频中的基质。"
+    )
+    parser.add_argument("source", type=Path, help="截图目录、zip 压缩包或视频文件")
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=None,
+        help="输出文件，默认输出到标准输出",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["jsonl", "csv"],
+        default=None,
+        help="输出格式，默认根据输出文件扩展名判断，否则为 jsonl",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="子进程数量，默认为 CPU 核心数",
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=None, help="每次分配给子进程的截图数量"
+    )
+    parser.add_argument(
+        "--frame-step",
+        type=int,
+        default=1,
+        help="识别视频时每隔多少帧检查一次画面，高帧率视频可以适当增大",
+    )
+    args = parser.parse_args(argv)
+    setup_file_logging()
+
+    output_format: OutputFormat = args.format or (
+        "csv"
+        if args.output is not None and args.output.suffix.lower() == ".csv"
+        else "jsonl"
+    )
+
+    from endfield_essence_recognizer.config import config
+
+    # 只读取配置，不创建或覆盖用户的配置文件
+    config.load_and_update(save_defaults=False)
+
+    frames: VideoFrameSource | None = None
+    if args.source.suffix.lower() in VIDEO_SUFFIXES:
+        from endfield_essence_recognizer.video import VideoFrameSource
+
+        if not args.source.is_file():
+            logger.error(f"未找到视频文件：{args.source}")
+            return 1
+        frames = VideoFrameSource(args.source, frame_step=args.frame_step)
+        total = None
+        records = recognize_video(frames, args.jobs)
+        logger.info(f"正在识别视频 {args.source}，使用 {args.jobs} 个子进程...")
+    else:
+        try:
+            total = len(list_images(args.source))
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            logger.error(f"无法读取截图：{e}")
+            return 1
+        if total == 0:
+            logger.error(f"在 {args.source} 中未找到截图。")
+            return 1
+        records = recognize_batch(args.source, args.jobs, args.chunksize)
+        logger.info(f"共找到 {total} 张截图，使用 {args.jobs} 个子进程识别...")
+
+    count = failed = 0
+    started_at = last_report = time.perf_counter()
+    with ExitStack() as stack:
+        file: IO[str] = (
+            stack.enter_context(args.output.open("w", encoding="utf-8", newline=""))
+            if args.output is not None
+            else sys.stdout
+        )
+        writer = create_result_writer(file, output_format)
+        for record in records:
+            writer.write(record)
+            count += 1
+            failed += "error" in record
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                logger.info(
+                    f"已识别 {count}{f'/{total}' if total else ''} 张，"
+                    f"每秒 {count / (now - started_at):.1f} 张。"
+                )
+
+    elapsed = time.perf_counter() - started_at
+    if frames is not None:
+        logger.info(
+            f"识别完成：视频共 {frames.frames_read} 帧（{frames.duration:.1f} 秒），"
+            f"识别了 {count} 个基质，失败 {failed} 个，用时 {elapsed:.1f} 秒，"
+            f"平均每秒解码 {frames.frames_read / elapsed:.1f} 帧，"
+            f"为实时速度的 {frames.duration / elapsed:.1f} 倍。"
+        )
+    else:
+        logger.info(
+            f"识别完成：共 {count} 张截图，失败 {failed} 张，用时 {elapsed:.1f} 秒，"
+            f"平均每秒 {count / elapsed:.1f} 张。"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
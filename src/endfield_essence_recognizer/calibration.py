@@ -0,0 +1,321 @@
+"""
+Automatic calibration of the icon grid and the detail panel from one screenshot.
+
+A UI patch that moves the grid or the panel by a few pixels makes every ROI score
+just under threshold. Calibration measures both offsets on a screenshot of the
+essence page: the grid from edge projection profiles of the thumbnail lattice, the
+panel from the lock and deprecate button templates. Results are cached per client
+size and game version and re-checked with a small search window at scan start.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+from cv2.typing import MatLike
+
+from endfield_essence_recognizer.grid_scan import THUMBNAIL_SCOPE
+from endfield_essence_recognizer.layout import LayoutProfile, scale_scope
+from endfield_essence_recognizer.path import ROOT_DIR
+from endfield_essence_recognizer.utils.image import (
+    Coordinate,
+    Scope,
+    expand_scope,
+    resize_by,
+    scope_to_slice,
+    to_gray_image,
+)
+from endfield_essence_recognizer.utils.log import logger
+
+CALIBRATION_SEARCH_MARGIN = 24
+"""完整校准时在当前位置附近搜索的范围（参考分辨率下的像素）"""
+CALIBRATION_VALIDATE_MARGIN = 3
+"""扫描开始时验证已有校准结果的搜索范围（参考分辨率下的像素）"""
+CALIBRATION_TOLERANCE = 1
+"""偏移不超过此像素数时视为没有移动"""
+CALIBRATION_BUTTON_THRESHOLD = 0.7
+"""按钮模板的匹配分数低于此值时认为面板上没有按钮（如未选中基质）"""
+CALIBRATION_GRID_CONTRAST = 1.5
+"""缩略图边缘处的投影均值与整体均值之比低于此值时，认为网格中缩略图太少，无法校准"""
+LAYOUT_CALIBRATION_PATH = ROOT_DIR / "layout_calibration.json"
+"""校准结果缓存文件"""
+
+
+@dataclass(frozen=True)
+class LayoutCalibration:
+    """相对默认布局的偏移（客户区像素），从未测量过的部分为 None，按默认布局处理。"""
+
+    grid_offset: Coordinate | None = None
+    """图标网格的偏移"""
+    panel_offset: Coordinate | None = None
+    """右侧详情面板的偏移"""
+
+    @property
+    def measured(self) -> bool:
+        """是否至少有一部分测量过，全部未测量的结果不应保存。"""
+        return self.grid_offset is not None or self.panel_offset is not None
+
+
+@dataclass(frozen=True)
+class LayoutMeasurement:
+    """一次测量得到的相对当前布局的偏移，无法测量的部分为 None。"""
+
+    grid_offset: Coordinate | None
+    panel_offset: Coordinate | None
+
+    @property
+    def complete(self) -> bool:
+        """是否所有部分都测量到了。"""
+        return self.grid_offset is not None and self.panel_offset is not None
+
+    @property
+    def moved(self) -> bool:
+        """是否有测量到的部分的偏移超过了容差。未测量的部分不计入，见 `complete`。"""
+        return any(
+            offset is not None
+            and max(abs(offset[0]), abs(offset[1])) > CALIBRATION_TOLERANCE
+            for offset in (self.grid_offset, self.panel_offset)
+        )
+
+    def apply_to(self, calibration: LayoutCalibration) -> LayoutCalibration:
+        """
+        把测量结果累加到已有的校准结果上。
+
+        未测量的部分保持原样；测量到的部分即使偏移在容差之内，也记为已测量。
+        """
+
+        def add(
+            base: Coordinate | None, offset: Coordinate | None
+        ) -> Coordinate | None:
+            if offset is None:
+                return base
+            base = base or (0, 0)
+            if max(abs(offset[0]), abs(offset[1])) <= CALIBRATION_TOLERANCE:
+                return base
+            return base[0] + offset[0], base[1] + offset[1]
+
+        return LayoutCalibration(
+            grid_offset=add(calibration.grid_offset, self.grid_offset),
+            panel_offset=add(calibration.panel_offset, self.panel_offset),
+        )
+
+
+def locate_templates(
+    gray: MatLike, templates: Sequence[MatLike], expected: Scope, margin: int
+) -> tuple[Coordinate, float]:
+    """
+    在 `expected` 向外扩展 `margin` 像素的范围内搜索模板。
+
+    Returns:
+        (最佳匹配的模板中心相对 `expected` 中心的偏移, 分数)。
+    """
+    height, width = gray.shape[:2]
+    search = expand_scope(expected, margin, (width, height))
+    window = gray[scope_to_slice(search)]
+    (x0, y0), (x1, y1) = expected
+    center_x, center_y = (x0 + x1) / 2, (y0 + y1) / 2
+
+    best_offset, best_score = (0, 0), -1.0
+    for template in templates:
+        template_height, template_width = template.shape[:2]
+        if window.shape[0] < template_height or window.shape[1] < template_width:
+            continue
+        result = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (x, y) = cv2.minMaxLoc(result)
+        if score > best_score:
+            best_score = score
+            best_offset = (
+                round(search[0][0] + x + template_width / 2 - center_x),
+                round(search[0][1] + y + template_height / 2 - center_y),
+            )
+    return best_offset, best_score
+
+
+def _best_lattice_shift(
+    profile: npt.NDArray[np.float32], edges: npt.NDArray[np.int_], margin: int
+) -> int | None:
+    """找出使 `edges` 处投影之和最大的平移量，投影中没有明显边缘时返回 None。"""
+    shifts = np.arange(-margin, margin + 1)
+    indices = np.clip(edges[None, :] + shifts[:, None], 0, len(profile) - 1)
+    scores = profile[indices].mean(axis=1)
+    best = int(np.argmax(scores))
+    if scores[best] <= CALIBRATION_GRID_CONTRAST * float(profile.mean()):
+        return None
+    return int(shifts[best])
+
+
+def measure_grid_offset(
+    gray: MatLike, layout: LayoutProfile, margin: int
+) -> Coordinate | None:
+    """
+    根据缩略图边缘的投影测量图标网格相对 `layout` 的偏移。
+
+    缩略图的左右（上下）边缘在列（行）投影中形成间隔固定的峰，平移网格使这些峰与
+    预期的边缘位置重合。网格中缩略图太少时无法测量，返回 None。
+    """
+    xs, ys = layout.essence_icon_x_list, layout.essence_icon_y_list
+    (tx0, ty0), (tx1, ty1) = scale_scope(THUMBNAIL_SCOPE, layout.scale, layout.scale)
+    height, width = gray.shape[:2]
+    region = expand_scope(
+        (
+            (int(xs.min()) + tx0, int(ys.min()) + ty0),
+            (int(xs.max()) + tx1, int(ys.max()) + ty1),
+        ),
+        margin + 1,
+        (width, height),
+    )
+    (rx0, ry0), _ = region
+    crop = gray[scope_to_slice(region)].astype(np.float32)
+
+    # 第 i 个差分值对应第 i 与 i+1 个像素之间的边缘，缩略图 [x0, x1) 的边缘为 x0-1 和 x1-1
+    column_profile = np.abs(np.diff(crop, axis=1)).sum(axis=0)
+    row_profile = np.abs(np.diff(crop, axis=0)).sum(axis=1)
+    column_edges = np.concatenate([xs + tx0 - 1, xs + tx1 - 1]) - rx0
+    row_edges = np.concatenate([ys + ty0 - 1, ys + ty1 - 1]) - ry0
+
+    dx = _best_lattice_shift(column_profile, column_edges, margin)
+    dy = _best_lattice_shift(row_profile, row_edges, margin)
+    if dx is None or dy is None:
+        return None
+    return dx, dy
+
+
+def measure_panel_offset(
+    gray: MatLike,
+    layout: LayoutProfile,
+    lock_templates: Sequence[MatLike],
+    deprecate_templates: Sequence[MatLike],
+    margin: int,
+) -> Coordinate | None:
+    """
+    根据锁定和弃用按钮的位置测量详情面板相对 `layout` 的偏移。
+
+    按钮模板位于按钮区域的中央。任一按钮未找到，或两个按钮的偏移不一致时返回 None。
+    """
+    lock_offset, lock_score = locate_templates(
+        gray, lock_templates, layout.lock_button_roi, margin
+    )
+    deprecate_offset, deprecate_score = locate_templates(
+        gray, deprecate_templates, layout.deprecate_button_roi, margin
+    )
+    logger.debug(
+        f"按钮定位：锁定 {lock_offset} (分数: {lock_score:.3f})，"
+        f"弃用 {deprecate_offset} (分数: {deprecate_score:.3f})"
+    )
+    if min(lock_score, deprecate_score) < CALIBRATION_BUTTON_THRESHOLD:
+        return None
+    if (
+        max(
+            abs(lock_offset[0] - deprecate_offset[0]),
+            abs(lock_offset[1] - deprecate_offset[1]),
+        )
+        > CALIBRATION_TOLERANCE
+    ):
+        return None
+    return lock_offset
+
+
+def measure_layout(
+    frame: MatLike,
+    layout: LayoutProfile,
+    lock_templates: Sequence[MatLike],
+    deprecate_templates: Sequence[MatLike],
+    margin: int = CALIBRATION_SEARCH_MARGIN,
+) -> LayoutMeasurement:
+    """
+    在一张客户区截图中测量图标网格和详情面板相对 `layout` 的偏移。
+
+    Args:
+        frame: 基质界面的客户区截图
+        layout: 当前使用的布局
+        lock_templates: 参考分辨率下的锁定按钮灰度模板
+        deprecate_templates: 参考分辨率下的弃用按钮灰度模板
+        margin: 搜索范围（参考分辨率下的像素）
+    """
+    gray = to_gray_image(frame)
+    margin = max(1, round(margin * layout.scale))
+    return LayoutMeasurement(
+        grid_offset=measure_grid_offset(gray, layout, margin),
+        panel_offset=measure_panel_offset(
+            gray,
+            layout,
+            [resize_by(template, layout.scale) for template in lock_templates],
+            [resize_by(template, layout.scale) for template in deprecate_templates],
+            margin,
+        ),
+    )
+
+
+def _load_offset(value: Sequence[int] | None) -> Coordinate | None:
+    if value is None:
+        return None
+    x, y = value
+    return int(x), int(y)
+
+
+class LayoutCalibrationCache:
+    """按客户区尺寸和游戏版本保存的校准结果，`path` 为 None 时只保存在内存中。"""
+
+    def __init__(self, path: Path | None = LAYOUT_CALIBRATION_PATH) -> None:
+        self._path: Path | None = path
+        self._entries: dict[str, LayoutCalibration] = {}
+        if path is not None and path.is_file():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                self._entries = {
+                    key: LayoutCalibration(
+                        grid_offset=_load_offset(value["grid_offset"]),
+                        panel_offset=_load_offset(value["panel_offset"]),
+                    )
+                    for key, value in data.items()
+                }
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"无法读取界面校准缓存 {path}：{e}")
+
+    @staticmethod
+    def key(size: tuple[int, int], game_version: str | None) -> str:
+        return f"{size[0]}x{size[1]}@{game_version or 'unknown'}"
+
+    def get(
+        self, size: tuple[int, int], game_version: str | None
+    ) -> LayoutCalibration | None:
+        return self._entries.get(self.key(size, game_version))
+
+    def put(
+        self,
+        size: tuple[int, int],
+        game_version: str | None,
+        calibration: LayoutCalibration,
+    ) -> None:
+        self._entries[self.key(size, game_version)] = calibration
+        if self._path is None:
+            return
+        partial = self._path.with_name(self._path.name + ".tmp")
+        try:
+            partial.write_text(
+                json.dumps(
+                    {key: asdict(value) for key, value in self._entries.items()},
+                    indent=4,
+                ),
+                encoding="utf-8",
+            )
+            partial.replace(self._path)
+        except OSError as e:
+            logger.warning(f"无法保存界面校准缓存 {self._path}：{e}")
+
+
+_calibration_cache: LayoutCalibrationCache | None = None
+
+
+def get_calibration_cache() -> LayoutCalibrationCache:
+    """获取全局校准缓存，首次调用时从文件加载。"""
+    global _calibration_cache
+    if _calibration_cache is None:
+        _calibration_cache = LayoutCalibrationCache()
+    return _calibration_cache
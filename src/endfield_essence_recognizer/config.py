@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+from pathlib import Path
 from typing import Any, ClassVar, Literal, Self
 
 from pydantic import BaseModel
@@ -17,13 +18,38 @@ type Action = Literal[
     "unlock_and_undeprecate",
 ]
 
+type EssenceQuality = Literal["treasure", "trash"]
+
+type StatLanguage = Literal["auto", "CN", "EN", "JP", "KR", "MX", "RU", "TC"]
+
 config_path = ROOT_DIR / "config.json"
 
+ANY_STAT = "*"
+"""宝藏基质条件中匹配任意属性的通配符"""
+
 
 class EssenceStats(BaseModel):
+    """
+    宝藏基质条件。
+
+    三个属性、各属性的最低等级和武器筛选全部满足时，基质按 `quality` 判定品质。
+    多个条件同时满足时以排在最前面的为准。
+    """
+
     attribute: str | None
+    """基础属性，`ANY_STAT` 表示任意"""
     secondary: str | None
+    """附加属性，`ANY_STAT` 表示任意"""
     skill: str | None
+    """技能属性，`ANY_STAT` 表示任意"""
+    min_levels: tuple[int, int, int] = (0, 0, 0)
+    """三个属性各自的最低等级"""
+    weapon_rarities: list[int] = []
+    """只匹配契合这些稀有度的已实装武器的基质，为空时不限"""
+    weapon_types: list[int] = []
+    """只匹配契合这些类型 (`weaponType`) 的已实装武器的基质，为空时不限"""
+    quality: EssenceQuality = "treasure"
+    """满足条件时的判定结果，"trash" 可用于排除某些基质"""
 
 
 class Config(BaseModel):
@@ -42,42 +68,71 @@ class Config(BaseModel):
     high_level_treasure_threshold: int = 3
     """高等级基质属性词条的等级阈值 (+3 或 +4)"""
 
+    joint_decoding_enabled: bool = False
+    """是否在属性识别置信度较低时，根据已实装武器的属性组合联合解码三个属性"""
+
+    grid_prescan_enabled: bool = False
+    """扫描前是否根据网格截图跳过空格子和无需操作的基质（实验性）"""
+
+    multi_page_scan_enabled: bool = False
+    """扫描完当前页后是否自动滚动网格，继续扫描后续页面直到库存末尾"""
+
+    layout_calibration_enabled: bool = True
+    """扫描开始时是否根据截图校准图标网格和详情面板的位置"""
+
+    stat_language: StatLanguage = "auto"
+    """游戏语言，决定使用哪种语言的属性模板；"auto" 表示根据第一张截图自动检测"""
+
     def update_from_model(self, other: Config) -> None:
-        for field in self.__class__.model_fields:
-            setattr(self, field, getattr(other, field))
+        """
+        用另一个配置整体替换当前配置。
+
+        字段字典一次性替换，其他线程要么读到全部旧值、要么读到全部新值；需要连续读取
+        多个字段时应先用 `model_copy()` 取得快照。
+        """
+        object.__setattr__(self, "__dict__", dict(other.__dict__))
 
     def update_from_dict(self, data: dict[str, Any]) -> None:
         model = Config.model_validate(data)
         self.update_from_model(model)
 
     @classmethod
-    def load(cls) -> Self:
+    def load(cls, save_defaults: bool = True) -> Self:
+        """
+        读取配置文件。
+
+        Args:
+            save_defaults: 配置文件不存在或版本不匹配时，是否将默认配置写入配置文件。
+                只读取配置的程序（如批量识别）应传入 False，不修改用户的配置文件
+        """
         if config_path.is_file():
             logger.info(f"正在加载配置文件：{config_path.resolve()}")
             obj = json.loads(config_path.read_text(encoding="utf-8"))
             if "version" in obj and obj["version"] == cls._VERSION:
                 config = cls.model_validate(obj)
                 logger.info(f"已加载配置文件：{config!r}")
-            else:
-                logger.warning("配置文件版本不匹配，已忽略旧配置。")
-                config = cls()
-                config.save()
+                return config
+            logger.warning("配置文件版本不匹配，已忽略旧配置。")
         else:
             logger.info("未找到配置文件，使用默认配置。")
-            config = cls()
+        config = cls()
+        if save_defaults:
             config.save()
         return config
 
-    def load_and_update(self) -> None:
-        loaded_config = self.load()
+    def load_and_update(self, save_defaults: bool = True) -> None:
+        loaded_config = self.load(save_defaults)
         self.update_from_model(loaded_config)
 
-    def save(self) -> None:
-        config_path.write_text(
+    def save(self, path: Path = config_path) -> None:
+        """先写入临时文件再替换配置文件，其他程序不会读到写了一半的文件。"""
+        partial = path.with_name(path.name + ".tmp")
+        partial.write_text(
             self.model_dump_json(indent=4, ensure_ascii=False),
             encoding="utf-8",
         )
-        logger.info(f"配置已保存到文件：{config_path.resolve()}")
+        partial.replace(path)
+        logger.info(f"配置已保存到文件：{path.resolve()}")
 
 
 config = Config()
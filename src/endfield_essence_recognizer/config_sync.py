@@ -0,0 +1,157 @@
+"""
+Keeps the in-memory config and config.json in sync from a background thread.
+
+External edits to the file are picked up by polling, then validated and compiled on
+the sync thread before being swapped in atomically. Saves requested by the web UI
+are debounced and written through a temporary file.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from endfield_essence_recognizer.config import Config, config, config_path
+from endfield_essence_recognizer.treasure_rules import get_treasure_rule_index
+from endfield_essence_recognizer.utils.log import logger
+
+CONFIG_POLL_INTERVAL = 1.0
+"""检查配置文件是否被外部修改的间隔（秒）"""
+CONFIG_SAVE_DELAY = 0.5
+"""最后一次请求保存后等待多久再写入文件（秒），期间的多次修改只写入一次"""
+
+
+class ConfigFileSync(threading.Thread):
+    """
+    配置文件同步线程。
+
+    - 配置文件被外部修改时，在本线程中解析、校验并编译宝藏基质条件，再整体替换配置，
+      扫描线程下一个基质即使用新配置；文件无效时保留当前配置。
+    - `request_save` 只记录保存请求，本线程在请求停止一段时间后写入临时文件并替换
+      配置文件。有尚未写入的修改时不会重新加载文件，以免覆盖这些修改。
+    """
+
+    def __init__(
+        self,
+        target: Config = config,
+        path: Path = config_path,
+        poll_interval: float = CONFIG_POLL_INTERVAL,
+        save_delay: float = CONFIG_SAVE_DELAY,
+    ) -> None:
+        super().__init__(name="ConfigFileSync", daemon=True)
+        self.target: Config = target
+        self.path: Path = path
+        self.poll_interval: float = poll_interval
+        self.save_delay: float = save_delay
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._save_deadline: float | None = None
+        """尚未写入的修改应在何时写入，None 表示没有未写入的修改"""
+        self._known_stamp: tuple[int, int] | None = self._stamp()
+        """最近一次读取或写入后配置文件的 (修改时间, 大小)"""
+
+    def _stamp(self) -> tuple[int, int] | None:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def request_save(self) -> None:
+        """请求保存当前配置，立即返回。"""
+        with self._lock:
+            self._save_deadline = time.monotonic() + self.save_delay
+        self._wake.set()
+
+    def save_pending(self) -> bool:
+        """写入尚未保存的修改，没有时返回 False。"""
+        with self._lock:
+            if self._save_deadline is None:
+                return False
+            self._save_deadline = None
+        try:
+            self.target.save(self.path)
+        except OSError as e:
+            logger.error(f"无法保存配置文件 {self.path}：{e}")
+        self._known_stamp = self._stamp()
+        return True
+
+    def reload_if_changed(self) -> bool:
+        """配置文件被外部修改时重新加载，返回是否替换了配置。"""
+        stamp = self._stamp()
+        if stamp is None or stamp == self._known_stamp:
+            return False
+        self._known_stamp = stamp
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if not isinstance(data, dict) or data.get("version") != Config._VERSION:
+                raise ValueError("配置文件版本不匹配")
+            loaded = Config.model_validate(data)
+        except (OSError, ValueError, ValidationError) as e:
+            logger.warning(f"配置文件已修改但无法加载，继续使用当前配置：{e}")
+            return False
+        # 提前编译，替换配置后扫描线程无需再编译
+        get_treasure_rule_index(loaded)
+        self.target.update_from_model(loaded)
+        logger.info(f"配置文件已修改，已重新加载：{self.path.resolve()}")
+        return True
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            with self._lock:
+                deadline = self._save_deadline
+            timeout = (
+                self.poll_interval
+                if deadline is None
+                else max(0.0, deadline - time.monotonic())
+            )
+            self._wake.wait(timeout)
+            self._wake.clear()
+            with self._lock:
+                deadline = self._save_deadline
+            if deadline is None:
+                self.reload_if_changed()
+            elif time.monotonic() >= deadline:
+                self.save_pending()
+        self.save_pending()
+
+    def stop(self) -> None:
+        """停止线程，并写入尚未保存的修改。"""
+        self._stop_event.set()
+        self._wake.set()
+        if self.is_alive():
+            self.join()
+        else:
+            self.save_pending()
+
+
+_config_sync: ConfigFileSync | None = None
+
+
+def start_config_sync() -> ConfigFileSync:
+    """启动全局配置文件同步线程。"""
+    global _config_sync
+    if _config_sync is None or not _config_sync.is_alive():
+        _config_sync = ConfigFileSync()
+        _config_sync.start()
+    return _config_sync
+
+
+def stop_config_sync() -> None:
+    global _config_sync
+    if _config_sync is not None:
+        _config_sync.stop()
+        _config_sync = None
+
+
+def request_config_save() -> None:
+    """请求保存全局配置。同步线程未启动时直接保存。"""
+    if _config_sync is not None and _config_sync.is_alive():
+        _config_sync.request_save()
+    else:
+        config.save()
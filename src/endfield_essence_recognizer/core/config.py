@@ -8,7 +8,7 @@ is primarily set by the `.env` file.
 from __future__ import annotations
 
 from functools import lru_cache
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Literal
 
 from pydantic import Field, computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -64,6 +64,77 @@ class ServerConfig(BaseSettings):
     EER_API_PORT: 服务器端口号。
     """
 
+    log_profile: Literal["debug", "production"] = Field(
+        default="debug",
+    )
+    """
+    EER_LOG_PROFILE: 日志配置。"debug" 在日志文件中记录逐模板、逐像素的 TRACE 日志；
+    "production" 只记录 DEBUG 及以上级别，并关闭识别热路径上的逐项追踪。
+    """
+
+    log_max_bytes: int = Field(
+        default=10 * 1024 * 1024,
+    )
+    """
+    EER_LOG_MAX_BYTES: 单个日志文件的最大字节数，超过后轮转，0 表示不轮转。
+    """
+
+    log_retention: int = Field(
+        default=10,
+    )
+    """
+    EER_LOG_RETENTION: 保留的旧日志文件数量（包括以前日期的日志），0 表示不限制。
+    """
+
+    log_compression: bool = Field(
+        default=True,
+    )
+    """
+    EER_LOG_COMPRESSION: 是否将轮转后的日志文件压缩为 .gz。
+    """
+
+    scan_journal_enabled: bool = Field(
+        default=True,
+    )
+    """
+    EER_SCAN_JOURNAL_ENABLED: 是否将每个基质的识别结果和操作写入 logs/scan_journal.jsonl。
+    """
+
+    metrics_enabled: bool = Field(
+        default=True,
+    )
+    """
+    EER_METRICS_ENABLED: 是否记录扫描各阶段的耗时和计数，供 /api/metrics 使用。
+    """
+
+    recognition_worker_enabled: bool = Field(
+        default=False,
+    )
+    """
+    EER_RECOGNITION_WORKER_ENABLED: 是否在独立的子进程中识别截图，使识别不与界面和后端争抢 GIL。
+    """
+
+    stat_classifier_enabled: bool = Field(
+        default=True,
+    )
+    """
+    EER_STAT_CLASSIFIER_ENABLED: 是否先用线性分类器识别属性词条，只在分类器不确定时匹配全部模板。
+    """
+
+    api_recognize_workers: int = Field(
+        default=0,
+    )
+    """
+    EER_API_RECOGNIZE_WORKERS: /api/recognize 使用的子进程数量，0 表示 CPU 核心数的一半。
+    """
+
+    api_recognize_max_queue: int = Field(
+        default=64,
+    )
+    """
+    EER_API_RECOGNIZE_MAX_QUEUE: /api/recognize 最多等待识别的图片数量，超过后返回 503。
+    """
+
     def _get_webview_prod_url(self) -> str:
         """生产环境 Webview URL"""
         return f"http://localhost:{self.api_port}"
@@ -1,37 +1,66 @@
 import importlib.resources
 import threading
-import time
-from collections.abc import Collection
-from typing import Literal
+import weakref
+from collections import Counter
+from collections.abc import Collection, Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Literal, Protocol
 
 import cv2
 import numpy as np
-import pygetwindow
 from cv2.typing import MatLike
 
-from endfield_essence_recognizer.config import config
-from endfield_essence_recognizer.game_data import (
-    gem_table,
-    get_translation,
-    weapon_basic_table,
+from endfield_essence_recognizer.calibration import (
+    CALIBRATION_SEARCH_MARGIN,
+    CALIBRATION_VALIDATE_MARGIN,
+    LayoutCalibration,
+    LayoutCalibrationCache,
+    get_calibration_cache,
+    measure_layout,
 )
-from endfield_essence_recognizer.game_data.item import get_item_name
-from endfield_essence_recognizer.game_data.weapon import (
-    get_gem_tag_name,
-    weapon_stats_dict,
-    weapon_type_int_to_translation_key,
+from endfield_essence_recognizer.config import Config, config
+from endfield_essence_recognizer.grid_scan import (
+    GridCell,
+    analyze_grid,
+    find_row_offset,
+    row_fingerprints,
+    skip_reason,
 )
-from endfield_essence_recognizer.recognizer import Recognizer
-from endfield_essence_recognizer.utils.image import load_image, to_gray_image
-from endfield_essence_recognizer.utils.log import logger
+from endfield_essence_recognizer.joint_decoder import JointDecoder
+from endfield_essence_recognizer.layout import LayoutProfile
+from endfield_essence_recognizer.recognizer import RecognitionDetail, Recognizer
+from endfield_essence_recognizer.stat_language import (
+    reset_stat_language_detection,
+    resolve_stat_language,
+)
+from endfield_essence_recognizer.treasure_rules import get_treasure_rule_index
+from endfield_essence_recognizer.utils.clock import Clock, system_clock
+from endfield_essence_recognizer.utils.image import (
+    Scope,
+    expand_scope,
+    load_image,
+    resize_by,
+    scope_to_slice,
+    to_gray_image,
+)
+from endfield_essence_recognizer.utils.journal import ScanJournal, get_scan_journal
+from endfield_essence_recognizer.utils.log import is_trace_enabled, logger
+from endfield_essence_recognizer.utils.metrics import metrics
+from endfield_essence_recognizer.utils.profiling import profiler
 from endfield_essence_recognizer.utils.window import (
+    GameWindow,
     click_on_window,
     get_active_support_window,
     get_client_size,
+    get_game_version,
     get_support_window,
     screenshot_window,
+    scroll_on_window,
 )
 
+# 以下坐标均为参考分辨率 1920×1080 下的客户区像素坐标，其他分辨率见 `get_layout`
+
 # 基质图标位置网格（客户区像素坐标）
 # 5 行 9 列，共 45 个图标位置
 essence_icon_x_list = np.linspace(128, 1374, 9).astype(int)
@@ -44,6 +73,12 @@ ESSENCE_UI_TEMPLATE_PATH = (
     importlib.resources.files("endfield_essence_recognizer")
     / "templates/screenshot/武器基质.png"
 )
+ESSENCE_UI_SEARCH_MARGIN = 16
+"""确认界面时在标题区域周围额外搜索的范围（参考分辨率下的像素），容忍界面的小幅移动"""
+BUTTON_TEMPLATE_DIR = (
+    importlib.resources.files("endfield_essence_recognizer") / "templates/screenshot"
+)
+"""锁定和弃用按钮模板所在目录，用于校准详情面板的位置"""
 AREA = ((1465, 79), (1883, 532))
 DEPRECATE_BUTTON_POS = (1807, 284)
 """弃用按钮点击坐标"""
@@ -83,6 +118,90 @@ STATS_2_LEVEL_ICONS = [
 """属性 2 等级图标坐标"""
 LEVEL_ICON_SAMPLE_RADIUS = 2
 """等级图标状态采样半径"""
+STATS_ROIS = [STATS_0_ROI, STATS_1_ROI, STATS_2_ROI]
+"""各属性截图区域"""
+STATS_LEVEL_ICONS = [STATS_0_LEVEL_ICONS, STATS_1_LEVEL_ICONS, STATS_2_LEVEL_ICONS]
+"""各属性等级图标坐标"""
+
+REFERENCE_LAYOUT = LayoutProfile(
+    size=RESOLUTION,
+    scale=1.0,
+    essence_icon_x_list=essence_icon_x_list,
+    essence_icon_y_list=essence_icon_y_list,
+    essence_ui_roi=ESSENCE_UI_ROI,
+    area=AREA,
+    deprecate_button_pos=DEPRECATE_BUTTON_POS,
+    lock_button_pos=LOCK_BUTTON_POS,
+    deprecate_button_roi=DEPRECATE_BUTTON_ROI,
+    lock_button_roi=LOCK_BUTTON_ROI,
+    stats_rois=tuple(STATS_ROIS),
+    stats_level_icons=tuple(tuple(points) for points in STATS_LEVEL_ICONS),
+    level_icon_sample_radius=LEVEL_ICON_SAMPLE_RADIUS,
+)
+"""参考分辨率下的布局"""
+
+RECAPTURE_MAX_RETRIES = 3
+"""识别失败的区域最多重新截图识别的次数"""
+RECAPTURE_BACKOFF = 0.1
+"""重新截图前的等待时间（秒），第 n 次重试等待 n 倍"""
+GRID_SCROLL_CLICKS = -3
+"""多页扫描时每次滚动的滚轮格数（负数表示向下），需小于一页的行数以保证前后两页有重叠"""
+GRID_SCROLL_SETTLE = 0.5
+"""滚动后等待界面稳定的时间（秒）"""
+GRID_MAX_ALIGN_FAILURES = 3
+"""多页扫描时滚动后连续无法与上一页对齐的次数达到此值时停止扫描"""
+GRID_MAX_PAGES = 100
+"""多页扫描的最大页数，防止滚动异常时无限扫描"""
+
+
+_layout_calibrations: dict[tuple[int, int], LayoutCalibration] = {}
+"""各客户区尺寸当前使用的校准结果"""
+
+
+@lru_cache(maxsize=8)
+def get_layout(size: tuple[int, int]) -> LayoutProfile:
+    """
+    获取客户区尺寸对应的布局，每种尺寸只换算一次，并应用该尺寸的校准结果。
+
+    Raises:
+        ValueError: 客户区不是 16:9，无法换算界面元素的位置。
+    """
+    layout = REFERENCE_LAYOUT.scaled_to(size)
+    calibration = _layout_calibrations.get(size)
+    if calibration is not None:
+        layout = layout.shifted(
+            calibration.grid_offset or (0, 0), calibration.panel_offset or (0, 0)
+        )
+    return layout
+
+
+def set_layout_calibration(
+    size: tuple[int, int], calibration: LayoutCalibration | None
+) -> None:
+    """设置客户区尺寸对应的校准结果，None 表示使用默认布局。"""
+    if calibration is None:
+        _layout_calibrations.pop(size, None)
+    else:
+        _layout_calibrations[size] = calibration
+    get_layout.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def get_button_templates() -> tuple[list[MatLike], list[MatLike]]:
+    """参考分辨率下的 (锁定按钮模板列表, 弃用按钮模板列表)，灰度。"""
+
+    def load(name: str) -> MatLike:
+        return load_image(
+            (BUTTON_TEMPLATE_DIR / f"{name}.png").read_bytes(), cv2.IMREAD_GRAYSCALE
+        )
+
+    return [load("已锁定"), load("未锁定")], [load("已弃用"), load("未弃用")]
+
+
+def get_frame_layout(frame: MatLike) -> LayoutProfile:
+    """获取客户区截图对应的布局。"""
+    height, width = frame.shape[:2]
+    return get_layout((width, height))
 
 
 def detect_icon_state_at_point(image: MatLike, x: int, y: int, radius: int = 3) -> bool:
@@ -109,14 +228,17 @@ def detect_icon_state_at_point(image: MatLike, x: int, y: int, radius: int = 3)
 
     # 阈值：大于 200 认为是白色/亮色（激活）
     is_active = avg_brightness > 200
-    logger.trace(
-        f"坐标点 ({x}, {y}) 亮度={avg_brightness:.1f}, 状态={'\u767d\u8272' if is_active else '\u7070\u8272'}"
-    )
+    if is_trace_enabled():
+        logger.trace(
+            f"坐标点 ({x}, {y}) 亮度={avg_brightness:.1f}, 状态={'\u767d\u8272' if is_active else '\u7070\u8272'}"
+        )
     return is_active
 
 
 def recognize_level_from_icon_points(
-    image: MatLike, icon_points: list[tuple[int, int]]
+    image: MatLike,
+    icon_points: Sequence[tuple[int, int]],
+    radius: int = LEVEL_ICON_SAMPLE_RADIUS,
 ) -> int | None:
     """
     根据坐标点列表识别等级。
@@ -124,19 +246,27 @@ def recognize_level_from_icon_points(
     Args:
         image: 全局图像（客户区截图）
         icon_points: 4个图标的坐标点列表 [(x1,y1), (x2,y2), (x3,y3), (x4,y4)]
+        radius: 采样半径
 
     Returns:
         等级 (1-4) 或 None（识别失败）
     """
-    gray = to_gray_image(image)
+    # 只转换图标所在的小块区域，避免高分辨率下每次转换整张截图
+    x0 = max(0, min(x for x, _ in icon_points) - radius)
+    y0 = max(0, min(y for _, y in icon_points) - radius)
+    x1 = max(x for x, _ in icon_points) + radius + 1
+    y1 = max(y for _, y in icon_points) + radius + 1
+    gray = to_gray_image(image[y0:y1, x0:x1])
 
     # 检测每个图标的状态
+    trace = is_trace_enabled()
     active_count = 0
     for i, (x, y) in enumerate(icon_points):
-        is_active = detect_icon_state_at_point(gray, x, y, LEVEL_ICON_SAMPLE_RADIUS)
-        logger.trace(
-            f"图标 {i + 1} ({x},{y}) 状态: {'\u767d\u8272' if is_active else '\u7070\u8272'}"
-        )
+        is_active = detect_icon_state_at_point(gray, x - x0, y - y0, radius)
+        if trace:
+            logger.trace(
+                f"图标 {i + 1} ({x},{y}) 状态: {'\u767d\u8272' if is_active else '\u7070\u8272'}"
+            )
         if is_active:
             active_count += 1
         else:
@@ -150,16 +280,84 @@ def recognize_level_from_icon_points(
         return None
 
 
-def check_scene(window: pygetwindow.Window) -> bool:
+def plan_grid_scan(
+    grid_screenshot: MatLike, first_row: int = 0
+) -> tuple[list[tuple[int, int]], bool]:
+    """
+    根据网格截图规划需要点击的格子。
+
+    Args:
+        grid_screenshot: 客户区截图
+        first_row: 从第几行开始规划，之前的行已在上一页扫描过
+
+    Returns:
+        (需要点击的格子 (行, 列) 列表, 是否已到达库存末尾)。
+        未启用预扫描时返回从 `first_row` 开始的所有格子，且无法判断是否到达末尾。
+    """
+    layout = get_frame_layout(grid_screenshot)
+    if not config.grid_prescan_enabled:
+        all_positions = [
+            (i, j)
+            for i, j in np.ndindex(
+                len(layout.essence_icon_y_list), len(layout.essence_icon_x_list)
+            )
+            if i >= first_row
+        ]
+        return all_positions, False
+
+    cells = [
+        cell
+        for cell in analyze_grid(
+            grid_screenshot,
+            layout.essence_icon_x_list,
+            layout.essence_icon_y_list,
+            scale=layout.scale,
+        )
+        if cell.row >= first_row
+    ]
+    planned: list[GridCell] = []
+    for cell in cells:
+        reason = skip_reason(cell, config.treasure_action, config.trash_action)
+        if reason is None:
+            planned.append(cell)
+        else:
+            logger.info(f"跳过第 {cell.row + 1} 行第 {cell.column + 1} 列：{reason}")
+    empty_count = sum(cell.empty for cell in cells)
+    logger.info(
+        f"网格预扫描完成：空格子 {empty_count} 个，"
+        f"无需操作 {len(cells) - empty_count - len(planned)} 个，"
+        f"需要扫描 {len(planned)} 个。"
+    )
+    return [(cell.row, cell.column) for cell in planned], empty_count > 0
+
+
+@lru_cache(maxsize=8)
+def get_essence_ui_template(scale: float) -> MatLike:
+    """基质界面标题模板，按比例缩放后缓存。"""
+    return resize_by(load_image(ESSENCE_UI_TEMPLATE_PATH.read_bytes()), scale)
+
+
+def check_scene(window: GameWindow) -> bool:
     width, height = get_client_size(window)
-    if (width, height) != RESOLUTION:
+    try:
+        layout = get_layout((width, height))
+    except ValueError:
         logger.warning(
-            f"检测到终末地窗口的客户区尺寸为 {width}x{height}，请将终末地分辨率调整为 {RESOLUTION[0]}x{RESOLUTION[1]} 窗口。"
+            f"检测到终末地窗口的客户区尺寸为 {width}x{height}，请将终末地分辨率调整为 16:9（如 {RESOLUTION[0]}x{RESOLUTION[1]}）。"
         )
         return False
 
-    screenshot = screenshot_window(window, ESSENCE_UI_ROI)
-    template = load_image(ESSENCE_UI_TEMPLATE_PATH.read_bytes())
+    screenshot = screenshot_window(
+        window,
+        expand_scope(
+            layout.essence_ui_roi,
+            round(ESSENCE_UI_SEARCH_MARGIN * layout.scale),
+            (width, height),
+        ),
+    )
+    if layout.scale > 1:
+        screenshot = resize_by(screenshot, 1 / layout.scale)
+    template = get_essence_ui_template(layout.match_scale)
     res = cv2.matchTemplate(screenshot, template, cv2.TM_CCOEFF_NORMED)
     _, max_val, _, _ = cv2.minMaxLoc(res)
     logger.debug(f"基质界面模板匹配分数: {max_val:.3f}")
@@ -172,19 +370,38 @@ def check_scene(window: pygetwindow.Window) -> bool:
 
 
 def judge_essence_quality(
-    stats: list[str | None], levels: list[int | None] | None = None
+    stats: list[str | None],
+    levels: list[int | None] | None = None,
+    current: Config | None = None,
 ) -> Literal["treasure", "trash"]:
-    """根据识别到的属性判断基质品质，并输出日志提示。"""
+    """
+    根据识别到的属性判断基质品质，并输出日志提示。
+
+    `current` 为配置快照，默认取全局配置的快照，判定过程中配置被替换也不受影响。
+    """
+    from endfield_essence_recognizer.game_data import (
+        gem_table,
+        get_translation,
+        weapon_basic_table,
+    )
+    from endfield_essence_recognizer.game_data.item import get_item_name
+    from endfield_essence_recognizer.game_data.weapon import (
+        get_gem_tag_name,
+        weapon_type_int_to_translation_key,
+    )
+
+    if current is None:
+        current = config.model_copy()
 
     # 检查属性等级：如果启用了高等级判定，记录是否为高等级宝藏
     is_high_level_treasure = False
     high_level_info = ""
-    if config.high_level_treasure_enabled and levels is not None:
+    if current.high_level_treasure_enabled and levels is not None:
         for i, (stat, level) in enumerate(zip(stats, levels)):
             if (
                 stat is not None
                 and level is not None
-                and level >= config.high_level_treasure_threshold
+                and level >= current.high_level_treasure_threshold
             ):
                 # 检查该词条是否为属性词条 (termType == 1)
                 gem = gem_table.get(stat)
@@ -195,28 +412,23 @@ def judge_essence_quality(
                     )
                     break
 
+    rules = get_treasure_rule_index(current)
+
     # 尝试匹配用户自定义的宝藏基质条件
-    for treasure_stat in config.treasure_essence_stats:
-        if (
-            treasure_stat.attribute in stats
-            and treasure_stat.secondary in stats
-            and treasure_stat.skill in stats
-        ):
-            logger.opt(colors=True).success(
-                f"这个基质是<green><bold><underline>宝藏</></></>，因为它符合你设定的宝藏基质条件{high_level_info}。"
-            )
-            return "treasure"
+    rule = rules.match(stats, levels)
+    if rule is not None and rule.quality == "treasure":
+        logger.opt(colors=True).success(
+            f"这个基质是<green><bold><underline>宝藏</></></>，因为它符合你设定的宝藏基质条件{high_level_info}。"
+        )
+        return "treasure"
+    if rule is not None:
+        logger.opt(colors=True).success(
+            "这个基质是<red><bold><underline>养成材料</></></>，因为它符合你设定的排除条件。"
+        )
+        return "trash"
 
     # 尝试匹配已实装武器
-    matched_weapon_ids: set[str] = set()
-    for weapon_id in weapon_basic_table:
-        weapon_stats = weapon_stats_dict[weapon_id]
-        if (
-            weapon_stats["attribute"] == stats[0]
-            and weapon_stats["secondary"] == stats[1]
-            and weapon_stats["skill"] == stats[2]
-        ):
-            matched_weapon_ids.add(weapon_id)
+    matched_weapon_ids = rules.matched_weapon_ids(stats)
 
     if not matched_weapon_ids:
         # 未匹配到任何已实装武器
@@ -232,7 +444,11 @@ def judge_essence_quality(
             )
             return "trash"
     # 检查匹配到的武器中，是否有不在 trash_weapon_ids 中的
-    non_trash_weapon_ids = matched_weapon_ids - set(config.trash_weapon_ids)
+    non_trash_weapon_ids = [
+        weapon_id
+        for weapon_id in matched_weapon_ids
+        if weapon_id not in rules.trash_weapon_ids
+    ]
 
     def format_weapon_description(weapon_id: str) -> str:
         """格式化武器描述，如`名称（稀有度★ 类型）`"""
@@ -279,42 +495,142 @@ def judge_essence_quality(
             return "trash"
 
 
-def recognize_essence(
-    window: pygetwindow.Window, text_recognizer: Recognizer, icon_recognizer: Recognizer
-) -> tuple[list[str | None], list[int | None], str | None, str | None]:
-    stats: list[str | None] = []
-    levels: list[int | None] = []
+type EssenceFields = tuple[list[str | None], list[int | None], str | None, str | None]
+"""基质识别结果：(属性列表, 等级列表, 弃用状态, 锁定状态)"""
 
-    # 截取客户区全局截图用于等级检测
-    full_screenshot = screenshot_window(window)
 
-    for k, roi in enumerate([STATS_0_ROI, STATS_1_ROI, STATS_2_ROI]):
-        screenshot_image = screenshot_window(window, roi)
-        result, max_val = text_recognizer.recognize_roi(screenshot_image)
-        stats.append(result)
-        logger.debug(f"属性 {k} 识别结果: {result} (分数: {max_val:.3f})")
+def crop_frame(frame: MatLike, scope: Scope) -> MatLike:
+    """从客户区截图中裁剪出指定区域。"""
+    return frame[scope_to_slice(scope)]
 
-        # 识别等级（通过检测坐标点状态）
-        icon_points = [STATS_0_LEVEL_ICONS, STATS_1_LEVEL_ICONS, STATS_2_LEVEL_ICONS][k]
-        level_value = recognize_level_from_icon_points(full_screenshot, icon_points)
-        levels.append(level_value)
 
-        if level_value is not None:
-            logger.debug(f"属性 {k} 等级识别结果: +{level_value}")
-        else:
-            logger.debug(f"属性 {k} 等级识别结果: 无法识别")
+def recognize_stat(
+    frame: MatLike,
+    k: int,
+    text_recognizer: Recognizer,
+    layout: LayoutProfile | None = None,
+) -> tuple[RecognitionDetail, int | None]:
+    """从客户区截图中识别第 k 个属性的词条和等级，返回 (词条详细识别结果, 等级)。"""
+    if layout is None:
+        layout = get_frame_layout(frame)
+    with metrics.span("stat_match"):
+        detail = text_recognizer.scaled(layout.match_scale).recognize_roi_detailed(
+            layout.crop(frame, layout.stats_rois[k])
+        )
+    logger.debug(f"属性 {k} 识别结果: {detail.label} (分数: {detail.score:.3f})")
 
-    screenshot_image = screenshot_window(window, DEPRECATE_BUTTON_ROI)
-    deprecated_str, max_val = icon_recognizer.recognize_roi(screenshot_image)
-    deprecated_text = (
-        deprecated_str if deprecated_str is not None else "不知道是否已弃用"
+    # 识别等级（通过检测坐标点状态）
+    with metrics.span("level_detect"):
+        level_value = recognize_level_from_icon_points(
+            frame, layout.stats_level_icons[k], layout.level_icon_sample_radius
+        )
+    if level_value is not None:
+        logger.debug(f"属性 {k} 等级识别结果: +{level_value}")
+    else:
+        logger.debug(f"属性 {k} 等级识别结果: 无法识别")
+
+    return detail, level_value
+
+
+_joint_decoders: weakref.WeakKeyDictionary[Recognizer, JointDecoder] = (
+    weakref.WeakKeyDictionary()
+)
+"""按识别器缓存的联合解码器，识别器被回收时一并释放"""
+
+
+def get_joint_decoder(text_recognizer: Recognizer) -> JointDecoder:
+    """获取识别器对应的联合解码器，首次调用时根据已实装武器的属性组合构造。"""
+    decoder = _joint_decoders.get(text_recognizer)
+    if decoder is None:
+        from endfield_essence_recognizer.game_data.weapon import weapon_stats_dict
+
+        decoder = JointDecoder(
+            labels=text_recognizer.labels,
+            combinations=(
+                (stats["attribute"], stats["secondary"], stats["skill"])
+                for stats in weapon_stats_dict.values()
+            ),
+            high_thresh=text_recognizer.high_thresh,
+            low_thresh=text_recognizer.low_thresh,
+        )
+        _joint_decoders[text_recognizer] = decoder
+    return decoder
+
+
+def decode_stats(
+    scores: list[np.ndarray], text_recognizer: Recognizer
+) -> list[str | None]:
+    """
+    根据三个属性的分数向量确定属性词条。
+
+    启用联合解码时使用 `JointDecoder`，否则按阈值独立判定每个属性。
+    """
+    if config.joint_decoding_enabled:
+        return get_joint_decoder(text_recognizer).decode(np.stack(scores))
+    return [decode_stat(row, text_recognizer) for row in scores]
+
+
+def decode_stat(scores: np.ndarray, text_recognizer: Recognizer) -> str | None:
+    """按低分数阈值独立判定单个属性的词条。"""
+    if np.max(scores) < text_recognizer.low_thresh:
+        return None
+    return text_recognizer.labels[int(np.argmax(scores))]
+
+
+def recognize_button_state(
+    frame: MatLike,
+    roi: Scope,
+    icon_recognizer: Recognizer,
+    layout: LayoutProfile | None = None,
+) -> tuple[str | None, float]:
+    """从客户区截图中识别按钮状态，返回 (状态, 分数)。`roi` 为截图中的坐标。"""
+    if layout is None:
+        layout = get_frame_layout(frame)
+    with metrics.span("icon_match"):
+        return icon_recognizer.scaled(layout.match_scale).recognize_roi(
+            layout.crop(frame, roi)
+        )
+
+
+def recognize_deprecate_state(
+    frame: MatLike, icon_recognizer: Recognizer, layout: LayoutProfile | None = None
+) -> str | None:
+    """从客户区截图中识别弃用按钮状态，返回 "已弃用"、"未弃用" 或 None。"""
+    if layout is None:
+        layout = get_frame_layout(frame)
+    deprecated_str, max_val = recognize_button_state(
+        frame, layout.deprecate_button_roi, icon_recognizer, layout
     )
     logger.debug(f"弃用按钮识别结果: {deprecated_str} (分数: {max_val:.3f})")
+    return deprecated_str
 
-    screenshot_image = screenshot_window(window, LOCK_BUTTON_ROI)
-    locked_str, max_val = icon_recognizer.recognize_roi(screenshot_image)
-    locked_text = locked_str if locked_str is not None else "不知道是否已锁定"
+
+def recognize_lock_state(
+    frame: MatLike, icon_recognizer: Recognizer, layout: LayoutProfile | None = None
+) -> str | None:
+    """从客户区截图中识别锁定按钮状态，返回 "已锁定"、"未锁定" 或 None。"""
+    if layout is None:
+        layout = get_frame_layout(frame)
+    locked_str, max_val = recognize_button_state(
+        frame, layout.lock_button_roi, icon_recognizer, layout
+    )
     logger.debug(f"锁定按钮识别结果: {locked_str} (分数: {max_val:.3f})")
+    return locked_str
+
+
+def log_essence_result(
+    stats: list[str | None],
+    levels: list[int | None],
+    deprecated_str: str | None,
+    locked_str: str | None,
+) -> None:
+    """输出基质识别结果日志。"""
+    from endfield_essence_recognizer.game_data.weapon import get_gem_tag_name
+
+    deprecated_text = (
+        deprecated_str if deprecated_str is not None else "不知道是否已弃用"
+    )
+    locked_text = locked_str if locked_str is not None else "不知道是否已锁定"
 
     stats_name_parts = []
     for i, stat in enumerate(stats):
@@ -332,19 +648,229 @@ def recognize_essence(
         f"已识别当前基质，属性: <magenta>{stats_name}</>, <magenta>{deprecated_text}</>, <magenta>{locked_text}</>"
     )
 
+
+@dataclass
+class EssenceRecognition:
+    """包含匹配分数的基质识别结果。"""
+
+    stats: list[str | None]
+    levels: list[int | None]
+    deprecated: str | None
+    locked: str | None
+    stat_scores: list[float]
+    """各属性判定结果的匹配分数，未能判定时为最佳匹配分数"""
+    stat_candidates: list[list[tuple[str, float]]]
+    """各属性分数最高的几个 (标签, 分数)"""
+    deprecated_score: float
+    locked_score: float
+
+    @property
+    def fields(self) -> EssenceFields:
+        return self.stats, self.levels, self.deprecated, self.locked
+
+
+def recognize_essence_detailed(
+    frame: MatLike,
+    text_recognizer: Recognizer,
+    icon_recognizer: Recognizer,
+    layout: LayoutProfile | None = None,
+) -> EssenceRecognition:
+    """
+    从一张客户区截图中识别基质的全部字段，并保留匹配分数。
+
+    所有区域都从同一帧中裁剪，不再逐个区域截图，因此也可以在没有游戏窗口的
+    进程（识别子进程、批量识别）中使用。未给出 `layout` 时，区域位置由截图尺寸
+    对应的布局决定。
+
+    Raises:
+        ValueError: 截图不是 16:9。
+    """
+    if layout is None:
+        layout = get_frame_layout(frame)
+    resolve_stat_language(
+        text_recognizer,
+        lambda: [layout.crop(frame, roi) for roi in layout.stats_rois],
+        layout.match_scale,
+    )
+    levels: list[int | None] = []
+    details: list[RecognitionDetail] = []
+    for k in range(len(layout.stats_rois)):
+        detail, level = recognize_stat(frame, k, text_recognizer, layout)
+        details.append(detail)
+        levels.append(level)
+    stats = decode_stats([detail.scores for detail in details], text_recognizer)
+
+    deprecated_str, deprecated_score = recognize_button_state(
+        frame, layout.deprecate_button_roi, icon_recognizer, layout
+    )
+    locked_str, locked_score = recognize_button_state(
+        frame, layout.lock_button_roi, icon_recognizer, layout
+    )
+    logger.debug(f"弃用按钮识别结果: {deprecated_str} (分数: {deprecated_score:.3f})")
+    logger.debug(f"锁定按钮识别结果: {locked_str} (分数: {locked_score:.3f})")
+    return EssenceRecognition(
+        stats=stats,
+        levels=levels,
+        deprecated=deprecated_str,
+        locked=locked_str,
+        stat_scores=[
+            # 联合解码的结果不一定是分数最高的标签
+            float(detail.scores[text_recognizer.label_index[stat]])
+            if stat is not None
+            else detail.score
+            for stat, detail in zip(stats, details)
+        ],
+        stat_candidates=[detail.top_k for detail in details],
+        deprecated_score=deprecated_score,
+        locked_score=locked_score,
+    )
+
+
+def recognize_essence(
+    frame: MatLike,
+    text_recognizer: Recognizer,
+    icon_recognizer: Recognizer,
+    layout: LayoutProfile | None = None,
+) -> EssenceFields:
+    """从一张客户区截图中识别基质的全部字段。"""
+    return recognize_essence_detailed(
+        frame, text_recognizer, icon_recognizer, layout
+    ).fields
+
+
+def get_failed_fields(
+    stats: list[str | None],
+    levels: list[int | None],
+    deprecated_str: str | None,
+    locked_str: str | None,
+) -> list[str]:
+    """返回识别失败的字段名列表，如 `["stat_1", "lock"]`。"""
+    failed = [
+        f"stat_{k}"
+        for k, (stat, level) in enumerate(zip(stats, levels))
+        if stat is None or level is None
+    ]
+    if deprecated_str is None:
+        failed.append("deprecate")
+    if locked_str is None:
+        failed.append("lock")
+    return failed
+
+
+def recapture_failed_fields(
+    frame: MatLike,
+    text_recognizer: Recognizer,
+    icon_recognizer: Recognizer,
+    stats: list[str | None],
+    levels: list[int | None],
+    deprecated_str: str | None,
+    locked_str: str | None,
+    layout: LayoutProfile | None = None,
+) -> EssenceFields:
+    """
+    在新截取的客户区截图中只重新识别失败的字段，保留已成功识别的字段。
+
+    Returns:
+        更新后的 (属性列表, 等级列表, 弃用状态, 锁定状态)。
+    """
+    if layout is None:
+        layout = get_frame_layout(frame)
+    stats = list(stats)
+    levels = list(levels)
+    failed_stats = [
+        k
+        for k, (stat, level) in enumerate(zip(stats, levels))
+        if stat is None or level is None
+    ]
+    if failed_stats:
+        # 已识别的属性固定不变，只重新识别失败的属性
+        scores: dict[int, np.ndarray] = {}
+        for k in failed_stats:
+            detail, levels[k] = recognize_stat(frame, k, text_recognizer, layout)
+            scores[k] = detail.scores
+        if config.joint_decoding_enabled:
+            decoder = get_joint_decoder(text_recognizer)
+            stats = decoder.decode(
+                np.stack(
+                    [
+                        scores[k] if k in scores else decoder.fixed_scores(stat)
+                        for k, stat in enumerate(stats)
+                    ]
+                )
+            )
+        else:
+            for k, row in scores.items():
+                stats[k] = decode_stat(row, text_recognizer)
+    if deprecated_str is None:
+        deprecated_str = recognize_deprecate_state(frame, icon_recognizer, layout)
+    if locked_str is None:
+        locked_str = recognize_lock_state(frame, icon_recognizer, layout)
     return stats, levels, deprecated_str, locked_str
 
 
+class FrameRecognizer(Protocol):
+    """根据客户区截图识别基质的对象，可以在本进程或识别子进程中执行。"""
+
+    def recognize(
+        self,
+        frame: MatLike,
+        previous: EssenceFields | None = None,
+        layout: LayoutProfile | None = None,
+    ) -> EssenceFields:
+        """
+        识别基质。
+
+        Args:
+            frame: 客户区截图
+            previous: 上一次的识别结果，给出时只重新识别其中失败的字段
+            layout: 截图对应的布局，包括校准结果；为 None 时使用截图尺寸对应的布局。
+                校准结果只保存在主进程中，因此在子进程中识别时必须给出
+        """
+        ...
+
+    def start_scan(self) -> None:
+        """每次扫描开始时调用，清除上次扫描中失败的语言检测记录。"""
+        ...
+
+
+class LocalFrameRecognizer:
+    """在当前进程中识别。"""
+
+    def __init__(
+        self, text_recognizer: Recognizer, icon_recognizer: Recognizer
+    ) -> None:
+        self.text_recognizer: Recognizer = text_recognizer
+        self.icon_recognizer: Recognizer = icon_recognizer
+
+    def recognize(
+        self,
+        frame: MatLike,
+        previous: EssenceFields | None = None,
+        layout: LayoutProfile | None = None,
+    ) -> EssenceFields:
+        if previous is None:
+            return recognize_essence(
+                frame, self.text_recognizer, self.icon_recognizer, layout
+            )
+        return recapture_failed_fields(
+            frame, self.text_recognizer, self.icon_recognizer, *previous, layout=layout
+        )
+
+    def start_scan(self) -> None:
+        reset_stat_language_detection()
+
+
 def recognize_once(
-    window: pygetwindow.Window, text_recognizer: Recognizer, icon_recognizer: Recognizer
+    window: GameWindow, text_recognizer: Recognizer, icon_recognizer: Recognizer
 ) -> None:
     check_scene_result = check_scene(window)
     if not check_scene_result:
         return
 
     stats, levels, deprecated_str, locked_str = recognize_essence(
-        window, text_recognizer, icon_recognizer
+        screenshot_window(window), text_recognizer, icon_recognizer
     )
+    log_essence_result(stats, levels, deprecated_str, locked_str)
 
     if deprecated_str is None or locked_str is None:
         return
@@ -365,16 +891,56 @@ class EssenceScanner(threading.Thread):
         text_recognizer: Recognizer,
         icon_recognizer: Recognizer,
         supported_window_titles: Collection[str],
+        max_recapture: int = RECAPTURE_MAX_RETRIES,
+        recapture_backoff: float = RECAPTURE_BACKOFF,
+        multi_page: bool = False,
+        clock: Clock = system_clock,
+        journal: ScanJournal | None = None,
+        frame_recognizer: FrameRecognizer | None = None,
+        calibration_cache: LayoutCalibrationCache | None = None,
     ) -> None:
         super().__init__(daemon=True)
         self._scanning = threading.Event()
         self._text_recognizer: Recognizer = text_recognizer
         self._icon_recognizer: Recognizer = icon_recognizer
         self._supported_window_titles: Collection[str] = supported_window_titles
+        self._max_recapture: int = max_recapture
+        self._recapture_backoff: float = recapture_backoff
+        self.retry_histogram: Counter[int] = Counter()
+        """每个基质重新截图次数的统计，键为重试次数，值为基质数量"""
+        self.skipped_count: int = 0
+        """重试后仍无法识别而被跳过的基质数量"""
+        self._multi_page: bool = multi_page
+        self._clock: Clock = clock
+        """等待和计时使用的时钟，测试时可替换为 `VirtualClock`"""
+        self.essence_count: int = 0
+        """本次扫描过的基质数量"""
+        self._started_at: float = clock.time()
+        self._journal: ScanJournal = (
+            journal if journal is not None else get_scan_journal()
+        )
+        """记录每个基质识别结果的扫描日志"""
+        self._page: int = 1
+        """当前扫描的页码"""
+        self._frame_recognizer: FrameRecognizer = (
+            frame_recognizer
+            if frame_recognizer is not None
+            else LocalFrameRecognizer(text_recognizer, icon_recognizer)
+        )
+        """识别截图的对象，启用识别子进程时为 `RecognitionWorker`"""
+        self._layout: LayoutProfile = REFERENCE_LAYOUT
+        """当前窗口客户区尺寸对应的布局，用于点击坐标"""
+        self._calibration_cache: LayoutCalibrationCache = (
+            calibration_cache
+            if calibration_cache is not None
+            else get_calibration_cache()
+        )
+        """按客户区尺寸和游戏版本保存的布局校准结果"""
 
     def run(self) -> None:
         logger.info("开始基质扫描线程...")
         self._scanning.set()
+        self._frame_recognizer.start_scan()
 
         window = get_support_window(self._supported_window_titles)
         if window is None:
@@ -383,90 +949,275 @@ class EssenceScanner(threading.Thread):
             return
         if window.isMinimized:
             window.restore()
-            time.sleep(0.5)
+            self._clock.sleep(0.5)
         if not window.isActive:
             window.activate()
-            time.sleep(0.5)
+            self._clock.sleep(0.5)
 
         check_scene_result = check_scene(window)
         if not check_scene_result:
             self._scanning.clear()
             return
+        self._layout = (
+            self._calibrate_layout(window)
+            if config.layout_calibration_enabled
+            else get_layout(get_client_size(window))
+        )
+        xs, ys = self._layout.essence_icon_x_list, self._layout.essence_icon_y_list
+
+        self._started_at = self._clock.time()
+        grid_screenshot = screenshot_window(window)
+        first_row = 0
+        self._page = 1
+        align_failures = 0
+        while True:
+            positions, reached_end = plan_grid_scan(grid_screenshot, first_row)
+            if not self._scan_positions(positions):
+                break
+
+            if not self._multi_page or reached_end:
+                logger.info("基质扫描完成。")
+                break
+
+            # 滚动到下一页，并通过对齐前后两页的缩略图确定新出现的行
+            previous_fingerprints = row_fingerprints(
+                screenshot_window(window), xs, ys, self._layout.scale
+            )
+            scroll_on_window(window, int(xs.mean()), int(ys.mean()), GRID_SCROLL_CLICKS)
+            metrics.increment("grid_scrolls")
+            with metrics.span("settle_wait"):
+                self._clock.sleep(GRID_SCROLL_SETTLE)
+            grid_screenshot = screenshot_window(window)
+            offset = find_row_offset(
+                previous_fingerprints,
+                row_fingerprints(grid_screenshot, xs, ys, self._layout.scale),
+            )
+            if offset == 0:
+                logger.info("网格已无法继续滚动，基质扫描完成。")
+                break
+            if offset is None:
+                align_failures += 1
+                if align_failures >= GRID_MAX_ALIGN_FAILURES:
+                    logger.error(
+                        f"滚动后连续 {align_failures} 次未能与上一页对齐，停止基质扫描。"
+                    )
+                    break
+                logger.warning("滚动后未能与上一页对齐，将扫描整页。")
+                first_row = 0
+            else:
+                align_failures = 0
+                first_row = len(ys) - offset
+            if self._page >= GRID_MAX_PAGES:
+                logger.error(f"已扫描 {self._page} 页，达到页数上限，停止基质扫描。")
+                break
+            self._page += 1
+            logger.info(f"正在扫描第 {self._page} 页，从第 {first_row + 1} 行开始...")
+
+        self.log_scan_summary()
+
+    def _calibrate_layout(self, window: GameWindow) -> LayoutProfile:
+        """
+        确认缓存的布局校准结果仍然有效，必要时根据当前截图重新校准。
+
+        先在很小的范围内验证已有结果；界面移动了、小范围内有部分未能测量（可能移动得
+        更远）或没有缓存时，才在较大范围内搜索。只保存实际测量到的部分。
+        """
+        size = get_client_size(window)
+        game_version = get_game_version(window)
+        cached = self._calibration_cache.get(size, game_version)
+        set_layout_calibration(size, cached)
+        layout = get_layout(size)
+        frame = screenshot_window(window)
+        templates = get_button_templates()
+
+        with metrics.span("calibration"):
+            if cached is not None:
+                measurement = measure_layout(
+                    frame, layout, *templates, margin=CALIBRATION_VALIDATE_MARGIN
+                )
+                if measurement.complete and not measurement.moved:
+                    return layout
+                if measurement.moved:
+                    logger.warning("界面布局与缓存的校准结果不符，正在重新校准...")
+                else:
+                    logger.info("无法验证缓存的校准结果，正在重新校准...")
+            measurement = measure_layout(
+                frame, layout, *templates, margin=CALIBRATION_SEARCH_MARGIN
+            )
 
-        for i, j in np.ndindex(len(essence_icon_y_list), len(essence_icon_x_list)):
+        calibration = measurement.apply_to(cached or LayoutCalibration())
+        if measurement.grid_offset is None:
+            logger.info("网格中的基质太少，无法校准网格位置。")
+        if measurement.panel_offset is None:
+            logger.info("未找到锁定和弃用按钮，无法校准详情面板位置。")
+        if calibration != cached and calibration.measured:
+            logger.info(
+                f"界面布局校准完成：网格偏移 {calibration.grid_offset}，"
+                f"详情面板偏移 {calibration.panel_offset}。"
+            )
+            self._calibration_cache.put(size, game_version, calibration)
+            set_layout_calibration(size, calibration)
+        return get_layout(size)
+
+    def _scan_positions(self, positions: list[tuple[int, int]]) -> bool:
+        """
+        依次扫描给定的格子。
+
+        Returns:
+            是否扫描完所有格子；窗口离开前台或扫描被中断时返回 False。
+        """
+        for i, j in positions:
             window = get_active_support_window(self._supported_window_titles)
             if window is None:
                 logger.info("终末地窗口不在前台，停止基质扫描。")
                 self._scanning.clear()
-                break
+                return False
 
             if not self._scanning.is_set():
                 logger.info("基质扫描被中断。")
-                break
-
-            logger.info(f"正在扫描第 {i + 1} 行第 {j + 1} 列的基质...")
-
-            # 点击基质图标位置
-            relative_x = essence_icon_x_list[j]
-            relative_y = essence_icon_y_list[i]
-            click_on_window(window, relative_x, relative_y)
-
-            # 等待短暂时间以确保界面更新
-            time.sleep(0.3)
+                return False
+
+            with metrics.span("essence"), profiler.scope():
+                self._scan_essence(window, i, j)
+            self.essence_count += 1
+            metrics.increment("essences_scanned")
+        return True
+
+    def _scan_essence(self, window: GameWindow, i: int, j: int) -> None:
+        """点击并识别第 i 行第 j 列的基质，并根据设置执行操作。"""
+        logger.info(f"正在扫描第 {i + 1} 行第 {j + 1} 列的基质...")
+        started_at = self._clock.time()
+
+        # 点击基质图标位置
+        relative_x = self._layout.essence_icon_x_list[j]
+        relative_y = self._layout.essence_icon_y_list[i]
+        click_on_window(window, relative_x, relative_y)
+
+        # 等待短暂时间以确保界面更新
+        with metrics.span("settle_wait"):
+            self._clock.sleep(0.3)
+
+        # 识别基质信息
+        fields = self._frame_recognizer.recognize(
+            screenshot_window(window), layout=self._layout
+        )
+        stats, levels, deprecated_str, locked_str = fields
 
-            # 识别基质信息
-            stats, levels, deprecated_str, locked_str = recognize_essence(
-                window, self._text_recognizer, self._icon_recognizer
+        retries = 0
+        while retries < self._max_recapture and (
+            failed_fields := get_failed_fields(
+                stats, levels, deprecated_str, locked_str
+            )
+        ):
+            retries += 1
+            logger.info(
+                f"部分区域识别失败（{'、'.join(failed_fields)}），"
+                f"第 {retries} 次重新识别..."
+            )
+            metrics.increment("recaptures")
+            with metrics.span("settle_wait"):
+                self._clock.sleep(self._recapture_backoff * retries)
+            fields = self._frame_recognizer.recognize(
+                screenshot_window(window), fields, self._layout
+            )
+            stats, levels, deprecated_str, locked_str = fields
+        log_essence_result(stats, levels, deprecated_str, locked_str)
+        self.retry_histogram[retries] += 1
+
+        def record(quality: str | None, actions: list[str]) -> None:
+            self._journal.record(
+                page=self._page,
+                row=i,
+                column=j,
+                stats=stats,
+                levels=levels,
+                deprecated=deprecated_str,
+                locked=locked_str,
+                quality=quality,
+                actions=actions,
+                retries=retries,
+                duration=round(self._clock.time() - started_at, 4),
             )
 
-            if deprecated_str is None or locked_str is None:
-                continue
-
-            essence_quality = judge_essence_quality(stats, levels)
-            if locked_str == "未锁定" and (
-                (essence_quality == "treasure" and config.treasure_action in "lock")
-                or (essence_quality == "trash" and config.trash_action in "lock")
-            ):
-                click_on_window(window, *LOCK_BUTTON_POS)
-                logger.success("给你自动锁上了，记得保管好哦！(*/ω＼*)")
-            elif locked_str == "已锁定" and (
-                (
-                    essence_quality == "treasure"
-                    and config.treasure_action in ["unlock", "unlock_and_undeprecate"]
-                )
-                or (
-                    essence_quality == "trash"
-                    and config.trash_action in ["unlock", "unlock_and_undeprecate"]
-                )
-            ):
-                click_on_window(window, *LOCK_BUTTON_POS)
-                logger.success("给你自动解锁了！ヾ(≧▽≦*)o")
-            if deprecated_str == "未弃用" and (
-                (
-                    essence_quality == "treasure"
-                    and config.treasure_action == "deprecate"
-                )
-                or (essence_quality == "trash" and config.trash_action == "deprecate")
-            ):
-                click_on_window(window, *DEPRECATE_BUTTON_POS)
-                logger.success("给你自动标记为弃用了！(￣︶￣)>")
-            elif deprecated_str == "已弃用" and (
-                (
-                    essence_quality == "treasure"
-                    and config.treasure_action
-                    in ["undeprecate", "unlock_and_undeprecate"]
-                )
-                or (
-                    essence_quality == "trash"
-                    and config.trash_action in ["undeprecate", "unlock_and_undeprecate"]
-                )
-            ):
-                click_on_window(window, *DEPRECATE_BUTTON_POS)
-                logger.success("给你自动取消弃用啦！(＾Ｕ＾)ノ~ＹＯ")
+        if deprecated_str is None or locked_str is None:
+            self.skipped_count += 1
+            metrics.increment("essences_skipped")
+            record(None, [])
+            return
 
-        else:
-            # 扫描完成
-            logger.info("基质扫描完成。")
+        # 同一个基质的判定和操作使用同一份配置，扫描中修改配置从下一个基质开始生效
+        current = config.model_copy()
+        with metrics.span("judge"):
+            essence_quality = judge_essence_quality(stats, levels, current)
+        metrics.increment(f"essences_{essence_quality}")
+        actions: list[str] = []
+        if locked_str == "未锁定" and (
+            (essence_quality == "treasure" and current.treasure_action in "lock")
+            or (essence_quality == "trash" and current.trash_action in "lock")
+        ):
+            click_on_window(window, *self._layout.lock_button_pos)
+            logger.success("给你自动锁上了，记得保管好哦！(*/ω＼*)")
+            metrics.increment("action_lock")
+            actions.append("lock")
+        elif locked_str == "已锁定" and (
+            (
+                essence_quality == "treasure"
+                and current.treasure_action in ["unlock", "unlock_and_undeprecate"]
+            )
+            or (
+                essence_quality == "trash"
+                and current.trash_action in ["unlock", "unlock_and_undeprecate"]
+            )
+        ):
+            click_on_window(window, *self._layout.lock_button_pos)
+            logger.success("给你自动解锁了！ヾ(≧▽≦*)o")
+            metrics.increment("action_unlock")
+            actions.append("unlock")
+        if deprecated_str == "未弃用" and (
+            (essence_quality == "treasure" and current.treasure_action == "deprecate")
+            or (essence_quality == "trash" and current.trash_action == "deprecate")
+        ):
+            click_on_window(window, *self._layout.deprecate_button_pos)
+            logger.success("给你自动标记为弃用了！(￣︶￣)>")
+            metrics.increment("action_deprecate")
+            actions.append("deprecate")
+        elif deprecated_str == "已弃用" and (
+            (
+                essence_quality == "treasure"
+                and current.treasure_action in ["undeprecate", "unlock_and_undeprecate"]
+            )
+            or (
+                essence_quality == "trash"
+                and current.trash_action in ["undeprecate", "unlock_and_undeprecate"]
+            )
+        ):
+            click_on_window(window, *self._layout.deprecate_button_pos)
+            logger.success("给你自动取消弃用啦！(＾Ｕ＾)ノ~ＹＯ")
+            metrics.increment("action_undeprecate")
+            actions.append("undeprecate")
+        record(essence_quality, actions)
+
+    def log_scan_summary(self) -> None:
+        """输出本次扫描的吞吐量和重新识别次数统计。"""
+        if self.essence_count == 0:
+            return
+        elapsed = self._clock.time() - self._started_at
+        # 用时可能为 0（如使用虚拟时钟），此时不计算速度
+        rate = (
+            f"，平均每分钟 {self.essence_count / elapsed * 60:.1f} 个"
+            if elapsed > 0
+            else ""
+        )
+        logger.info(
+            f"本次共扫描 {self.essence_count} 个基质，用时 {elapsed:.1f} 秒{rate}。"
+        )
+        histogram_str = "、".join(
+            f"{retries} 次 {count} 个"
+            for retries, count in sorted(self.retry_histogram.items())
+        )
+        logger.info(
+            f"重新识别统计：{histogram_str}；重试后仍无法识别而跳过 {self.skipped_count} 个。"
+        )
 
     def stop(self) -> None:
         logger.info("停止基质扫描线程...")
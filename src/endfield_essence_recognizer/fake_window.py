@@ -0,0 +1,211 @@
+"""
+Simulated game window for running the scanner without Windows or the game.
+
+Install it with `utils.window.set_window_backend(FakeWindowBackend(window))`.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Container, Iterable, Sequence
+from dataclasses import dataclass, field
+
+import cv2
+from cv2.typing import MatLike
+
+from endfield_essence_recognizer.essence_scanner import (
+    DEPRECATE_BUTTON_ROI,
+    LOCK_BUTTON_ROI,
+    RESOLUTION,
+    essence_icon_x_list,
+    essence_icon_y_list,
+)
+from endfield_essence_recognizer.grid_scan import THUMBNAIL_SCOPE
+from endfield_essence_recognizer.synthetic import FrameComposer, SyntheticEssence
+from endfield_essence_recognizer.utils.clock import Clock, system_clock
+from endfield_essence_recognizer.utils.image import Scope, scope_to_slice
+
+FAKE_REDRAW_DELAY = 0.05
+"""点击基质后右侧面板刷新的延迟（秒）"""
+
+
+@dataclass
+class FakeWindowEvent:
+    """模拟窗口记录的操作。"""
+
+    time: float
+    kind: str
+    """操作类型："click"、"scroll"、"lock"、"unlock"、"deprecate"、"undeprecate"、"select" """
+    x: int = 0
+    y: int = 0
+    index: int | None = None
+    """操作涉及的基质在库存中的下标"""
+
+
+def _in_scope(x: int, y: int, scope: Scope) -> bool:
+    (x0, y0), (x1, y1) = scope
+    return x0 <= x < x1 and y0 <= y < y1
+
+
+@dataclass
+class FakeGameWindow:
+    """
+    模拟的终末地窗口，显示由 `essences` 组成的武器基质页面。
+
+    点击网格中的基质后，右侧面板在 `redraw_delay` 秒后才切换到新基质；
+    点击锁定/弃用按钮会切换当前选中基质的状态。所有操作记录在 `events` 中。
+    """
+
+    essences: list[SyntheticEssence]
+    title: str = "Endfield"
+    client_size: tuple[int, int] = RESOLUTION
+    """客户区尺寸，与 `RESOLUTION` 不同时画面和点击坐标按比例缩放"""
+    game_version: str | None = "1.0.0.0"
+    redraw_delay: float = FAKE_REDRAW_DELAY
+    rows_per_scroll_click: int = 1
+    isMinimized: bool = False
+    isActive: bool = True
+    events: list[FakeWindowEvent] = field(default_factory=list)
+    composer: FrameComposer = field(default_factory=FrameComposer)
+    clock: Clock = system_clock
+    """刷新延迟和操作记录使用的时钟，应与扫描器使用同一个时钟"""
+
+    first_row: int = 0
+    """当前网格第一行对应的库存行号"""
+    selected_index: int | None = None
+    """当前选中的基质下标"""
+    _displayed_index: int | None = field(default=None, init=False)
+    _redraw_at: float = field(default=0.0, init=False)
+    _version: int = field(default=0, init=False)
+    """网格或基质状态每次变化时递增，用于缓存渲染结果"""
+    _frame_cache: tuple[tuple[int, int | None], MatLike] | None = field(
+        default=None, init=False
+    )
+
+    @property
+    def columns(self) -> int:
+        return len(essence_icon_x_list)
+
+    @property
+    def rows(self) -> int:
+        return len(essence_icon_y_list)
+
+    def restore(self) -> None:
+        self.isMinimized = False
+
+    def activate(self) -> None:
+        self.isActive = True
+
+    def _record(self, kind: str, x: int = 0, y: int = 0) -> None:
+        if kind != "click":
+            self._version += 1
+        self.events.append(
+            FakeWindowEvent(self.clock.time(), kind, x, y, self.selected_index)
+        )
+
+    def events_of(self, *kinds: str) -> list[FakeWindowEvent]:
+        return [event for event in self.events if event.kind in kinds]
+
+    def visible_cells(self) -> Sequence[SyntheticEssence | None]:
+        start = self.first_row * self.columns
+        cells: list[SyntheticEssence | None] = list(
+            self.essences[start : start + self.rows * self.columns]
+        )
+        cells += [None] * (self.rows * self.columns - len(cells))
+        return cells
+
+    def displayed_essence(self) -> SyntheticEssence | None:
+        """右侧面板当前显示的基质，点击后在刷新延迟结束前仍显示旧基质。"""
+        if self.clock.time() >= self._redraw_at:
+            self._displayed_index = self.selected_index
+        if self._displayed_index is None:
+            return None
+        return self.essences[self._displayed_index]
+
+    def render(self) -> MatLike:
+        displayed = self.displayed_essence()
+        key = (self._version, self._displayed_index)
+        if self._frame_cache is None or self._frame_cache[0] != key:
+            frame = self.composer.compose(self.visible_cells(), displayed)
+            if self.client_size != RESOLUTION:
+                frame = cv2.resize(
+                    frame, self.client_size, interpolation=cv2.INTER_AREA
+                )
+            self._frame_cache = (key, frame)
+        return self._frame_cache[1]
+
+    def click(self, x: int, y: int) -> None:
+        self._record("click", x, y)
+        # 换算回参考分辨率下的坐标
+        x = round(x * RESOLUTION[0] / self.client_size[0])
+        y = round(y * RESOLUTION[1] / self.client_size[1])
+        if self.selected_index is not None and _in_scope(x, y, LOCK_BUTTON_ROI):
+            essence = self.essences[self.selected_index]
+            essence.locked = not essence.locked
+            self._record("lock" if essence.locked else "unlock", x, y)
+            return
+        if self.selected_index is not None and _in_scope(x, y, DEPRECATE_BUTTON_ROI):
+            essence = self.essences[self.selected_index]
+            essence.deprecated = not essence.deprecated
+            self._record("deprecate" if essence.deprecated else "undeprecate", x, y)
+            return
+
+        (x0, y0), (x1, y1) = THUMBNAIL_SCOPE
+        for i, cell_y in enumerate(essence_icon_y_list):
+            for j, cell_x in enumerate(essence_icon_x_list):
+                if cell_x + x0 <= x < cell_x + x1 and cell_y + y0 <= y < cell_y + y1:
+                    index = (self.first_row + i) * self.columns + j
+                    if index < len(self.essences):
+                        self.selected_index = index
+                        self._redraw_at = self.clock.time() + self.redraw_delay
+                        self._record("select", x, y)
+                    return
+
+    def scroll(self, clicks: int) -> None:
+        self._record("scroll")
+        total_rows = -(-len(self.essences) // self.columns)
+        max_first_row = max(0, total_rows - self.rows)
+        self.first_row = min(
+            max_first_row, max(0, self.first_row - clicks * self.rows_per_scroll_click)
+        )
+
+
+class FakeWindowBackend:
+    """使用 `FakeGameWindow` 的窗口后端。"""
+
+    def __init__(self, window: FakeGameWindow) -> None:
+        self.window: FakeGameWindow = window
+
+    def get_active_support_window(
+        self, supported_window_titles: Container[str]
+    ) -> FakeGameWindow | None:
+        if self.window.isActive and self.window.title in supported_window_titles:
+            return self.window
+        return None
+
+    def get_support_window(
+        self, supported_window_titles: Iterable[str]
+    ) -> FakeGameWindow | None:
+        if self.window.title in supported_window_titles:
+            return self.window
+        return None
+
+    def get_client_size(self, window: FakeGameWindow) -> tuple[int, int]:
+        return window.client_size
+
+    def get_game_version(self, window: FakeGameWindow) -> str | None:
+        return window.game_version
+
+    def screenshot_window(
+        self, window: FakeGameWindow, relative_region: Scope | None = None
+    ) -> MatLike:
+        return window.render()[scope_to_slice(relative_region)].copy()
+
+    def click_on_window(
+        self, window: FakeGameWindow, relative_x: int, relative_y: int
+    ) -> None:
+        window.click(int(relative_x), int(relative_y))
+
+    def scroll_on_window(
+        self, window: FakeGameWindow, relative_x: int, relative_y: int, clicks: int
+    ) -> None:
+        window.scroll(clicks)
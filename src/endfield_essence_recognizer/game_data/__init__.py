@@ -74,3 +74,11 @@ wiki_group_table: WikiGroupTable = load_table_cfg("WikiGroupTable.json")
 i18n_text_tables: dict[str, I18nTextTable] = {}
 for language in used_i18n_languages:
     i18n_text_tables[language] = load_table_cfg(get_i18n_text_table_filename(language))
+
+
+def load_i18n_text_table(language: str) -> None:
+    """按需加载指定语言的翻译表，已加载时不做任何事"""
+    if language not in i18n_text_tables:
+        i18n_text_tables[language] = load_table_cfg(
+            get_i18n_text_table_filename(language)
+        )
@@ -0,0 +1,222 @@
+"""
+Pre-scan of the essence icon grid from a single screenshot.
+
+The thumbnail and badge scopes below are estimates that have only been checked
+against synthetic frames, not measured on real client screenshots. The pre-scan is
+therefore opt-in (`grid_prescan_enabled`); when a scope is off, cells read as unknown
+and are clicked anyway, but a badge misread as present would skip an essence.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+from cv2.typing import MatLike
+
+from endfield_essence_recognizer.layout import scale_scope
+from endfield_essence_recognizer.utils.image import Scope
+
+# 以下区域均为参考分辨率下相对于基质图标中心（点击位置）的偏移，格式为 ((x0, y0), (x1, y1))
+# 均为估计值，尚未在真实截图上核对
+THUMBNAIL_SCOPE: Scope = ((-60, -60), (60, 60))
+"""基质缩略图区域，用于判断格子是否为空"""
+RARITY_STRIP_SCOPE: Scope = ((-50, 52), (50, 58))
+"""缩略图底部的稀有度色条区域，仅用于合成截图"""
+LOCK_BADGE_SCOPE: Scope = ((-58, -58), (-42, -42))
+"""缩略图左上角的锁定角标区域"""
+DEPRECATE_BADGE_SCOPE: Scope = ((42, -58), (58, -42))
+"""缩略图右上角的弃用角标区域"""
+
+EMPTY_STD_THRESH = 8.0
+"""缩略图亮度标准差低于此值时认为格子为空"""
+BADGE_BRIGHT_VALUE = 200
+"""角标区域中亮度高于此值的像素视为角标像素"""
+BADGE_PRESENT_RATIO = 0.25
+"""角标像素占比高于此值时认为角标存在"""
+BADGE_ABSENT_RATIO = 0.05
+"""角标像素占比低于此值时认为角标不存在，介于两者之间时状态未知"""
+ROW_MATCH_THRESH = 6.0
+"""两行缩略图指纹的平均亮度差低于此值时认为是同一行"""
+
+
+@dataclass
+class GridCell:
+    """预扫描得到的单个格子状态。"""
+
+    row: int
+    column: int
+    x: int
+    """图标中心 x 坐标（客户区像素坐标）"""
+    y: int
+    """图标中心 y 坐标（客户区像素坐标）"""
+    empty: bool
+    locked: bool | None
+    """缩略图上是否有锁定角标，无法判断时为 None"""
+    deprecated: bool | None
+    """缩略图上是否有弃用角标，无法判断时为 None"""
+
+
+def parse_hex_color(color: str) -> tuple[int, int, int]:
+    """将 `RRGGBB` 或 `#RRGGBBAA` 格式的颜色字符串转换为 BGR 元组。"""
+    color = color.lstrip("#")
+    r, g, b = (int(color[i : i + 2], 16) for i in (0, 2, 4))
+    return b, g, r
+
+
+def _sample_regions(
+    image: MatLike,
+    xs: Sequence[int],
+    ys: Sequence[int],
+    scope: Scope,
+    step: int = 1,
+    scale: float = 1.0,
+) -> npt.NDArray[np.uint8]:
+    """
+    一次性截取所有格子的相对区域，区域和采样间隔按 `scale` 缩放。
+
+    Returns:
+        形状为 (行数, 列数, 高, 宽, 通道数) 的数组。
+    """
+    (x0, y0), (x1, y1) = scale_scope(scope, scale, scale)
+    step = max(1, round(step * scale))
+    row_index = (
+        np.asarray(ys)[:, None, None, None]
+        + np.arange(y0, y1, step)[None, None, :, None]
+    )
+    column_index = (
+        np.asarray(xs)[None, :, None, None]
+        + np.arange(x0, x1, step)[None, None, None, :]
+    )
+    row_index = np.clip(row_index, 0, image.shape[0] - 1)
+    column_index = np.clip(column_index, 0, image.shape[1] - 1)
+    regions = np.asarray(image)[row_index, column_index]
+    if regions.ndim == 4:
+        regions = regions[..., None]
+    return regions
+
+
+def _badge_state(regions: npt.NDArray[np.uint8]) -> npt.NDArray[np.float64]:
+    """根据亮像素占比判断角标状态，返回 1（存在）、0（不存在）或 nan（未知）。"""
+    bright_ratio = (regions.max(axis=-1) > BADGE_BRIGHT_VALUE).mean(axis=(2, 3))
+    state = np.full(bright_ratio.shape, np.nan)
+    state[bright_ratio >= BADGE_PRESENT_RATIO] = 1
+    state[bright_ratio <= BADGE_ABSENT_RATIO] = 0
+    return state
+
+
+def analyze_grid(
+    image: MatLike,
+    xs: Sequence[int],
+    ys: Sequence[int],
+    scale: float = 1.0,
+) -> list[GridCell]:
+    """
+    根据一张客户区截图分析所有格子的状态。
+
+    Args:
+        image: 客户区截图（BGR）
+        xs: 各列图标中心 x 坐标
+        ys: 各行图标中心 y 坐标
+        scale: 截图相对参考分辨率的缩放比例
+
+    Returns:
+        按行优先顺序排列的 `GridCell` 列表。
+    """
+    thumbnails = _sample_regions(image, xs, ys, THUMBNAIL_SCOPE, step=4, scale=scale)
+    empty = thumbnails.astype(np.float32).std(axis=(2, 3, 4)) < EMPTY_STD_THRESH
+
+    locked = _badge_state(_sample_regions(image, xs, ys, LOCK_BADGE_SCOPE, scale=scale))
+    deprecated = _badge_state(
+        _sample_regions(image, xs, ys, DEPRECATE_BADGE_SCOPE, scale=scale)
+    )
+
+    cells: list[GridCell] = []
+    for i, j in np.ndindex(empty.shape):
+        cells.append(
+            GridCell(
+                row=i,
+                column=j,
+                x=int(xs[j]),
+                y=int(ys[i]),
+                empty=bool(empty[i, j]),
+                locked=None if np.isnan(locked[i, j]) else bool(locked[i, j]),
+                deprecated=(
+                    None if np.isnan(deprecated[i, j]) else bool(deprecated[i, j])
+                ),
+            )
+        )
+    return cells
+
+
+def row_fingerprints(
+    image: MatLike, xs: Sequence[int], ys: Sequence[int], scale: float = 1.0
+) -> npt.NDArray[np.float32]:
+    """
+    计算每一行缩略图的指纹，用于滚动前后对齐网格。
+
+    Returns:
+        形状为 (行数, 指纹长度) 的数组，每行为该行所有缩略图降采样后的亮度。
+    """
+    thumbnails = _sample_regions(image, xs, ys, THUMBNAIL_SCOPE, step=8, scale=scale)
+    gray = thumbnails.astype(np.float32).mean(axis=-1)
+    return gray.reshape(len(ys), -1)
+
+
+def find_row_offset(
+    previous: npt.NDArray[np.float32], current: npt.NDArray[np.float32]
+) -> int | None:
+    """
+    比较滚动前后的行指纹，计算网格向上移动了多少行。
+
+    选择能使重叠部分全部匹配的最小偏移：0 表示网格没有移动（已到达末尾），
+    None 表示前后两页没有重叠的行。
+    """
+    rows = len(previous)
+    for shift in range(rows):
+        overlap = rows - shift
+        errors = np.abs(previous[shift:] - current[:overlap]).mean(axis=1)
+        if np.all(errors < ROW_MATCH_THRESH):
+            return shift
+    return None
+
+
+def action_changes_state(
+    action: str, locked: bool | None, deprecated: bool | None
+) -> bool:
+    """
+    判断对处于给定状态的基质执行操作时是否可能需要点击按钮。
+
+    状态未知（None）时视为可能需要点击。
+    """
+    if action == "lock":
+        return locked is not True
+    if action == "unlock":
+        return locked is not False
+    if action == "deprecate":
+        return deprecated is not True
+    if action == "undeprecate":
+        return deprecated is not False
+    if action == "unlock_and_undeprecate":
+        return locked is not False or deprecated is not False
+    return False
+
+
+def skip_reason(cell: GridCell, treasure_action: str, trash_action: str) -> str | None:
+    """
+    返回预扫描跳过该格子的原因，需要点击时返回 None。
+
+    空格子被跳过；对于非空格子，如果无论它是宝藏还是养成材料，
+    对应的操作都不会改变缩略图上可见的状态，也会被跳过。
+    """
+    if cell.empty:
+        return "空格子"
+    if action_changes_state(
+        treasure_action, cell.locked, cell.deprecated
+    ) or action_changes_state(trash_action, cell.locked, cell.deprecated):
+        return None
+    locked = "已锁定" if cell.locked else "未锁定"
+    deprecated = "已弃用" if cell.deprecated else "未弃用"
+    return f"缩略图显示{locked}、{deprecated}，宝藏和养成材料都无需操作"
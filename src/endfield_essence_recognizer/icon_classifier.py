@@ -0,0 +1,195 @@
+"""
+Fast classifier for fixed-position icon states (lock and deprecate buttons).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+from cv2.typing import MatLike
+
+from endfield_essence_recognizer.utils.image import to_gray_image
+
+ICON_FEATURE_GRID = (4, 4)
+"""特征分块数量 (列, 行)"""
+ICON_MIN_CONFIDENCE = 0.4
+"""最低置信度，低于此值时交给模板匹配判断"""
+
+
+class IconStateClassifier:
+    """
+    基于分块平均亮度的最近邻分类器。
+
+    每张模板被缩放为 `grid` 大小的平均亮度特征，识别时在 ROI 内的所有位置取与模板同样大小的
+    区域计算特征，与各标签的模板特征比较距离。最近距离超过由模板校准的上限，
+    或最近与次近标签拉不开差距时，返回 None 表示不确定。
+    """
+
+    def __init__(
+        self,
+        grid: tuple[int, int] = ICON_FEATURE_GRID,
+        min_confidence: float = ICON_MIN_CONFIDENCE,
+    ) -> None:
+        self.grid: tuple[int, int] = grid
+        self.min_confidence: float = min_confidence
+        self._label_names: list[str] = []
+        self._label_ids: npt.NDArray[np.intp] = np.empty(0, dtype=np.intp)
+        self._features: npt.NDArray[np.float32] = np.empty((0, grid[0] * grid[1]))
+        self._template_size: tuple[int, int] = (0, 0)
+        self._max_distance: float = 0.0
+        self._index_cache: dict[
+            tuple[tuple[int, int], int, int],
+            tuple[npt.NDArray[np.intp], npt.NDArray[np.float32]],
+        ] = {}
+
+    @property
+    def is_fitted(self) -> bool:
+        return len(self._label_names) > 0
+
+    def _window_indices(
+        self, shape: tuple[int, int], height: int, width: int
+    ) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.float32]]:
+        """
+        计算积分图中各窗口各分块四个角的展平下标，按 (图像尺寸, 窗口尺寸) 缓存。
+
+        Returns:
+            (下标数组, 分块面积)，下标数组形状为 (4, 窗口数量, 分块数量)。
+        """
+        key = (shape, height, width)
+        cached = self._index_cache.get(key)
+        if cached is not None:
+            return cached
+
+        columns, rows = self.grid
+        ys = np.linspace(0, height, rows + 1).round().astype(int)
+        xs = np.linspace(0, width, columns + 1).round().astype(int)
+        areas = (np.diff(ys)[:, None] * np.diff(xs)[None, :]).astype(np.float32)
+
+        stride = shape[1] + 1  # 积分图比原图多一行一列
+        oy = np.arange(shape[0] - height + 1)[:, None, None, None]
+        ox = np.arange(shape[1] - width + 1)[None, :, None, None]
+        y0, y1 = ys[:-1][:, None], ys[1:][:, None]
+        x0, x1 = xs[:-1][None, :], xs[1:][None, :]
+        corners = [
+            (oy + y1) * stride + ox + x1,
+            (oy + y0) * stride + ox + x1,
+            (oy + y1) * stride + ox + x0,
+            (oy + y0) * stride + ox + x0,
+        ]
+        indices = np.stack([c.reshape(-1, rows * columns) for c in corners])
+        cached = (indices, areas.ravel() * 255)
+        self._index_cache[key] = cached
+        return cached
+
+    def _cell_means(
+        self, gray: MatLike, height: int, width: int
+    ) -> npt.NDArray[np.float32]:
+        """
+        计算图像中所有 `height`x`width` 窗口的分块平均亮度。
+
+        Returns:
+            形状为 (窗口数量, 分块数量) 的特征矩阵，亮度归一化到 0~1。
+        """
+        indices, areas = self._window_indices(gray.shape[:2], height, width)
+        integral = cv2.integral(gray).ravel()
+        corners = integral[indices]
+        sums = corners[0] - corners[1] - corners[2] + corners[3]
+        return sums.astype(np.float32) / areas
+
+    def fit(self, templates: Mapping[str, list[MatLike]]) -> None:
+        """根据各标签的模板图像校准分类器。"""
+        labels: list[str] = []
+        features: list[npt.NDArray[np.float32]] = []
+        heights: list[int] = []
+        widths: list[int] = []
+        for label, images in templates.items():
+            for image in images:
+                gray = to_gray_image(image)
+                labels.append(label)
+                features.append(self._cell_means(gray, *gray.shape[:2])[0])
+                heights.append(gray.shape[0])
+                widths.append(gray.shape[1])
+        if not labels:
+            return
+
+        self._label_names = list(dict.fromkeys(labels))
+        self._label_ids = np.array(
+            [self._label_names.index(label) for label in labels], dtype=np.intp
+        )
+        self._features = np.stack(features)
+        self._template_size = (int(np.median(heights)), int(np.median(widths)))
+
+        # 不同标签模板之间的最小距离的一半作为可接受的最大距离
+        distances = np.linalg.norm(
+            self._features[:, None, :] - self._features[None, :, :], axis=2
+        )
+        label_array = np.array(labels)
+        different = label_array[:, None] != label_array[None, :]
+        self._max_distance = (
+            float(distances[different].min()) / 2 if different.any() else np.inf
+        )
+
+    def _rank(
+        self, roi_image: MatLike
+    ) -> tuple[npt.NDArray[np.intp], float, bool] | None:
+        """
+        按与 ROI 的距离对标签排序。
+
+        Returns:
+            (从近到远排列的标签下标, 置信度, 是否确定) 元组。未校准或 ROI 小于模板时为 None。
+        """
+        if not self.is_fitted:
+            return None
+
+        gray = to_gray_image(roi_image)
+        height, width = self._template_size
+        if gray.shape[0] < height or gray.shape[1] < width:
+            return None
+        # 图标在 ROI 中的位置可能有几个像素的偏移，在所有位置取特征并取最近距离
+        features = self._cell_means(gray, height, width)
+        distances = np.linalg.norm(
+            self._features[:, None, :] - features[None, :, :], axis=2
+        ).min(axis=1)
+        label_distances = np.full(len(self._label_names), np.inf, dtype=np.float32)
+        np.minimum.at(label_distances, self._label_ids, distances)
+        ranked = np.argsort(label_distances)
+
+        best_distance = float(label_distances[ranked[0]])
+        second_distance = (
+            float(label_distances[ranked[1]]) if len(ranked) > 1 else np.inf
+        )
+        confidence = 1 - best_distance / second_distance if second_distance > 0 else 0.0
+        certain = (
+            best_distance <= self._max_distance and confidence >= self.min_confidence
+        )
+        return ranked, confidence, certain
+
+    def classify(self, roi_image: MatLike) -> tuple[str | None, float]:
+        """
+        识别 ROI 图像的图标状态。
+
+        Returns:
+            (标签, 置信度) 元组。不确定时标签为 None。
+        """
+        ranked = self._rank(roi_image)
+        if ranked is None:
+            return None, 0.0
+        order, confidence, certain = ranked
+        if not certain:
+            return None, confidence
+        return self._label_names[order[0]], confidence
+
+    def candidates(self, roi_image: MatLike, k: int) -> list[str]:
+        """
+        确定时只返回距离最近的一个标签，不确定时返回空列表。
+
+        确定的结果已经与次近标签拉开了差距，只需用一次模板匹配验证第一名，
+        不必再匹配其余 k - 1 个候选。
+        """
+        ranked = self._rank(roi_image)
+        if ranked is None or not ranked[2] or k < 1:
+            return []
+        return [self._label_names[ranked[0][0]]]
@@ -0,0 +1,137 @@
+"""
+Joint decoding of the three essence stat slots using known stat combinations.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from endfield_essence_recognizer.utils.log import logger
+
+type StatCombination = tuple[str | None, str | None, str | None]
+
+JOINT_MIN_MARGIN = 0.05
+"""独立识别时第一名与第二名的最小分数差，低于此值时尝试联合解码"""
+JOINT_MAX_SLOT_DEFICIT = 0.1
+"""联合解码改写某个属性时，允许其分数比独立识别最佳分数低的最大差值"""
+JOINT_LOW_THRESH = 0.4
+"""联合解码结果中每个属性的最低分数"""
+
+
+class JointDecoder:
+    """
+    根据已知的属性组合对三个属性的分数向量做联合解码。
+
+    分数矩阵的形状为 (3, len(labels))，列顺序与 `labels` 一致，
+    通常来自 `Recognizer.score_matrix` 或 `RecognitionDetail.scores`。
+    """
+
+    def __init__(
+        self,
+        labels: Sequence[str],
+        combinations: Iterable[StatCombination],
+        high_thresh: float,
+        low_thresh: float,
+        joint_low_thresh: float = JOINT_LOW_THRESH,
+        min_margin: float = JOINT_MIN_MARGIN,
+        max_slot_deficit: float = JOINT_MAX_SLOT_DEFICIT,
+    ) -> None:
+        self.labels: list[str] = list(labels)
+        self.label_index: dict[str, int] = {
+            label: index for index, label in enumerate(self.labels)
+        }
+        self.high_thresh: float = high_thresh
+        self.low_thresh: float = low_thresh
+        self.joint_low_thresh: float = joint_low_thresh
+        self.min_margin: float = min_margin
+        self.max_slot_deficit: float = max_slot_deficit
+        self._combinations: set[tuple[int, int, int]] = set()
+        self._combination_array: npt.NDArray[np.intp] = np.empty((0, 3), np.intp)
+        self.add_combinations(combinations)
+
+    def add_combinations(self, combinations: Iterable[StatCombination]) -> None:
+        """添加已知的属性组合，包含未知标签或空属性的组合会被忽略。"""
+        for attribute, secondary, skill in combinations:
+            if (
+                attribute not in self.label_index
+                or secondary not in self.label_index
+                or skill not in self.label_index
+            ):
+                continue
+            self._combinations.add(
+                (
+                    self.label_index[attribute],
+                    self.label_index[secondary],
+                    self.label_index[skill],
+                )
+            )
+        self._combination_array = np.array(
+            sorted(self._combinations), dtype=np.intp
+        ).reshape(-1, 3)
+
+    @property
+    def combination_count(self) -> int:
+        return len(self._combination_array)
+
+    def fixed_scores(self, label: str | None) -> npt.NDArray[np.float32]:
+        """构造已确定标签的分数向量：该标签为 1，其余为 -inf。"""
+        scores = np.full(len(self.labels), -np.inf, dtype=np.float32)
+        if label is not None and label in self.label_index:
+            scores[self.label_index[label]] = 1.0
+        return scores
+
+    def decode(self, scores: npt.NDArray[np.floating]) -> list[str | None]:
+        """
+        对三个属性的分数矩阵做解码。
+
+        如果独立识别的每个属性都达到高分数阈值且与第二名拉开差距，直接返回独立识别结果；
+        否则在已知组合中寻找总分最高的组合，当该组合的每个属性都不低于
+        `joint_low_thresh`，且被改写的属性分数与独立最佳分数相差不超过
+        `max_slot_deficit` 时采用该组合，否则仍返回独立识别结果。
+
+        Args:
+            scores: 形状为 (3, len(labels)) 的分数矩阵
+
+        Returns:
+            三个属性的标签列表，无法识别的属性为 None。
+        """
+        rows = np.arange(scores.shape[0])
+        best = np.argmax(scores, axis=1)
+        best_scores = scores[rows, best]
+        independent: list[str | None] = [
+            self.labels[index] if score >= self.low_thresh else None
+            for index, score in zip(best, best_scores)
+        ]
+
+        if scores.shape[1] > 1:
+            second_scores = np.partition(scores, -2, axis=1)[:, -2]
+            margins = best_scores - second_scores
+        else:
+            margins = np.full(scores.shape[0], np.inf)
+        if np.all(best_scores >= self.high_thresh) and np.all(
+            margins >= self.min_margin
+        ):
+            return independent
+
+        if not len(self._combination_array):
+            return independent
+
+        combination_scores = scores[rows, self._combination_array].sum(axis=1)
+        combination = self._combination_array[np.argmax(combination_scores)]
+        joint_scores = scores[rows, combination]
+        deficits = best_scores - joint_scores
+        if np.all(joint_scores >= self.joint_low_thresh) and np.all(
+            deficits <= self.max_slot_deficit
+        ):
+            joint: list[str | None] = [self.labels[index] for index in combination]
+            if joint != independent:
+                logger.debug(
+                    f"联合解码修正属性: {independent} -> {joint} "
+                    f"(分数: {np.round(joint_scores, 3).tolist()})"
+                )
+            return joint
+
+        return independent
@@ -0,0 +1,147 @@
+"""
+Layout profiles: every ROI, click point and grid position for one client size.
+
+Positions are measured on a 1920x1080 reference layout and scaled once per client
+size. Profiles are cached, so looking one up for a frame is a dictionary lookup.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+
+import numpy as np
+import numpy.typing as npt
+from cv2.typing import MatLike
+
+from endfield_essence_recognizer.utils.image import (
+    Coordinate,
+    Scope,
+    resize_by,
+    scope_to_slice,
+)
+
+ASPECT_RATIO_TOLERANCE = 0.01
+"""客户区宽高比与参考分辨率的最大相对误差，超过时无法换算坐标"""
+
+
+def scale_point(point: Coordinate, sx: float, sy: float) -> Coordinate:
+    x, y = point
+    return round(x * sx), round(y * sy)
+
+
+def scale_scope(scope: Scope, sx: float, sy: float) -> Scope:
+    (x0, y0), (x1, y1) = scope
+    return scale_point((x0, y0), sx, sy), scale_point((x1, y1), sx, sy)
+
+
+def offset_point(point: Coordinate, offset: Coordinate) -> Coordinate:
+    return point[0] + offset[0], point[1] + offset[1]
+
+
+def offset_scope(scope: Scope, offset: Coordinate) -> Scope:
+    return offset_point(scope[0], offset), offset_point(scope[1], offset)
+
+
+@dataclass(frozen=True, eq=False)
+class LayoutProfile:
+    """某一客户区尺寸下界面元素的位置（客户区像素坐标）。"""
+
+    size: tuple[int, int]
+    """客户区尺寸 (宽, 高)"""
+    scale: float
+    """相对参考布局的缩放比例"""
+    essence_icon_x_list: npt.NDArray[np.int_]
+    """基质图标网格各列中心 x 坐标"""
+    essence_icon_y_list: npt.NDArray[np.int_]
+    """基质图标网格各行中心 y 坐标"""
+    essence_ui_roi: Scope
+    """基质界面标题区域，用于确认当前界面"""
+    area: Scope
+    """右侧基质详情面板区域"""
+    deprecate_button_pos: Coordinate
+    lock_button_pos: Coordinate
+    deprecate_button_roi: Scope
+    lock_button_roi: Scope
+    stats_rois: tuple[Scope, ...]
+    """各属性截图区域"""
+    stats_level_icons: tuple[tuple[Coordinate, ...], ...]
+    """各属性等级图标坐标"""
+    level_icon_sample_radius: int
+    """等级图标状态采样半径"""
+
+    @property
+    def match_scale(self) -> float:
+        """
+        模板匹配使用的缩放比例。
+
+        低于参考分辨率时缩小模板；高于参考分辨率时把截取的区域缩小到参考尺寸，
+        使匹配耗时不随分辨率增加。
+        """
+        return min(1.0, self.scale)
+
+    def crop(self, frame: MatLike, scope: Scope) -> MatLike:
+        """从客户区截图中裁剪出区域，并缩放到 `match_scale` 对应的尺寸。"""
+        roi = frame[scope_to_slice(scope)]
+        if self.scale > 1:
+            roi = resize_by(roi, 1 / self.scale)
+        return roi
+
+    def shifted(
+        self, grid_offset: Coordinate, panel_offset: Coordinate
+    ) -> LayoutProfile:
+        """将图标网格和详情面板分别平移（客户区像素），用于校准后的布局。"""
+        if grid_offset == (0, 0) and panel_offset == (0, 0):
+            return self
+        return replace(
+            self,
+            essence_icon_x_list=self.essence_icon_x_list + grid_offset[0],
+            essence_icon_y_list=self.essence_icon_y_list + grid_offset[1],
+            area=offset_scope(self.area, panel_offset),
+            deprecate_button_pos=offset_point(self.deprecate_button_pos, panel_offset),
+            lock_button_pos=offset_point(self.lock_button_pos, panel_offset),
+            deprecate_button_roi=offset_scope(self.deprecate_button_roi, panel_offset),
+            lock_button_roi=offset_scope(self.lock_button_roi, panel_offset),
+            stats_rois=tuple(
+                offset_scope(roi, panel_offset) for roi in self.stats_rois
+            ),
+            stats_level_icons=tuple(
+                tuple(offset_point(point, panel_offset) for point in points)
+                for points in self.stats_level_icons
+            ),
+        )
+
+    def scaled_to(self, size: tuple[int, int]) -> LayoutProfile:
+        """
+        将本布局换算到另一客户区尺寸。
+
+        Raises:
+            ValueError: 宽高比与本布局不同，界面元素的位置无法换算。
+        """
+        if size == self.size:
+            return self
+        width, height = size
+        sx, sy = width / self.size[0], height / self.size[1]
+        if abs(sx / sy - 1) > ASPECT_RATIO_TOLERANCE:
+            raise ValueError(
+                f"客户区尺寸 {width}x{height} 的宽高比与 "
+                f"{self.size[0]}x{self.size[1]} 不同"
+            )
+        return replace(
+            self,
+            size=size,
+            scale=self.scale * sy,
+            essence_icon_x_list=np.round(self.essence_icon_x_list * sx).astype(int),
+            essence_icon_y_list=np.round(self.essence_icon_y_list * sy).astype(int),
+            essence_ui_roi=scale_scope(self.essence_ui_roi, sx, sy),
+            area=scale_scope(self.area, sx, sy),
+            deprecate_button_pos=scale_point(self.deprecate_button_pos, sx, sy),
+            lock_button_pos=scale_point(self.lock_button_pos, sx, sy),
+            deprecate_button_roi=scale_scope(self.deprecate_button_roi, sx, sy),
+            lock_button_roi=scale_scope(self.lock_button_roi, sx, sy),
+            stats_rois=tuple(scale_scope(roi, sx, sy) for roi in self.stats_rois),
+            stats_level_icons=tuple(
+                tuple(scale_point(point, sx, sy) for point in points)
+                for points in self.stats_level_icons
+            ),
+            level_icon_sample_radius=max(1, round(self.level_icon_sample_radius * sy)),
+        )
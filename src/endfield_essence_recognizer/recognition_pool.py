@@ -0,0 +1,346 @@
+"""
+Process pool for recognizing many frames at once.
+
+Every worker process builds the recognizers and loads the template bank once in its
+initializer. Used by the batch CLI and the `/api/recognize` endpoint.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import multiprocessing
+import os
+import sys
+import zipfile
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from endfield_essence_recognizer.utils.log import logger
+from endfield_essence_recognizer.utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from cv2.typing import MatLike
+
+    from endfield_essence_recognizer.essence_scanner import LocalFrameRecognizer
+
+# 以下为进程池中每个子进程的状态
+_frame_recognizer: LocalFrameRecognizer | None = None
+_source: Path | None = None
+_archive: zipfile.ZipFile | None = None
+_config_data: dict[str, Any] | None = None
+"""子进程当前使用的用户配置"""
+
+
+def _lower_priority() -> None:
+    """降低当前进程的调度优先级，让出 CPU 给界面和实时扫描。"""
+    try:
+        if sys.platform == "win32":
+            import win32api
+            import win32process
+
+            win32process.SetPriorityClass(
+                win32api.GetCurrentProcess(), win32process.BELOW_NORMAL_PRIORITY_CLASS
+            )
+        else:
+            os.nice(10)
+    except Exception as e:
+        logger.warning(f"无法降低识别子进程的优先级：{e}")
+
+
+def _apply_config(config_data: dict[str, Any]) -> None:
+    """在子进程中使用主进程的用户配置，配置未变化时不做任何事。"""
+    global _config_data
+
+    if config_data == _config_data:
+        return
+    from endfield_essence_recognizer.config import config
+
+    config.update_from_dict(config_data)
+    _config_data = config_data
+
+
+def init_worker(
+    source: str | None, config_data: dict[str, Any], low_priority: bool = False
+) -> None:
+    """
+    子进程初始化：构造识别器并加载一次模板。
+
+    Args:
+        source: 截图目录、zip 压缩包或视频文件，识别上传的图片时为 None
+        config_data: 主进程中的用户配置
+        low_priority: 是否以较低优先级运行
+    """
+    global _frame_recognizer, _source, _archive
+
+    logger.remove()
+    if sys.stderr:
+        logger.add(sys.stderr, level="ERROR")
+    if low_priority:
+        _lower_priority()
+
+    import cv2
+
+    from endfield_essence_recognizer.recognition_worker import (
+        create_default_frame_recognizer,
+    )
+
+    # 并行由进程池完成，避免每个子进程再各自启动一组 OpenCV 线程
+    cv2.setNumThreads(1)
+    _apply_config(config_data)
+    _frame_recognizer = create_default_frame_recognizer()  # type: ignore[assignment]
+    if source is not None:
+        _source = Path(source)
+        _archive = zipfile.ZipFile(_source) if zipfile.is_zipfile(_source) else None
+
+
+def _finite(value: float) -> float | None:
+    """JSON 不支持 inf，没有匹配结果的分数记为 None。"""
+    return round(value, 4) if math.isfinite(value) else None
+
+
+def recognize_frame(frame: MatLike, record: dict[str, Any]) -> dict[str, Any]:
+    """在子进程中识别一帧 16:9 的客户区截图，将结果写入 `record`。"""
+    from endfield_essence_recognizer.essence_scanner import (
+        judge_essence_quality,
+        recognize_essence_detailed,
+    )
+    from endfield_essence_recognizer.game_data.weapon import get_gem_tag_name
+
+    assert _frame_recognizer is not None
+    result = recognize_essence_detailed(
+        frame, _frame_recognizer.text_recognizer, _frame_recognizer.icon_recognizer
+    )
+    record.update(
+        stats=result.stats,
+        stat_names=[
+            get_gem_tag_name(stat, "CN") if stat is not None else None
+            for stat in result.stats
+        ],
+        levels=result.levels,
+        deprecated=result.deprecated,
+        locked=result.locked,
+        stat_scores=[_finite(score) for score in result.stat_scores],
+        stat_candidates=[
+            [(label, _finite(score)) for label, score in candidates]
+            for candidates in result.stat_candidates
+        ],
+        deprecated_score=_finite(result.deprecated_score),
+        locked_score=_finite(result.locked_score),
+    )
+    if None not in result.stats:
+        record["quality"] = judge_essence_quality(result.stats, result.levels)
+    return record
+
+
+def recognize_file(name: str) -> dict[str, Any]:
+    """在子进程中识别截图目录或压缩包中的一张截图，返回结果记录。"""
+    from endfield_essence_recognizer.utils.image import load_image
+
+    assert _source is not None
+    record: dict[str, Any] = {"source": name}
+    try:
+        frame = load_image(
+            _archive.read(name) if _archive is not None else _source / name
+        )
+        return recognize_frame(frame, record)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+
+def recognize_image_bytes(
+    item: tuple[str, bytes], config_data: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    """
+    在子进程中识别编码后的图片（如上传的 PNG），返回结果记录。
+
+    Args:
+        item: (文件名, 图片字节)
+        config_data: 提交任务时主进程的用户配置；配置可能在进程池创建后被修改，
+            因此随每个任务发送
+    """
+    from endfield_essence_recognizer.utils.image import load_image
+
+    name, data = item
+    record: dict[str, Any] = {"source": name}
+    if config_data is not None:
+        _apply_config(config_data)
+    try:
+        return recognize_frame(load_image(data), record)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+
+def recognize_video_frame(item: tuple[int, float, MatLike]) -> dict[str, Any]:
+    """在子进程中识别视频中的一帧，返回结果记录。"""
+    index, timestamp, frame = item
+    assert _source is not None
+    record: dict[str, Any] = {
+        "source": _source.name,
+        "frame": index,
+        "time": round(timestamp, 3),
+    }
+    try:
+        return recognize_frame(frame, record)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+
+def create_recognition_pool(
+    workers: int, source: Path | None = None, low_priority: bool = False
+) -> ProcessPoolExecutor:
+    """
+    创建识别进程池，子进程使用主进程当前的用户配置。
+
+    配置只在子进程启动时发送一次；进程池长期存在时，任务需要自行携带最新的配置，
+    见 `recognize_image_bytes`。
+    """
+    from endfield_essence_recognizer.config import config
+
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(
+            str(source) if source is not None else None,
+            config.model_dump(),
+            low_priority,
+        ),
+    )
+
+
+def ordered_map[T](
+    pool: ProcessPoolExecutor,
+    func: Callable[[T], dict[str, Any]],
+    items: Iterable[T],
+    window: int,
+) -> Iterator[dict[str, Any]]:
+    """
+    与 `pool.map` 相同，但最多只有 `window` 个任务在途。
+
+    `pool.map` 会先提交所有任务，输入是流式的视频帧时内存会无限增长。
+    """
+    pending: deque[Future[dict[str, Any]]] = deque()
+    for item in items:
+        pending.append(pool.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class RecognitionQueueFull(RuntimeError):
+    """等待识别的图片过多。"""
+
+
+class RecognitionPoolUnavailable(RuntimeError):
+    """识别子进程异常退出或进程池已关闭，下次请求时重新创建进程池。"""
+
+
+class RecognitionBatchTooLarge(ValueError):
+    """一次请求中的图片数量超过等待队列的容量，无论何时都无法接受。"""
+
+
+class AsyncRecognitionPool:
+    """
+    供 HTTP 接口使用的识别进程池。
+
+    进程池在第一次请求时才启动，子进程以较低优先级运行。同时识别的图片数量不超过
+    子进程数量，等待中的图片超过 `max_queue` 时直接拒绝新请求，避免请求堆积后
+    长时间占满 CPU，影响实时扫描。每个请求都带上收到请求时的用户配置快照，
+    进程池启动后修改的配置也会生效。
+    """
+
+    def __init__(self, workers: int, max_queue: int) -> None:
+        self.workers: int = max(1, workers)
+        self.max_queue: int = max_queue
+        self._pool: ProcessPoolExecutor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._queued: int = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """等待识别的图片数量"""
+        return self._queued
+
+    def _update_queue(self, delta: int) -> None:
+        self._queued += delta
+        metrics.set_gauge("api_recognize_queue_depth", self._queued)
+
+    async def recognize(
+        self, images: Sequence[tuple[str, bytes]]
+    ) -> list[dict[str, Any]]:
+        """
+        识别多张编码后的图片，按输入顺序返回结果记录。
+
+        Raises:
+            RecognitionBatchTooLarge: 图片数量超过 `max_queue`。
+            RecognitionQueueFull: 等待识别的图片过多。
+            RecognitionPoolUnavailable: 识别子进程异常退出，可稍后重试。
+        """
+        if len(images) > self.max_queue:
+            metrics.increment("api_recognize_rejected")
+            raise RecognitionBatchTooLarge(
+                f"一次最多识别 {self.max_queue} 张图片，收到 {len(images)} 张"
+            )
+        if self._queued + len(images) > self.max_queue:
+            metrics.increment("api_recognize_rejected")
+            raise RecognitionQueueFull(
+                f"等待识别的图片过多（{self._queued} 张），请稍后再试"
+            )
+        if self._pool is None:
+            self._pool = create_recognition_pool(self.workers, low_priority=True)
+            self._semaphore = asyncio.Semaphore(self.workers)
+
+        from endfield_essence_recognizer.config import config
+
+        config_data = config.model_dump()
+        self._update_queue(len(images))
+        return await asyncio.gather(
+            *(
+                self._recognize_one(index, item, config_data)
+                for index, item in enumerate(images)
+            )
+        )
+
+    async def _recognize_one(
+        self, index: int, item: tuple[str, bytes], config_data: dict[str, Any]
+    ) -> dict[str, Any]:
+        assert self._semaphore is not None
+        dequeued = False
+        try:
+            async with self._semaphore:
+                self._update_queue(-1)
+                dequeued = True
+                pool = self._pool
+                if pool is None:
+                    raise RecognitionPoolUnavailable("识别进程池已关闭，请稍后再试")
+                try:
+                    with metrics.span("api_recognize"):
+                        record = await asyncio.get_running_loop().run_in_executor(
+                            pool, recognize_image_bytes, item, config_data
+                        )
+                except BrokenProcessPool as e:
+                    # 子进程异常退出，释放进程池，下次请求时重新创建
+                    if self._pool is pool:
+                        self._pool = None
+                        pool.shutdown(wait=False, cancel_futures=True)
+                    raise RecognitionPoolUnavailable(
+                        "识别进程异常退出，请稍后再试"
+                    ) from e
+        finally:
+            if not dequeued:
+                self._update_queue(-1)
+        return {"index": index, **record}
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,408 @@
+"""
+Optional recognition worker process.
+
+The worker owns its own recognizers and template bank, so template matching runs
+outside the interpreter that serves the UI, the API and the keyboard hook. Frames are
+passed through a ring of shared-memory slots; only slot indices, results and log
+records travel over the pipe.
+"""
+
+from __future__ import annotations
+
+import itertools
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+from cv2.typing import MatLike
+
+from endfield_essence_recognizer.config import config
+from endfield_essence_recognizer.utils.log import logger
+from endfield_essence_recognizer.utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+    from multiprocessing.process import BaseProcess
+
+    from endfield_essence_recognizer.essence_scanner import (
+        EssenceFields,
+        FrameRecognizer,
+    )
+    from endfield_essence_recognizer.layout import LayoutProfile
+
+WORKER_RING_SLOTS = 4
+"""共享内存环形缓冲区的槽位数量，也是同时在途的最大请求数"""
+WORKER_SLOT_BYTES = 1920 * 1080 * 3
+"""每个槽位的字节数，足够存放一张 1920×1080 的 BGR 截图"""
+WORKER_START_TIMEOUT = 60.0
+"""等待子进程加载模板的最长时间（秒）"""
+WORKER_REQUEST_TIMEOUT = 30.0
+"""等待单个识别结果的最长时间（秒）"""
+
+
+def create_default_frame_recognizer() -> FrameRecognizer:
+    """构造识别器并加载模板，在子进程中调用。"""
+    from endfield_essence_recognizer import create_recognizers
+    from endfield_essence_recognizer.essence_scanner import LocalFrameRecognizer
+
+    text_recognizer, icon_recognizer = create_recognizers()
+    text_recognizer.load_templates()
+    icon_recognizer.load_templates()
+    return LocalFrameRecognizer(text_recognizer, icon_recognizer)
+
+
+class SharedFrameRing:
+    """共享内存中由固定大小的槽位组成的帧缓冲区。"""
+
+    def __init__(
+        self,
+        slots: int = WORKER_RING_SLOTS,
+        slot_bytes: int = WORKER_SLOT_BYTES,
+        name: str | None = None,
+    ) -> None:
+        """
+        Args:
+            slots: 槽位数量
+            slot_bytes: 每个槽位的字节数
+            name: 已有共享内存的名称；为 None 时创建新的共享内存，并在 `close` 时释放
+        """
+        self.slots: int = slots
+        self.slot_bytes: int = slot_bytes
+        self._owner: bool = name is None
+        if self._owner:
+            self._shm = SharedMemory(create=True, size=slots * slot_bytes)
+        elif sys.version_info >= (3, 13):
+            self._shm = SharedMemory(name=name, track=False)
+        else:
+            self._shm = SharedMemory(name=name)
+            if os.name == "posix":
+                # 只由创建者释放共享内存，否则退出时资源跟踪器会重复释放
+                resource_tracker.unregister(self._shm._name, "shared_memory")  # type: ignore[attr-defined]
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def fits(self, frame: MatLike) -> bool:
+        return frame.dtype == np.uint8 and frame.nbytes <= self.slot_bytes
+
+    def write(self, slot: int, frame: MatLike) -> tuple[int, ...]:
+        """将帧复制到第 `slot` 个槽位，返回帧的形状。"""
+        if not self.fits(frame):
+            raise ValueError(f"帧 {frame.shape} 超出槽位大小 {self.slot_bytes} 字节")
+        view = self.read(slot, frame.shape)
+        view[...] = frame
+        return frame.shape
+
+    def read(self, slot: int, shape: tuple[int, ...]) -> np.ndarray:
+        """返回第 `slot` 个槽位中指定形状的帧，与共享内存共用数据，不复制。"""
+        return np.ndarray(
+            shape, dtype=np.uint8, buffer=self._shm.buf, offset=slot * self.slot_bytes
+        )
+
+    def close(self) -> None:
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class RecognitionWorker:
+    """
+    在子进程中识别截图的 `FrameRecognizer`。
+
+    子进程启动时构造识别器并加载一次模板。调用方把截图写入空闲槽位后只通过管道发送
+    槽位编号，槽位在结果返回后才被释放，因此槽位数量同时限制了在途请求数。
+    布局校准结果只保存在主进程中，调用方给出的布局随每个请求一起发送；用户配置在
+    启动时发送一次，之后只在发生变化时随请求发送。
+    子进程中的日志随结果一起发回，在本进程中重新记录。
+
+    用法：
+
+        worker = RecognitionWorker()
+        worker.start()
+        stats, levels, deprecated_str, locked_str = worker.recognize(frame)
+        worker.stop()
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], FrameRecognizer] = create_default_frame_recognizer,
+        slots: int = WORKER_RING_SLOTS,
+        slot_bytes: int = WORKER_SLOT_BYTES,
+        request_timeout: float = WORKER_REQUEST_TIMEOUT,
+    ) -> None:
+        """
+        Args:
+            factory: 在子进程中构造识别对象的函数，必须可以被 pickle
+            slots: 共享内存槽位数量
+            slot_bytes: 每个槽位的字节数，更大的帧直接通过管道发送
+            request_timeout: 等待单个识别结果的最长时间（秒）
+        """
+        self._factory = factory
+        self._slots: int = slots
+        self._slot_bytes: int = slot_bytes
+        self._request_timeout: float = request_timeout
+        self._ring: SharedFrameRing | None = None
+        self._conn: Connection | None = None
+        self._process: BaseProcess | None = None
+        self._receiver: threading.Thread | None = None
+        self._lock = threading.Lock()
+        """保护管道发送和在途请求表"""
+        self._free_slots: queue.Queue[int] = queue.Queue()
+        self._pending: dict[int, tuple[int, Future[EssenceFields]]] = {}
+        self._request_ids = itertools.count()
+        self._closed: bool = True
+        self._sent_config: dict[str, Any] | None = None
+        """最近一次发送给子进程的用户配置"""
+        self._reset_language: bool = False
+        """是否需要在下一个请求中让子进程清除失败的语言检测记录"""
+
+    @property
+    def is_alive(self) -> bool:
+        return (
+            not self._closed and self._process is not None and self._process.is_alive()
+        )
+
+    def start(self) -> None:
+        """
+        启动子进程，并等待其加载完模板。
+
+        Raises:
+            RuntimeError: 子进程启动失败或超时。
+        """
+        context = multiprocessing.get_context("spawn")
+        self._ring = SharedFrameRing(self._slots, self._slot_bytes)
+        parent_conn, child_conn = context.Pipe()
+        self._sent_config = config.model_dump()
+        self._process = context.Process(
+            target=_worker_main,
+            args=(
+                self._factory,
+                self._ring.name,
+                self._slots,
+                self._slot_bytes,
+                child_conn,
+                self._sent_config,
+            ),
+            name="RecognitionWorker",
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+
+        try:
+            if not parent_conn.poll(WORKER_START_TIMEOUT):
+                raise RuntimeError("识别子进程启动超时")
+            status, payload = parent_conn.recv()
+        except (EOFError, OSError) as e:
+            self._shutdown()
+            raise RuntimeError("识别子进程意外退出") from e
+        except RuntimeError:
+            self._shutdown()
+            raise
+        if status != "ready":
+            self._shutdown()
+            raise RuntimeError(f"识别子进程启动失败：{payload}")
+        self._replay_logs(payload)
+
+        for slot in range(self._slots):
+            self._free_slots.put(slot)
+        self._closed = False
+        self._receiver = threading.Thread(
+            target=self._receive_loop, name="RecognitionWorkerReceiver", daemon=True
+        )
+        self._receiver.start()
+        logger.info(f"识别子进程已启动（PID {self._process.pid}）。")
+
+    def submit(
+        self,
+        frame: MatLike,
+        previous: EssenceFields | None = None,
+        layout: LayoutProfile | None = None,
+    ) -> Future[EssenceFields]:
+        """
+        提交一帧截图，没有空闲槽位时阻塞。
+
+        Raises:
+            RuntimeError: 子进程未运行。
+        """
+        if self._closed:
+            raise RuntimeError("识别子进程未运行")
+        slot = self._free_slots.get()
+        future: Future[EssenceFields] = Future()
+        with self._lock:
+            if self._closed:
+                self._free_slots.put(slot)
+                raise RuntimeError("识别子进程未运行")
+            assert self._ring is not None and self._conn is not None
+            request_id = next(self._request_ids)
+            self._pending[request_id] = (slot, future)
+            if self._ring.fits(frame):
+                shape = self._ring.write(slot, frame)
+                inline = None
+            else:
+                shape, inline = frame.shape, frame
+            config_data: dict[str, Any] | None = config.model_dump()
+            if config_data == self._sent_config:
+                config_data = None
+            else:
+                self._sent_config = config_data
+            reset_language, self._reset_language = self._reset_language, False
+            self._conn.send(
+                (
+                    request_id,
+                    slot,
+                    shape,
+                    inline,
+                    previous,
+                    layout,
+                    config_data,
+                    reset_language,
+                )
+            )
+        return future
+
+    def recognize(
+        self,
+        frame: MatLike,
+        previous: EssenceFields | None = None,
+        layout: LayoutProfile | None = None,
+    ) -> EssenceFields:
+        with metrics.span("worker_roundtrip"):
+            return self.submit(frame, previous, layout).result(self._request_timeout)
+
+    def start_scan(self) -> None:
+        """让子进程在处理下一个请求前清除失败的语言检测记录。"""
+        with self._lock:
+            self._reset_language = True
+
+    @staticmethod
+    def _replay_logs(records: list[tuple[str, str]]) -> None:
+        for level, message in records:
+            logger.log(level, message)
+
+    def _receive_loop(self) -> None:
+        assert self._conn is not None
+        while True:
+            try:
+                request_id, ok, payload, records = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            self._replay_logs(records)
+            with self._lock:
+                slot, future = self._pending.pop(request_id)
+            self._free_slots.put(slot)
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(f"识别子进程出错：{payload}"))
+
+        # 子进程退出后，让所有等待中的请求失败
+        with self._lock:
+            self._closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for slot, future in pending:
+            self._free_slots.put(slot)
+            future.set_exception(RuntimeError("识别子进程已退出"))
+
+    def stop(self) -> None:
+        """通知子进程退出并释放共享内存。"""
+        with self._lock:
+            self._closed = True
+            if self._conn is not None:
+                try:
+                    self._conn.send(None)
+                except OSError:
+                    pass
+        self._shutdown()
+        logger.info("识别子进程已停止。")
+
+    def _shutdown(self) -> None:
+        if self._process is not None:
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+        if self._conn is not None:
+            self._conn.close()
+        if self._receiver is not None:
+            self._receiver.join(timeout=5)
+            self._receiver = None
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+
+
+def _worker_main(
+    factory: Callable[[], FrameRecognizer],
+    ring_name: str,
+    slots: int,
+    slot_bytes: int,
+    conn: Connection,
+    config_data: dict[str, Any],
+) -> None:
+    """
+    子进程入口：加载识别器，然后依次处理请求，直到收到 None 或管道关闭。
+
+    子进程不读取配置文件，使用主进程发来的用户配置。
+    """
+    # 子进程的日志不直接写入文件，而是随结果发回主进程
+    records: list[tuple[str, str]] = []
+    logger.remove()
+    logger.add(
+        lambda message: records.append(
+            (message.record["level"].name, message.record["message"])
+        ),
+        level="DEBUG",
+        format="{message}",
+    )
+
+    ring = SharedFrameRing(slots, slot_bytes, name=ring_name)
+    try:
+        config.update_from_dict(config_data)
+        recognizer = factory()
+    except Exception as e:
+        conn.send(("error", repr(e)))
+        ring.close()
+        return
+    conn.send(("ready", records.copy()))
+    records.clear()
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        request_id, slot, shape, inline, previous, layout, config_data, reset = message
+        frame = inline if inline is not None else ring.read(slot, shape)
+        try:
+            if config_data is not None:
+                config.update_from_dict(config_data)
+            if reset:
+                from endfield_essence_recognizer.stat_language import (
+                    reset_stat_language_detection,
+                )
+
+                reset_stat_language_detection()
+            result, ok = recognizer.recognize(frame, previous, layout), True
+        except Exception as e:
+            logger.exception("识别子进程处理截图时出错")
+            result, ok = repr(e), False
+        # 释放对共享内存的引用，否则无法关闭共享内存
+        del frame
+        conn.send((request_id, ok, result, records.copy()))
+        records.clear()
+
+    ring.close()
@@ -1,24 +1,30 @@
 import importlib.resources
 import itertools
 from collections import defaultdict
-from collections.abc import Callable
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass
 from importlib.abc import Traversable
+from typing import Protocol
 
 import cv2
+import numpy as np
+import numpy.typing as npt
 from cv2.typing import MatLike
 
-from endfield_essence_recognizer.game_data import gem_table
-from endfield_essence_recognizer.game_data.weapon import get_gem_tag_name
 from endfield_essence_recognizer.utils.image import (
     linear_operation,
     load_image,
+    resize_by,
     to_gray_image,
 )
-from endfield_essence_recognizer.utils.log import logger
+from endfield_essence_recognizer.utils.log import is_trace_enabled, logger
+from endfield_essence_recognizer.utils.metrics import metrics
 
 # 识别阈值（默认值，可在 Recognizer 中覆盖）
 HIGH_THRESH = 0.75  # 高分数阈值：超过此值直接判定
 LOW_THRESH = 0.50  # 低分数阈值：低于此值判定为未知
+CLASSIFIER_CANDIDATES = 3  # 用模板匹配验证快速分类器给出的前几名标签
+CLASSIFIER_MIN_MARGIN = 0.05  # 验证时分类器第一名的模板分数至少领先其余候选的差值
 
 
 def preprocess_text_roi(roi_image: MatLike) -> MatLike:
@@ -35,11 +41,47 @@ def preprocess_text_template(template_image: MatLike) -> MatLike:
 
 def get_label_name(label: str) -> str:
     """获取标签的显示名称。"""
+    # 只在输出日志时才需要游戏数据，识别本身不依赖游戏数据
+    from endfield_essence_recognizer.game_data import gem_table
+    from endfield_essence_recognizer.game_data.weapon import get_gem_tag_name
+
     if label in gem_table:
         return get_gem_tag_name(label, "CN")
     return label
 
 
+@dataclass
+class RecognitionDetail:
+    """ROI 识别的详细结果。"""
+
+    label: str | None
+    """按阈值判定后的标签，低于低分数阈值时为 None"""
+    score: float
+    """最佳匹配分数"""
+    scores: npt.NDArray[np.float32]
+    """各标签的最佳匹配分数，与 `Recognizer.labels` 顺序一致，没有模板的标签为 -inf"""
+    top_k: list[tuple[str, float]]
+    """分数最高的 k 个 (标签, 分数)，按分数降序排列"""
+    margin: float
+    """第一名与第二名的分数差，只有一个候选标签时为 inf"""
+
+
+class RoiClassifier(Protocol):
+    """
+    可插拔的快速分类器。
+
+    `Recognizer` 加载模板后调用 `fit` 校准分类器。识别时只对分类器给出的前几名候选标签
+    进行模板匹配加以验证，第一名的模板分数达到高分数阈值、并领先其余候选时采用，
+    否则回退到匹配全部模板。
+    """
+
+    def fit(self, templates: Mapping[str, list[MatLike]]) -> None: ...
+
+    def candidates(self, roi_image: MatLike, k: int) -> list[str]:
+        """最可能的至多 k 个标签，按可能性降序排列，不确定时返回空列表。"""
+        ...
+
+
 class Recognizer:
     def __init__(
         self,
@@ -49,6 +91,7 @@ class Recognizer:
         low_thresh: float = LOW_THRESH,
         preprocess_roi: Callable[[MatLike], MatLike] | None = None,
         preprocess_template: Callable[[MatLike], MatLike] | None = None,
+        classifier: RoiClassifier | None = None,
     ) -> None:
         self.labels: list[str] = labels
         self.templates_dir: Traversable = templates_dir
@@ -60,7 +103,17 @@ class Recognizer:
         self.preprocess_template: Callable[[MatLike], MatLike] = (
             preprocess_template if preprocess_template is not None else lambda x: x
         )
+        self.classifier: RoiClassifier | None = classifier
+        """快速分类器，不确定时回退到模板匹配"""
+        self.language: str | None = None
+        """模板库的语言，None 表示模板不区分语言"""
+        self.label_index: dict[str, int] = {
+            label: index for index, label in enumerate(labels)
+        }
+        """标签到分数向量下标的映射"""
         self._templates: defaultdict[str, list[MatLike]] = defaultdict(list)
+        self._scaled: dict[float, Recognizer] = {}
+        """按缩放比例缓存的识别器"""
         self._suffixes: list[str] = [
             ".png",
             ".jpg",
@@ -94,6 +147,177 @@ class Recognizer:
             if not self._templates[label]:
                 logger.error(f'在 {self.templates_dir} 中未找到标签 "{label}" 的模板')
 
+        if self.classifier is not None:
+            self.classifier.fit(self._templates)
+
+    def switch_templates(
+        self, templates_dir: Traversable, classifier: RoiClassifier | None
+    ) -> None:
+        """更换模板目录和快速分类器。已加载的模板随即释放，新模板在下次识别时加载。"""
+        self.templates_dir = templates_dir
+        self.classifier = classifier
+        self._templates = defaultdict(list)
+        self._scaled = {}
+
+    def scaled(self, scale: float) -> "Recognizer":
+        """
+        返回模板按 `scale` 缩放后的识别器，用于识别非参考分辨率的截图。
+
+        每个比例只缩放一次模板并缓存结果。缩放后的识别器不使用快速分类器。
+        """
+        scale = round(scale, 4)
+        if scale == 1:
+            return self
+        recognizer = self._scaled.get(scale)
+        if recognizer is None:
+            if not self._templates:
+                self.load_templates()
+            recognizer = Recognizer(
+                self.labels,
+                self.templates_dir,
+                high_thresh=self.high_thresh,
+                low_thresh=self.low_thresh,
+                preprocess_roi=self.preprocess_roi,
+            )
+            for label, templates in self._templates.items():
+                recognizer._templates[label] = [
+                    resize_by(template, scale) for template in templates
+                ]
+            logger.debug(f"已将模板缩放为原尺寸的 {scale:.3f} 倍：{self.templates_dir}")
+            self._scaled[scale] = recognizer
+        return recognizer
+
+    def _match_label(self, gray: MatLike, label: str, trace: bool) -> float:
+        """计算灰度 ROI 图像对某个标签所有模板的最佳匹配分数，没有可用模板时为 -inf。"""
+        image_height, image_width = gray.shape[:2]
+        best = -np.inf
+        for template in self._templates.get(label, ()):
+            template_height, template_width = template.shape[:2]
+            if image_height < template_height or image_width < template_width:
+                logger.warning(
+                    f"标签 '{get_label_name(label)}' 的 ROI 图像小于模板: "
+                    f"ROI 尺寸={gray.shape[::-1]}, 模板尺寸={template.shape[::-1]}"
+                )
+                continue
+            result = cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED)
+            _minVal, maxVal, _minLoc, _maxLoc = cv2.minMaxLoc(result)
+            if trace:
+                logger.trace(
+                    f"模板匹配: 最佳匹配={get_label_name(label)} 分数={maxVal:.3f}"
+                )
+            best = max(best, maxVal)
+        return best
+
+    def _score_vector(self, roi_image: MatLike) -> npt.NDArray[np.float32]:
+        """计算 ROI 图像对每个标签的最佳匹配分数，顺序与 `self.labels` 一致。"""
+
+        if not self._templates:
+            self.load_templates()
+
+        with metrics.span("preprocess"):
+            gray = to_gray_image(roi_image)
+
+        trace = is_trace_enabled()
+        scores = np.full(len(self.labels), -np.inf, dtype=np.float32)
+        for label in self._templates:
+            scores[self.label_index[label]] = self._match_label(gray, label, trace)
+        return scores
+
+    def _verified_scores(self, roi_image: MatLike) -> npt.NDArray[np.float32] | None:
+        """
+        用快速分类器识别 ROI 图像，并只匹配前几名候选标签的模板加以验证。
+
+        Returns:
+            候选标签为真实模板分数、其余为 -inf 的分数向量，`top_k` 和 `margin` 仍反映
+            候选之间的差距。分类器不确定、第一名的分数低于高分数阈值或没有领先其余候选
+            `CLASSIFIER_MIN_MARGIN` 时返回 None。
+        """
+        if self.classifier is None:
+            return None
+        if not self._templates:
+            self.load_templates()
+
+        with metrics.span("classify"):
+            candidates = [
+                label
+                for label in self.classifier.candidates(
+                    roi_image, CLASSIFIER_CANDIDATES
+                )
+                if label in self.label_index
+            ]
+        if not candidates:
+            return None
+        gray = to_gray_image(roi_image)
+        trace = is_trace_enabled()
+        scores = np.full(len(self.labels), -np.inf, dtype=np.float32)
+        for label in candidates:
+            scores[self.label_index[label]] = self._match_label(gray, label, trace)
+        predicted = float(scores[self.label_index[candidates[0]]])
+        runner_up = max(
+            (float(scores[self.label_index[label]]) for label in candidates[1:]),
+            default=-np.inf,
+        )
+        if (
+            predicted < self.high_thresh
+            or predicted - runner_up < CLASSIFIER_MIN_MARGIN
+        ):
+            metrics.increment("classifier_rejected")
+            return None
+        return scores
+
+    def _scores(self, roi_image: MatLike) -> npt.NDArray[np.float32]:
+        """优先使用经过验证的分类结果，否则匹配全部模板。"""
+        scores = self._verified_scores(roi_image)
+        return scores if scores is not None else self._score_vector(roi_image)
+
+    def _detail_from_scores(
+        self, scores: npt.NDArray[np.float32], k: int
+    ) -> RecognitionDetail:
+        """根据分数向量构造详细结果，并按阈值判定标签。"""
+        order = np.argsort(-scores, kind="stable")
+        top_k = [
+            (self.labels[i], float(scores[i]))
+            for i in order[:k]
+            if np.isfinite(scores[i])
+        ]
+        if not top_k:
+            logger.warning("匹配分数很低: 最佳匹配=无匹配 分数=-inf")
+            return RecognitionDetail(
+                label=None,
+                score=-float("inf"),
+                scores=scores,
+                top_k=[],
+                margin=float("inf"),
+            )
+
+        best_label, best_score = self.labels[order[0]], float(scores[order[0]])
+        margin = (
+            best_score - float(scores[order[1]])
+            if len(order) > 1 and np.isfinite(scores[order[1]])
+            else float("inf")
+        )
+
+        label: str | None = best_label
+        if best_score >= self.high_thresh:
+            pass
+        elif best_score >= self.low_thresh:
+            logger.warning(
+                f"匹配分数较低: 最佳匹配={get_label_name(best_label)} 分数={best_score:.3f}"
+            )
+        else:
+            logger.warning(
+                f"匹配分数很低: 最佳匹配={get_label_name(best_label)} 分数={best_score:.3f}"
+            )
+            label = None
+
+        return RecognitionDetail(
+            label=label,
+            score=best_score,
+            scores=scores,
+            top_k=top_k,
+            margin=margin,
+        )
+
     def recognize_roi(self, roi_image: MatLike) -> tuple[str | None, float]:
         """
         识别 ROI 图像中的短语，返回 (标签, 分数)。
@@ -104,43 +328,97 @@ class Recognizer:
         Returns:
             (标签, 分数) 元组。如果无法识别，返回 (None, best_score)。
         """
+        detail = self._detail_from_scores(self._scores(roi_image), k=1)
+        return detail.label, detail.score
+
+    def recognize_roi_detailed(
+        self, roi_image: MatLike, k: int = 3
+    ) -> RecognitionDetail:
+        """
+        识别 ROI 图像中的短语，返回包含完整分数向量的详细结果。
+
+        Args:
+            roi_image: ROI 区域的图像（OpenCV 格式）
+            k: 返回的候选标签数量
+
+        Returns:
+            `RecognitionDetail`，其中 `scores` 与 `self.labels` 顺序一致。
+        """
+        return self._detail_from_scores(self._scores(roi_image), k)
+
+    def recognize_rois_detailed(
+        self, roi_images: Sequence[MatLike], k: int = 3
+    ) -> list[RecognitionDetail]:
+        """
+        批量识别多个 ROI 图像。
 
+        Args:
+            roi_images: ROI 区域图像序列
+            k: 每个结果返回的候选标签数量
+
+        Returns:
+            与输入顺序一致的 `RecognitionDetail` 列表。
+        """
+        return [
+            self._detail_from_scores(row, k) for row in self.score_matrix(roi_images)
+        ]
+
+    def score_matrix(self, roi_images: Sequence[MatLike]) -> npt.NDArray[np.float32]:
+        """
+        计算多个 ROI 图像的分数矩阵，形状为 (len(roi_images), len(self.labels))。
+
+        有快速分类器时先逐个验证分类结果，其余 ROI 纵向拼接成一张图像，每个模板只做一次
+        模板匹配，再按各 ROI 所在的行范围取最佳分数，结果与逐个调用 `recognize_roi` 相同。
+        """
+        scores = np.full((len(roi_images), len(self.labels)), -np.inf, dtype=np.float32)
+        pending: list[int] = []
+        for i, roi in enumerate(roi_images):
+            verified = self._verified_scores(roi)
+            if verified is None:
+                pending.append(i)
+            else:
+                scores[i] = verified
+        if pending:
+            scores[pending] = self._batch_score_matrix([roi_images[i] for i in pending])
+        return scores
+
+    def _batch_score_matrix(
+        self, roi_images: Sequence[MatLike]
+    ) -> npt.NDArray[np.float32]:
+        """把 ROI 图像纵向拼接后对每个模板做一次模板匹配，计算全部标签的分数矩阵。"""
         if not self._templates:
             self.load_templates()
 
-        image_height, image_width = roi_image.shape[:2]
-        gray = to_gray_image(roi_image)
+        with metrics.span("preprocess"):
+            grays = [to_gray_image(roi) for roi in roi_images]
+            # 右侧补零对齐宽度；匹配窗口只取完全落在单个 ROI 内的位置，补零和相邻 ROI 不影响分数
+            width = max(gray.shape[1] for gray in grays)
+            stacked = np.zeros((sum(gray.shape[0] for gray in grays), width), np.uint8)
+            tops: list[int] = []
+            top = 0
+            for gray in grays:
+                stacked[top : top + gray.shape[0], : gray.shape[1]] = gray
+                tops.append(top)
+                top += gray.shape[0]
 
-        best_label = None
-        best_label_name = "无匹配"
-        best_score = -float("inf")
+        scores = np.full((len(grays), len(self.labels)), -np.inf, dtype=np.float32)
         for label, templates in self._templates.items():
-            label_name = get_label_name(label)
+            column = scores[:, self.label_index[label]]
             for template in templates:
                 template_height, template_width = template.shape[:2]
-                if image_height < template_height or image_width < template_width:
-                    logger.warning(
-                        f"标签 '{label_name}' 的 ROI 图像小于模板: "
-                        f"ROI 尺寸={gray.shape[::-1]}, 模板尺寸={template.shape[::-1]}"
-                    )
+                if stacked.shape[0] < template_height or width < template_width:
                     continue
-                result = cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED)
-                _minVal, maxVal, _minLoc, _maxLoc = cv2.minMaxLoc(result)
-                logger.trace(f"模板匹配: 最佳匹配={label_name} 分数={maxVal:.3f}")
-                if maxVal > best_score:
-                    best_score = maxVal
-                    best_label = label
-                    best_label_name = label_name
-
-        if best_score >= self.high_thresh:
-            return best_label, float(best_score)
-        elif best_score >= self.low_thresh:
-            logger.warning(
-                f"匹配分数较低: 最佳匹配={best_label_name} 分数={best_score:.3f}"
-            )
-            return best_label, float(best_score)
-        else:
-            logger.warning(
-                f"匹配分数很低: 最佳匹配={best_label_name} 分数={best_score:.3f}"
-            )
-            return None, float(best_score)
+                result = cv2.matchTemplate(stacked, template, cv2.TM_CCOEFF_NORMED)
+                for i, (gray, top) in enumerate(zip(grays, tops)):
+                    rows = gray.shape[0] - template_height + 1
+                    columns = gray.shape[1] - template_width + 1
+                    if rows <= 0 or columns <= 0:
+                        logger.warning(
+                            f"标签 '{get_label_name(label)}' 的 ROI 图像小于模板: "
+                            f"ROI 尺寸={gray.shape[::-1]}, "
+                            f"模板尺寸={template.shape[::-1]}"
+                        )
+                        continue
+                    best = float(result[top : top + rows, :columns].max())
+                    column[i] = max(column[i], best)
+        return scores
@@ -6,20 +6,44 @@ from pathlib import Path
 from typing import Any, Literal
 
 import uvicorn
-from fastapi import Body, FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import (
+    Body,
+    FastAPI,
+    HTTPException,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
 from endfield_essence_recognizer import supported_window_titles, toggle_scan
 from endfield_essence_recognizer.core.config import ServerConfig, get_server_config
 from endfield_essence_recognizer.path import ROOT_DIR
+from endfield_essence_recognizer.recognition_pool import (
+    AsyncRecognitionPool,
+    RecognitionBatchTooLarge,
+    RecognitionPoolUnavailable,
+    RecognitionQueueFull,
+)
 from endfield_essence_recognizer.utils.log import (
     LOGGING_CONFIG,
     logger,
     websocket_handler,
 )
+from endfield_essence_recognizer.utils.metrics import metrics
+from endfield_essence_recognizer.utils.multipart import parse_multipart
+from endfield_essence_recognizer.utils.profiling import (
+    ProfileMode,
+    profiler,
+    take_tracemalloc_snapshot,
+)
 from endfield_essence_recognizer.version import __version__
 
+API_RECOGNIZE_MAX_BYTES = 256 * 1024 * 1024
+"""/api/recognize 请求体的最大字节数"""
+
 
 async def broadcast_logs():
     """异步任务，持续监听日志队列并广播日志消息"""
@@ -43,6 +67,7 @@ async def broadcast_logs():
 async def lifespan(app: FastAPI):
     server_config = get_server_config()
     logger.success(f"Server configuration: {server_config.model_dump()}")
+    metrics.enabled = server_config.metrics_enabled
 
     if not server_config.dev_mode:
         if not server_config.dist_dir:
@@ -67,6 +92,8 @@ async def lifespan(app: FastAPI):
     global task
     task = asyncio.create_task(broadcast_logs())
     yield
+    if recognition_pool is not None:
+        recognition_pool.shutdown()
     if task:
         task.cancel()
         try:
@@ -77,6 +104,7 @@ async def lifespan(app: FastAPI):
 
 websocket_connections: set[WebSocket] = set()
 task: asyncio.Task | None = None
+recognition_pool: AsyncRecognitionPool | None = None
 connection_event = asyncio.Event()
 
 app = FastAPI(lifespan=lifespan)
@@ -98,11 +126,16 @@ async def get_config() -> dict[str, Any]:
 
 @app.post("/api/config")
 async def post_config(new_config: dict[str, Any] = Body()) -> dict[str, Any]:
-    from endfield_essence_recognizer.config import config
+    from endfield_essence_recognizer.config import Config, config
+    from endfield_essence_recognizer.config_sync import request_config_save
+    from endfield_essence_recognizer.treasure_rules import get_treasure_rule_index
 
-    config.update_from_dict(new_config)
-    config.save()
-    return config.model_dump()
+    # 先校验并编译宝藏基质条件，再整体替换配置；文件在后台线程中写入
+    model = Config.model_validate(new_config)
+    get_treasure_rule_index(model)
+    config.update_from_model(model)
+    request_config_save()
+    return model.model_dump()
 
 
 @app.get("/api/screenshot")
@@ -222,6 +255,115 @@ async def get_update_status() -> dict[str, Any]:
     return update_manager.get_status()
 
 
+@app.get("/api/metrics", response_model=None)
+async def get_metrics(
+    format: Literal["json", "prometheus"] = "json",
+) -> dict[str, Any] | PlainTextResponse:
+    """获取扫描各阶段的耗时分位数（秒）和计数器"""
+    if format == "prometheus":
+        return PlainTextResponse(
+            metrics.to_prometheus(), media_type="text/plain; version=0.0.4"
+        )
+    return metrics.snapshot()
+
+
+@app.post("/api/metrics/reset")
+async def reset_metrics() -> None:
+    metrics.reset()
+
+
+@app.get("/api/profile/status")
+async def get_profile_status() -> dict[str, Any]:
+    """获取性能分析状态"""
+    return profiler.status()
+
+
+@app.post("/api/profile/start")
+async def start_profile(
+    mode: ProfileMode = Body("sampling", embed=True),
+    duration: float = Body(30.0, embed=True),
+    interval: float = Body(0.005, embed=True),
+) -> dict[str, Any]:
+    """开始性能分析，到时自动停止，结果保存在日志目录"""
+    try:
+        return profiler.start(mode, duration, interval)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
+
+@app.post("/api/profile/stop")
+async def stop_profile() -> dict[str, Any] | None:
+    """提前停止性能分析，返回结果文件路径"""
+    return await asyncio.to_thread(profiler.stop)
+
+
+@app.post("/api/profile/tracemalloc")
+async def tracemalloc_snapshot(
+    duration: float = Body(10.0, embed=True),
+    top: int = Body(20, embed=True),
+) -> dict[str, Any]:
+    """跟踪内存分配一段时间后保存快照，返回分配最多的代码行"""
+    return await asyncio.to_thread(take_tracemalloc_snapshot, duration, top)
+
+
+def get_recognition_pool() -> AsyncRecognitionPool:
+    global recognition_pool
+    if recognition_pool is None:
+        server_config = get_server_config()
+        recognition_pool = AsyncRecognitionPool(
+            server_config.api_recognize_workers or max(1, (os.cpu_count() or 1) // 2),
+            server_config.api_recognize_max_queue,
+        )
+    return recognition_pool
+
+
+@app.post("/api/recognize")
+async def recognize_images(request: Request) -> list[dict[str, Any]]:
+    """
+    识别上传的 16:9 客户区截图，按上传顺序返回每张截图的属性、等级、匹配分数和品质。
+
+    请求体可以是 multipart/form-data（每个带文件名的部分为一张截图），也可以直接是
+    一张图片的字节。识别在低优先级的子进程池中进行；一次上传的截图超过队列容量时
+    返回 413，等待的截图过多或识别子进程异常退出时返回 503。
+    """
+    content_length = request.headers.get("content-length")
+    if content_length is not None:
+        try:
+            declared_length = int(content_length)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Content-Length 无效") from None
+        if declared_length > API_RECOGNIZE_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="上传的截图过大")
+    body = await request.body()
+    if len(body) > API_RECOGNIZE_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="上传的截图过大")
+
+    content_type = request.headers.get("content-type", "")
+    if content_type.lower().startswith("multipart/"):
+        try:
+            parts = parse_multipart(body, content_type)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        images = [
+            (part.filename or part.name or "", bytes(part.data))
+            for part in parts
+            if part.filename is not None
+        ]
+    else:
+        images = [("body", body)] if body else []
+    if not images:
+        raise HTTPException(status_code=400, detail="没有上传截图")
+
+    try:
+        return await get_recognition_pool().recognize(images)
+    except RecognitionBatchTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
+    except (RecognitionQueueFull, RecognitionPoolUnavailable) as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        ) from e
+
+
 @app.post("/api/start_scanning")
 async def start_scanning() -> None:
     toggle_scan()
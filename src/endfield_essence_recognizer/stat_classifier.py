@@ -0,0 +1,241 @@
+"""
+Learned linear classifier for stat name ROIs.
+
+The text in a stat ROI is cropped to its bounding box and resized to a small fixed
+grid, so classification is one matrix multiply per ROI. Weights are trained from the
+rendered templates with random degradations and shipped as a small `.npz` file in
+each template bank; they are retrained in memory if the templates no longer match.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Mapping
+from importlib.abc import Traversable
+from pathlib import Path
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+from cv2.typing import MatLike
+
+from endfield_essence_recognizer.utils.image import to_gray_image
+from endfield_essence_recognizer.utils.log import logger
+
+STAT_FEATURE_SIZE = (48, 12)
+"""特征图尺寸 (宽, 高)"""
+STAT_MIN_CONFIDENCE = 0.9
+"""最低置信度，低于此值时交给模板匹配判断"""
+STAT_MIN_CONTRAST = 40
+"""ROI 中最亮与最暗像素的最小亮度差，低于此值时认为没有文字"""
+STAT_SOFTMAX_TEMPERATURE = 0.1
+"""将线性输出换算为置信度时使用的温度"""
+STAT_RIDGE_ALPHA = 1.0
+"""训练时的 L2 正则化系数"""
+STAT_AUGMENTATIONS = 48
+"""训练时每张模板生成的增强样本数量"""
+STAT_TRAINING_CANVAS = (192, 32)
+"""训练样本的画布尺寸 (宽, 高)，与属性截图区域相同"""
+STAT_CLASSIFIER_WEIGHTS_FILENAME = "stat_classifier.npz"
+"""模板库目录中随程序发布的权重文件名"""
+
+
+def extract_stat_features(roi_image: MatLike) -> npt.NDArray[np.float32] | None:
+    """
+    提取 ROI 中文字的特征。
+
+    将文字裁剪到其外接矩形并缩放到 `STAT_FEATURE_SIZE`，再归一化为零均值、单位长度的向量，
+    使特征与文字在 ROI 中的位置、字号和整体亮度无关。ROI 中没有文字时返回 None。
+    """
+    gray = to_gray_image(roi_image)
+    low, high = float(gray.min()), float(gray.max())
+    if high - low < STAT_MIN_CONTRAST:
+        return None
+    mask = gray > (low + high) / 2
+    rows = np.flatnonzero(mask.any(axis=1))
+    columns = np.flatnonzero(mask.any(axis=0))
+    text = gray[rows[0] : rows[-1] + 1, columns[0] : columns[-1] + 1]
+    resized = cv2.resize(text, STAT_FEATURE_SIZE, interpolation=cv2.INTER_AREA)
+    features = resized.astype(np.float32).ravel()
+    features -= features.mean()
+    norm = float(np.linalg.norm(features))
+    if norm == 0:
+        return None
+    return features / norm
+
+
+def templates_fingerprint(templates: Mapping[str, list[MatLike]]) -> str:
+    """
+    计算模板集合的指纹，用于判断已保存的权重是否由同一组模板训练。
+
+    与标签和模板的顺序无关，因为不同文件系统列出模板文件的顺序可能不同。
+    """
+    digest = hashlib.sha1()
+    digest.update(repr((STAT_FEATURE_SIZE, STAT_AUGMENTATIONS)).encode())
+    for label in sorted(templates):
+        digest.update(label.encode())
+        for image_digest in sorted(
+            hashlib.sha1(
+                repr(image.shape).encode() + np.ascontiguousarray(image).tobytes()
+            ).digest()
+            for image in templates[label]
+        ):
+            digest.update(image_digest)
+    return digest.hexdigest()
+
+
+def augment_template(
+    template: MatLike, rng: np.random.Generator
+) -> npt.NDArray[np.uint8]:
+    """把模板随机缩放、平移后放入属性截图大小的画布，并叠加亮度、模糊和噪声。"""
+    gray = to_gray_image(template)
+    canvas_width, canvas_height = STAT_TRAINING_CANVAS
+    scale = rng.uniform(0.85, 1.15)
+    height, width = gray.shape[:2]
+    width = min(canvas_width, max(1, round(width * scale)))
+    height = min(canvas_height, max(1, round(height * scale)))
+    resized = cv2.resize(gray, (width, height), interpolation=cv2.INTER_LINEAR)
+
+    background = rng.uniform(0, 60)
+    foreground = rng.uniform(180, 255)
+    canvas = np.full((canvas_height, canvas_width), background, dtype=np.float32)
+    top = int(rng.integers(0, canvas_height - height + 1))
+    left = int(rng.integers(0, canvas_width - width + 1))
+    text = resized.astype(np.float32) / 255 * (foreground - background)
+    canvas[top : top + height, left : left + width] += text
+    sigma = rng.uniform(0, 1.0)
+    if sigma > 0.1:
+        canvas = cv2.GaussianBlur(canvas, (0, 0), sigma)
+    canvas += rng.normal(0, rng.uniform(0, 8), canvas.shape)
+    return np.clip(canvas, 0, 255).astype(np.uint8)
+
+
+class StatClassifier:
+    """
+    属性词条的线性 softmax 分类器。
+
+    特征见 `extract_stat_features`，推理为一次矩阵乘法。`fit` 时如果已加载的权重由同一组
+    模板训练，直接使用；否则用岭回归在内存中重新训练。置信度低于 `min_confidence` 时
+    返回 None，由 `Recognizer` 回退到模板匹配。
+    """
+
+    def __init__(
+        self,
+        weights_path: Traversable | Path | None = None,
+        min_confidence: float = STAT_MIN_CONFIDENCE,
+    ) -> None:
+        self.weights_path: Traversable | Path | None = weights_path
+        """权重文件，None 表示总是在 `fit` 时训练"""
+        self.min_confidence: float = min_confidence
+        self.labels: list[str] = []
+        self.fingerprint: str = ""
+        """训练权重所用模板的指纹"""
+        self._weights: npt.NDArray[np.float32] = np.empty((0, 0), dtype=np.float32)
+        """形状为 (特征维数 + 1, 标签数量)，最后一行为偏置"""
+
+    @property
+    def is_fitted(self) -> bool:
+        return len(self.labels) > 0
+
+    def load(self) -> bool:
+        """从 `weights_path` 加载权重，文件不存在或无法读取时返回 False。"""
+        if self.weights_path is None or not self.weights_path.is_file():
+            return False
+        try:
+            with self.weights_path.open("rb") as file, np.load(file) as data:
+                self.labels = [str(label) for label in data["labels"]]
+                self.fingerprint = str(data["fingerprint"])
+                self._weights = data["weights"].astype(np.float32)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"无法加载属性分类器权重 {self.weights_path}：{e}")
+            self.labels = []
+            return False
+        return True
+
+    def save(self, path: Path) -> None:
+        np.savez_compressed(
+            path,
+            labels=np.array(self.labels),
+            fingerprint=np.array(self.fingerprint),
+            weights=self._weights,
+        )
+
+    def train(self, templates: Mapping[str, list[MatLike]], seed: int = 0) -> None:
+        """用增强后的模板训练分类器。"""
+        rng = np.random.default_rng(seed)
+        labels = [label for label in templates if templates[label]]
+        samples: list[npt.NDArray[np.float32]] = []
+        targets: list[int] = []
+        for index, label in enumerate(labels):
+            for template in templates[label]:
+                for _ in range(STAT_AUGMENTATIONS):
+                    features = extract_stat_features(augment_template(template, rng))
+                    if features is not None:
+                        samples.append(features)
+                        targets.append(index)
+        if not samples:
+            return
+
+        x = np.hstack(
+            [np.stack(samples), np.ones((len(samples), 1), dtype=np.float32)]
+        ).astype(np.float64)
+        y = np.zeros((len(samples), len(labels)))
+        y[np.arange(len(samples)), targets] = 1
+        regularization = STAT_RIDGE_ALPHA * np.eye(x.shape[1])
+        regularization[-1, -1] = 0  # 不约束偏置
+        self._weights = np.linalg.solve(x.T @ x + regularization, x.T @ y).astype(
+            np.float32
+        )
+        self.labels = labels
+        self.fingerprint = templates_fingerprint(templates)
+
+    def fit(self, templates: Mapping[str, list[MatLike]]) -> None:
+        """使用与模板一致的已保存权重，否则根据模板重新训练。"""
+        fingerprint = templates_fingerprint(templates)
+        if self.fingerprint != fingerprint and not (
+            self.load() and self.fingerprint == fingerprint
+        ):
+            logger.info("属性分类器权重与模板不一致，正在重新训练...")
+            self.train(templates)
+
+    def predict(self, roi_image: MatLike) -> npt.NDArray[np.float32] | None:
+        """计算各标签的置信度，顺序与 `self.labels` 一致。ROI 中没有文字时返回 None。"""
+        if not self.is_fitted:
+            return None
+        features = extract_stat_features(roi_image)
+        if features is None:
+            return None
+        logits = features @ self._weights[:-1] + self._weights[-1]
+        logits = (logits - logits.max()) / STAT_SOFTMAX_TEMPERATURE
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum()
+
+    def candidates(self, roi_image: MatLike, k: int) -> list[str]:
+        """
+        置信度最高的至多 k 个标签，按置信度降序排列。
+
+        第一名的置信度低于 `min_confidence` 或 ROI 中没有文字时返回空列表。
+        """
+        probabilities = self.predict(roi_image)
+        if probabilities is None:
+            return []
+        order = np.argsort(-probabilities, kind="stable")[:k]
+        if probabilities[order[0]] < self.min_confidence:
+            return []
+        return [self.labels[index] for index in order]
+
+    def classify(self, roi_image: MatLike) -> tuple[str | None, float]:
+        """
+        识别 ROI 图像中的属性词条。
+
+        Returns:
+            (标签, 置信度) 元组。不确定时标签为 None。
+        """
+        probabilities = self.predict(roi_image)
+        if probabilities is None:
+            return None, 0.0
+        best = int(np.argmax(probabilities))
+        confidence = float(probabilities[best])
+        if confidence < self.min_confidence:
+            return None, confidence
+        return self.labels[best], confidence
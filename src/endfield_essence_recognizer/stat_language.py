@@ -0,0 +1,197 @@
+"""
+Per-language stat template banks.
+
+Each language has its own bank under `templates/generated/<language>`. The text
+recognizer keeps only the active bank loaded. With the language set to "auto", the
+first frame that shows an essence is scored against every installed bank once; the
+choice is cached for the rest of the process. If no bank matches a few frames in a
+row, detection gives up and keeps the default bank until `reset_stat_language_detection`
+is called at the start of the next scan (the recognition worker keeps giving up until
+it restarts).
+
+Only the CN bank ships with the package for now. Banks for other client languages
+have to be generated into `templates/generated/<language>` before they can be
+detected or selected; until then other languages fall back to CN.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from endfield_essence_recognizer import generated_template_root
+from endfield_essence_recognizer.config import config
+from endfield_essence_recognizer.core.config import get_server_config
+from endfield_essence_recognizer.recognizer import Recognizer
+from endfield_essence_recognizer.stat_classifier import (
+    STAT_CLASSIFIER_WEIGHTS_FILENAME,
+    StatClassifier,
+)
+from endfield_essence_recognizer.utils.log import logger
+
+if TYPE_CHECKING:
+    from importlib.abc import Traversable
+
+    from cv2.typing import MatLike
+
+STAT_LANGUAGE_AUTO = "auto"
+"""根据截图自动选择语言"""
+DEFAULT_STAT_LANGUAGE = "CN"
+"""自动检测完成前，以及所选语言没有模板库时使用的语言"""
+STAT_LANGUAGE_MIN_SCORE = 0.75
+"""自动检测时，最佳模板库在各属性上的平均最高分数不能低于此值"""
+STAT_LANGUAGE_MAX_ATTEMPTS = 3
+"""自动检测连续失败的最大帧数，超过后放弃检测，直到下次扫描开始"""
+
+_detected_language: str | None = None
+"""自动检测到的语言，检测一次后不再改变"""
+_failed_attempts: int = 0
+"""自动检测连续失败的帧数"""
+
+
+def reset_stat_language_detection() -> None:
+    """清除失败的自动检测记录，在每次扫描开始时调用。已检测到的语言保持不变。"""
+    global _failed_attempts
+
+    _failed_attempts = 0
+
+
+def get_stat_template_dir(language: str) -> Traversable:
+    return generated_template_root / language
+
+
+@lru_cache
+def _installed_languages(root: Traversable) -> tuple[str, ...]:
+    """扫描模板根目录下含有模板的语言目录，模板随安装包发布，同一目录只扫描一次。"""
+    return tuple(
+        sorted(
+            entry.name
+            for entry in root.iterdir()
+            if entry.is_dir()
+            and any(child.name.endswith(".png") for child in entry.iterdir())
+        )
+    )
+
+
+def available_stat_languages() -> list[str]:
+    """已安装模板库的语言。"""
+    return list(_installed_languages(generated_template_root))
+
+
+def create_stat_classifier(language: str) -> StatClassifier | None:
+    """构造使用该语言模板库中权重的属性分类器，未启用分类器时返回 None。"""
+    if not get_server_config().stat_classifier_enabled:
+        return None
+    return StatClassifier(
+        get_stat_template_dir(language) / STAT_CLASSIFIER_WEIGHTS_FILENAME
+    )
+
+
+def use_stat_language(recognizer: Recognizer, language: str) -> None:
+    """
+    让属性识别器改用该语言的模板库。
+
+    原有模板随即释放，新模板在下次识别时加载。没有该语言的模板库时使用默认语言。
+    """
+    bank_language = language
+    if language not in available_stat_languages():
+        logger.warning(
+            f"没有 {language} 语言的属性模板，使用 {DEFAULT_STAT_LANGUAGE}。"
+        )
+        bank_language = DEFAULT_STAT_LANGUAGE
+    logger.info(f"属性识别使用 {bank_language} 语言的模板。")
+    recognizer.switch_templates(
+        get_stat_template_dir(bank_language), create_stat_classifier(bank_language)
+    )
+    recognizer.language = language
+
+
+def detect_stat_language(
+    rois: Sequence[MatLike], recognizer: Recognizer, scale: float = 1.0
+) -> str | None:
+    """
+    用各语言的模板库识别属性截图区域，返回分数最高的语言。
+
+    每个模板库只临时加载一次，用完即释放。只安装了一个模板库时同样要评分，游戏语言
+    没有对应的模板库时不会误判为该语言。截图中没有属性（如未选中基质）或没有模板库
+    达到 `STAT_LANGUAGE_MIN_SCORE` 时返回 None。
+
+    Args:
+        rois: 同一基质的各属性截图区域
+        recognizer: 属性识别器，提供标签和阈值
+        scale: 模板相对参考分辨率的缩放比例
+    """
+    languages = available_stat_languages()
+    if not languages:
+        return None
+
+    scores: dict[str, float] = {}
+    for language in languages:
+        candidate = Recognizer(recognizer.labels, get_stat_template_dir(language))
+        matrix = candidate.scaled(scale).score_matrix(rois)
+        scores[language] = float(np.mean(matrix.max(axis=1)))
+    best = max(scores, key=scores.__getitem__)
+    logger.debug(
+        "属性模板库分数："
+        + "，".join(f"{language} {score:.3f}" for language, score in scores.items())
+    )
+    if scores[best] < STAT_LANGUAGE_MIN_SCORE:
+        return None
+    return best
+
+
+def create_stat_recognizer(labels: list[str]) -> Recognizer:
+    """构造属性识别器，配置为自动时先使用默认语言的模板库。"""
+    language = config.stat_language
+    if language == STAT_LANGUAGE_AUTO:
+        language = _detected_language or DEFAULT_STAT_LANGUAGE
+    recognizer = Recognizer(labels, get_stat_template_dir(DEFAULT_STAT_LANGUAGE))
+    use_stat_language(recognizer, language)
+    return recognizer
+
+
+def resolve_stat_language(
+    recognizer: Recognizer,
+    get_rois: Callable[[], Sequence[MatLike]],
+    scale: float = 1.0,
+) -> None:
+    """
+    确保属性识别器使用配置的语言。不区分语言的识别器（`language` 为 None）保持不变。
+
+    配置为自动时，在第一张能识别出属性的截图上检测语言并缓存结果；之后每帧只比较一次
+    语言代码，不再有额外开销。连续 `STAT_LANGUAGE_MAX_ATTEMPTS` 帧都没有匹配的模板库时
+    记录错误并放弃检测，继续使用当前模板库，直到调用 `reset_stat_language_detection`。
+
+    Args:
+        recognizer: 属性识别器
+        get_rois: 返回当前截图各属性区域的函数，只在需要检测语言时调用
+        scale: 模板相对参考分辨率的缩放比例
+    """
+    global _detected_language, _failed_attempts
+
+    if recognizer.language is None:
+        return
+    language = config.stat_language
+    if language == STAT_LANGUAGE_AUTO:
+        if _detected_language is None:
+            if _failed_attempts >= STAT_LANGUAGE_MAX_ATTEMPTS:
+                return
+            _detected_language = detect_stat_language(get_rois(), recognizer, scale)
+            if _detected_language is None:
+                _failed_attempts += 1
+                if _failed_attempts >= STAT_LANGUAGE_MAX_ATTEMPTS:
+                    logger.error(
+                        f"连续 {_failed_attempts} 张截图都没有匹配的属性模板库"
+                        f"（已安装：{'、'.join(available_stat_languages()) or '无'}），"
+                        f"本次扫描继续使用 {recognizer.language} 语言的模板。"
+                        "请确认游戏语言，或在设置中手动选择语言。"
+                    )
+                return
+            _failed_attempts = 0
+            logger.info(f"检测到游戏语言：{_detected_language}")
+        language = _detected_language
+    if language != recognizer.language:
+        use_stat_language(recognizer, language)
@@ -0,0 +1,379 @@
+"""
+Synthetic essence-page frames composed from the shipped templates.
+
+Used by the simulated game window, tests and benchmarks so that the recognition
+pipeline can run without the game.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping, Sequence
+from dataclasses import dataclass
+from functools import cache
+from importlib.abc import Traversable
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+from cv2.typing import MatLike
+
+from endfield_essence_recognizer import generated_template_dir, screenshot_template_dir
+from endfield_essence_recognizer.essence_scanner import (
+    DEPRECATE_BUTTON_ROI,
+    ESSENCE_UI_ROI,
+    LOCK_BUTTON_ROI,
+    RESOLUTION,
+    STATS_LEVEL_ICONS,
+    STATS_ROIS,
+    essence_icon_x_list,
+    essence_icon_y_list,
+)
+from endfield_essence_recognizer.game_data import rarity_color_table
+from endfield_essence_recognizer.game_data.weapon import (
+    all_attribute_stats,
+    all_secondary_stats,
+    all_skill_stats,
+)
+from endfield_essence_recognizer.grid_scan import (
+    DEPRECATE_BADGE_SCOPE,
+    LOCK_BADGE_SCOPE,
+    RARITY_STRIP_SCOPE,
+    THUMBNAIL_SCOPE,
+    parse_hex_color,
+)
+from endfield_essence_recognizer.utils.image import Scope, load_image, scope_to_slice
+
+BACKGROUND_VALUE = 30
+"""背景亮度"""
+LEVEL_ICON_RADIUS = 4
+"""等级图标半径"""
+LEVEL_ICON_ACTIVE_VALUE = 255
+"""已激活等级图标亮度"""
+LEVEL_ICON_INACTIVE_VALUE = 80
+"""未激活等级图标亮度"""
+STAT_TEXT_OFFSET = (4, 4)
+"""属性名称模板在属性截图区域中的偏移 (x, y)"""
+PANEL_SCOPE: Scope = ((1490, 260), (1870, 520))
+"""右侧面板中包含属性、等级图标和锁定/弃用按钮的区域，流式生成时只重绘和增强此区域"""
+
+
+@dataclass
+class SyntheticEssence:
+    """一个合成基质的真实标签。"""
+
+    stats: tuple[str, str, str]
+    """三个属性词条"""
+    levels: tuple[int, int, int] = (1, 1, 1)
+    """三个属性的等级"""
+    locked: bool = False
+    deprecated: bool = False
+    rarity: int = 5
+    seed: int = 0
+    """缩略图纹理的随机种子，用于区分网格中的不同基质"""
+
+    def ground_truth(self) -> dict[str, object]:
+        """以识别结果的格式返回真实标签。"""
+        return {
+            "stats": list(self.stats),
+            "levels": list(self.levels),
+            "deprecated": "已弃用" if self.deprecated else "未弃用",
+            "locked": "已锁定" if self.locked else "未锁定",
+        }
+
+
+def _read_template(directory: Traversable, name: str, flags: int) -> MatLike:
+    image = load_image((directory / f"{name}.png").read_bytes(), cv2.IMREAD_UNCHANGED)
+    if image.ndim == 3 and image.shape[2] == 4:
+        image = image[:, :, :3]
+    if flags == cv2.IMREAD_GRAYSCALE and image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+
+@cache
+def load_stat_template(label: str) -> MatLike:
+    """加载属性名称模板（灰度）。"""
+    return _read_template(generated_template_dir, label, cv2.IMREAD_GRAYSCALE)
+
+
+@cache
+def load_screenshot_template(name: str) -> MatLike:
+    """加载截图模板（BGR），如 "武器基质"、"已锁定"。"""
+    return _read_template(screenshot_template_dir, name, cv2.IMREAD_COLOR)
+
+
+@cache
+def default_rarity_colors() -> dict[int, tuple[int, int, int]]:
+    return {
+        entry["rarity"]: parse_hex_color(entry["color"])
+        for entry in rarity_color_table.values()
+    }
+
+
+def _paste_centered(frame: MatLike, image: MatLike, scope: Scope) -> None:
+    (x0, y0), (x1, y1) = scope
+    height, width = image.shape[:2]
+    top = y0 + (y1 - y0 - height) // 2
+    left = x0 + (x1 - x0 - width) // 2
+    region = frame[top : top + height, left : left + width]
+    region[...] = image if image.ndim == region.ndim else image[:, :, None]
+
+
+def _offset_scope(scope: Scope, x: int, y: int) -> Scope:
+    (x0, y0), (x1, y1) = scope
+    return (x0 + x, y0 + y), (x1 + x, y1 + y)
+
+
+class FrameComposer:
+    """
+    合成 1920x1080 的基质界面截图。
+
+    网格中的每个格子根据基质的种子、稀有度和锁定/弃用状态绘制缩略图，
+    右侧面板绘制选中基质的属性名称、等级图标和锁定/弃用按钮。
+    """
+
+    def __init__(
+        self, rarity_colors: Mapping[int, tuple[int, int, int]] | None = None
+    ) -> None:
+        self.rarity_colors: Mapping[int, tuple[int, int, int]] = (
+            rarity_colors if rarity_colors is not None else default_rarity_colors()
+        )
+        width, height = RESOLUTION
+        self._base = np.full((height, width, 3), BACKGROUND_VALUE, dtype=np.uint8)
+        header = load_screenshot_template("武器基质")
+        (x0, y0), _ = ESSENCE_UI_ROI
+        self._base[y0 : y0 + header.shape[0], x0 : x0 + header.shape[1]] = header
+
+    def _thumbnail(self, essence: SyntheticEssence) -> npt.NDArray[np.uint8]:
+        (x0, y0), (x1, y1) = THUMBNAIL_SCOPE
+        rng = np.random.default_rng(essence.seed)
+        thumbnail = rng.integers(40, 160, (y1 - y0, x1 - x0, 3), dtype=np.uint8)
+        color = self.rarity_colors.get(essence.rarity)
+        if color is not None:
+            (sx0, sy0), (sx1, sy1) = _offset_scope(RARITY_STRIP_SCOPE, -x0, -y0)
+            thumbnail[sy0:sy1, sx0:sx1] = color
+        for scope, visible in (
+            (LOCK_BADGE_SCOPE, essence.locked),
+            (DEPRECATE_BADGE_SCOPE, essence.deprecated),
+        ):
+            if visible:
+                (bx0, by0), (bx1, by1) = _offset_scope(scope, -x0, -y0)
+                thumbnail[by0:by1, bx0:bx1] = 255
+        return thumbnail
+
+    def draw_grid(
+        self, frame: MatLike, cells: Sequence[SyntheticEssence | None]
+    ) -> None:
+        """按行优先顺序在网格中绘制基质缩略图，None 表示空格子。"""
+        (x0, y0), (x1, y1) = THUMBNAIL_SCOPE
+        columns = len(essence_icon_x_list)
+        for index, essence in enumerate(cells):
+            if essence is None:
+                continue
+            x = int(essence_icon_x_list[index % columns])
+            y = int(essence_icon_y_list[index // columns])
+            frame[y + y0 : y + y1, x + x0 : x + x1] = self._thumbnail(essence)
+
+    def draw_panel(self, frame: MatLike, essence: SyntheticEssence | None) -> None:
+        """在右侧面板绘制选中基质的详细信息。"""
+        if essence is None:
+            return
+        for roi, icon_points, stat, level in zip(
+            STATS_ROIS, STATS_LEVEL_ICONS, essence.stats, essence.levels
+        ):
+            template = load_stat_template(stat)
+            (rx, ry), _ = roi
+            dx, dy = STAT_TEXT_OFFSET
+            height, width = template.shape[:2]
+            frame[ry + dy : ry + dy + height, rx + dx : rx + dx + width] = template[
+                :, :, None
+            ]
+            for i, point in enumerate(icon_points):
+                value = (
+                    LEVEL_ICON_ACTIVE_VALUE if i < level else LEVEL_ICON_INACTIVE_VALUE
+                )
+                cv2.circle(frame, point, LEVEL_ICON_RADIUS, (value,) * 3, -1)
+
+        _paste_centered(
+            frame,
+            load_screenshot_template("已弃用" if essence.deprecated else "未弃用"),
+            DEPRECATE_BUTTON_ROI,
+        )
+        _paste_centered(
+            frame,
+            load_screenshot_template("已锁定" if essence.locked else "未锁定"),
+            LOCK_BUTTON_ROI,
+        )
+
+    def compose(
+        self,
+        cells: Sequence[SyntheticEssence | None],
+        selected: SyntheticEssence | None,
+    ) -> MatLike:
+        """
+        合成一帧完整的客户区截图。
+
+        Args:
+            cells: 网格中按行优先顺序排列的基质，None 表示空格子
+            selected: 右侧面板显示的基质
+
+        Returns:
+            BGR 格式的客户区图像。
+        """
+        frame = self._base.copy()
+        self.draw_grid(frame, cells)
+        self.draw_panel(frame, selected)
+        return frame
+
+
+@dataclass
+class Augmentation:
+    """
+    对面板区域施加的随机图像退化，每帧在给定范围内随机取值。
+
+    所有参数为 0 或 None 时不做任何处理。
+    """
+
+    noise_sigma: float = 0.0
+    """高斯噪声标准差的上限"""
+    blur_sigma: float = 0.0
+    """高斯模糊标准差的上限"""
+    jpeg_quality: int | None = None
+    """JPEG 压缩质量的下限，实际质量在此值到 95 之间随机"""
+    brightness: float = 0.0
+    """亮度偏移绝对值的上限"""
+    contrast: float = 0.0
+    """对比度缩放相对 1 的偏离上限"""
+
+    def __post_init__(self) -> None:
+        self._noise_banks: dict[
+            int, tuple[npt.NDArray[np.uint8], npt.NDArray[np.uint8]]
+        ] = {}
+
+    def _noise(
+        self, rng: np.random.Generator, sigma: int, shape: tuple[int, ...]
+    ) -> tuple[npt.NDArray[np.uint8], npt.NDArray[np.uint8]]:
+        """
+        从预先生成的两倍大小的噪声中随机截取一块，避免每帧生成随机数。
+
+        噪声按整数标准差缓存，拆分为正、负两部分，以便用饱和的 uint8 加减法叠加。
+        """
+        height, width = shape[:2]
+        bank = self._noise_banks.get(sigma)
+        if (
+            bank is None
+            or bank[0].shape[0] < 2 * height
+            or bank[0].shape[1] < 2 * width
+        ):
+            noise = rng.normal(0, sigma, (2 * height, 2 * width, *shape[2:]))
+            noise = np.clip(noise, -255, 255).round()
+            bank = (
+                np.maximum(noise, 0).astype(np.uint8),
+                np.maximum(-noise, 0).astype(np.uint8),
+            )
+            self._noise_banks[sigma] = bank
+        top = int(rng.integers(0, bank[0].shape[0] - height + 1))
+        left = int(rng.integers(0, bank[0].shape[1] - width + 1))
+        window = (slice(top, top + height), slice(left, left + width))
+        return bank[0][window], bank[1][window]
+
+    def apply(self, image: MatLike, rng: np.random.Generator) -> MatLike:
+        """原地增强 `image` 并返回它。"""
+        if self.contrast > 0 or self.brightness > 0:
+            alpha = 1 + rng.uniform(-self.contrast, self.contrast)
+            beta = rng.uniform(-self.brightness, self.brightness)
+            image[...] = cv2.addWeighted(image, alpha, image, 0, beta)
+        if self.blur_sigma > 0:
+            sigma = rng.uniform(0, self.blur_sigma)
+            if sigma > 0.1:
+                image[...] = cv2.GaussianBlur(image, (0, 0), sigma)
+        if self.noise_sigma > 0:
+            sigma = int(rng.integers(0, round(self.noise_sigma) + 1))
+            if sigma > 0:
+                positive, negative = self._noise(rng, sigma, image.shape)
+                image[...] = cv2.subtract(cv2.add(image, positive), negative)
+        if self.jpeg_quality is not None:
+            quality = int(rng.integers(self.jpeg_quality, 96))
+            _, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            image[...] = cv2.imdecode(buffer, cv2.IMREAD_UNCHANGED).reshape(image.shape)
+        return image
+
+
+@dataclass
+class SyntheticSample:
+    """生成器产出的一帧及其真实标签。"""
+
+    index: int
+    image: MatLike
+    """客户区截图（BGR）；启用缓冲区复用时，下一帧会覆盖此图像"""
+    essence: SyntheticEssence
+    """右侧面板显示的基质，即真实标签"""
+
+
+def random_essence(
+    rng: np.random.Generator,
+    attribute_stats: Sequence[str] = all_attribute_stats,
+    secondary_stats: Sequence[str] = all_secondary_stats,
+    skill_stats: Sequence[str] = all_skill_stats,
+) -> SyntheticEssence:
+    """随机生成一个基质。"""
+    return SyntheticEssence(
+        stats=(
+            attribute_stats[rng.integers(len(attribute_stats))],
+            secondary_stats[rng.integers(len(secondary_stats))],
+            skill_stats[rng.integers(len(skill_stats))],
+        ),
+        levels=tuple(int(level) for level in rng.integers(1, 5, 3)),
+        locked=bool(rng.integers(2)),
+        deprecated=bool(rng.integers(2)),
+        rarity=int(rng.integers(3, 6)),
+        seed=int(rng.integers(1 << 31)),
+    )
+
+
+def generate_frames(
+    count: int | None = None,
+    *,
+    seed: int = 0,
+    augmentation: Augmentation | None = None,
+    essences: Iterator[SyntheticEssence] | None = None,
+    grid: Sequence[SyntheticEssence | None] = (),
+    composer: FrameComposer | None = None,
+    reuse_buffer: bool = True,
+) -> Iterator[SyntheticSample]:
+    """
+    流式生成带真实标签的基质界面截图。
+
+    网格和标题只绘制一次，之后每帧只恢复并重绘 `PANEL_SCOPE` 区域，
+    增强也只作用于该区域，因此每帧的开销与整帧大小无关。
+
+    Args:
+        count: 生成的帧数，None 表示无限生成
+        seed: 随机种子，相同的参数和种子生成相同的帧序列
+        augmentation: 对面板区域施加的随机退化
+        essences: 面板显示的基质序列，默认随机生成
+        grid: 网格中显示的基质
+        composer: 用于绘制的 `FrameComposer`
+        reuse_buffer: 是否在每帧复用同一个图像缓冲区。为 True 时，
+            需要保留图像的调用方应自行复制
+
+    Yields:
+        `SyntheticSample`。
+    """
+    rng = np.random.default_rng(seed)
+    composer = composer if composer is not None else FrameComposer()
+    background = composer.compose(grid, None)
+    panel_slice = scope_to_slice(PANEL_SCOPE)
+    frame = background.copy()
+    index = 0
+    while count is None or index < count:
+        essence = next(essences) if essences is not None else random_essence(rng)
+        if not reuse_buffer:
+            frame = background.copy()
+        else:
+            frame[panel_slice] = background[panel_slice]
+        composer.draw_panel(frame, essence)
+        if augmentation is not None:
+            augmentation.apply(frame[panel_slice], rng)
+        yield SyntheticSample(index, frame, essence)
+        index += 1
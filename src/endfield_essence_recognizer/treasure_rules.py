@@ -0,0 +1,157 @@
+"""
+Compiled treasure rules.
+
+The rules in the config are compiled into per-slot bitsets once per config change, so
+judging an essence takes a few dictionary lookups and integer ANDs however many rules
+are configured.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Collection, Iterable, Sequence
+from functools import cache
+from typing import NamedTuple
+
+from endfield_essence_recognizer.config import ANY_STAT, Config, EssenceStats, config
+from endfield_essence_recognizer.joint_decoder import StatCombination
+from endfield_essence_recognizer.utils.log import logger
+
+
+class WeaponProfile(NamedTuple):
+    """规则编译所需的已实装武器信息。"""
+
+    weapon_id: str
+    stats: StatCombination
+    rarity: int
+    weapon_type: int
+
+
+@cache
+def load_weapon_profiles() -> tuple[WeaponProfile, ...]:
+    """从游戏数据读取所有已实装武器的信息。"""
+    from endfield_essence_recognizer.game_data import weapon_basic_table
+    from endfield_essence_recognizer.game_data.weapon import weapon_stats_dict
+
+    return tuple(
+        WeaponProfile(
+            weapon_id,
+            (stats["attribute"], stats["secondary"], stats["skill"]),
+            weapon_basic_table[weapon_id]["rarity"],
+            weapon_basic_table[weapon_id]["weaponType"],
+        )
+        for weapon_id, stats in weapon_stats_dict.items()
+    )
+
+
+class TreasureRuleIndex:
+    """
+    编译后的宝藏基质条件。
+
+    第 i 条规则对应整数中的第 i 位。每个属性位置按属性值索引满足该位置的规则集合，
+    等级和武器筛选同理；判定时把各集合按位与，最低位即最先满足的规则。
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[EssenceStats],
+        weapons: Iterable[WeaponProfile],
+        trash_weapon_ids: Collection[str] = (),
+    ) -> None:
+        self.rules: list[EssenceStats] = list(rules)
+        self.trash_weapon_ids: frozenset[str] = frozenset(trash_weapon_ids)
+        self._weapon_ids: dict[StatCombination, list[str]] = {}
+        """属性组合 -> 契合的已实装武器"""
+        self._stat_masks: list[dict[str | None, int]] = [{}, {}, {}]
+        """每个属性位置：属性值 -> 指定了该属性值的规则"""
+        self._any_stat_masks: list[int] = [0, 0, 0]
+        """每个属性位置：使用通配符的规则"""
+        level_count = (
+            max([0, *(level for rule in self.rules for level in rule.min_levels)]) + 1
+        )
+        self._level_masks: list[list[int]] = [[0] * level_count for _ in range(3)]
+        """每个属性位置：等级 -> 最低等级不超过该等级的规则，超出范围的等级按最后一项"""
+        self._unfiltered_mask: int = 0
+        """不筛选武器的规则"""
+        self._weapon_masks: dict[StatCombination, int] = {}
+        """属性组合 -> 契合的武器满足筛选条件的规则"""
+
+        weapons = list(weapons)
+        for weapon in weapons:
+            self._weapon_ids.setdefault(weapon.stats, []).append(weapon.weapon_id)
+
+        for index, rule in enumerate(self.rules):
+            bit = 1 << index
+            values = (rule.attribute, rule.secondary, rule.skill)
+            for slot, (value, min_level) in enumerate(zip(values, rule.min_levels)):
+                if value == ANY_STAT:
+                    self._any_stat_masks[slot] |= bit
+                else:
+                    masks = self._stat_masks[slot]
+                    masks[value] = masks.get(value, 0) | bit
+                level_masks = self._level_masks[slot]
+                for level in range(max(min_level, 0), len(level_masks)):
+                    level_masks[level] |= bit
+
+            if not rule.weapon_rarities and not rule.weapon_types:
+                self._unfiltered_mask |= bit
+                continue
+            for weapon in weapons:
+                if (
+                    not rule.weapon_rarities or weapon.rarity in rule.weapon_rarities
+                ) and (
+                    not rule.weapon_types or weapon.weapon_type in rule.weapon_types
+                ):
+                    self._weapon_masks[weapon.stats] = (
+                        self._weapon_masks.get(weapon.stats, 0) | bit
+                    )
+
+    def match(
+        self, stats: Sequence[str | None], levels: Sequence[int | None] | None = None
+    ) -> EssenceStats | None:
+        """返回基质满足的第一条规则，都不满足时返回 None。未识别的等级视为 0。"""
+        if not self.rules:
+            return None
+        combination = (stats[0], stats[1], stats[2])
+        mask = self._unfiltered_mask | self._weapon_masks.get(combination, 0)
+        for slot in range(3):
+            if not mask:
+                return None
+            level = levels[slot] if levels is not None else None
+            level_masks = self._level_masks[slot]
+            mask &= (
+                self._stat_masks[slot].get(stats[slot], 0) | self._any_stat_masks[slot]
+            ) & level_masks[min(max(level or 0, 0), len(level_masks) - 1)]
+        if not mask:
+            return None
+        return self.rules[(mask & -mask).bit_length() - 1]
+
+    def matched_weapon_ids(self, stats: Sequence[str | None]) -> list[str]:
+        """与基质属性完全契合的已实装武器。"""
+        return self._weapon_ids.get((stats[0], stats[1], stats[2]), [])
+
+
+_compiled: tuple[list[EssenceStats], list[str], TreasureRuleIndex] | None = None
+"""(编译时配置中的规则列表, 拦截列表, 规则索引)"""
+
+
+def get_treasure_rule_index(current: Config | None = None) -> TreasureRuleIndex:
+    """
+    返回根据配置编译的规则索引，默认使用全局配置。
+
+    配置更新时规则列表会被整体替换，因此只比较列表对象是否相同，配置不变时不重新编译。
+    """
+    global _compiled
+
+    if current is None:
+        current = config.model_copy()
+    rules, trash_weapon_ids = current.treasure_essence_stats, current.trash_weapon_ids
+    compiled = _compiled
+    if (
+        compiled is None
+        or compiled[0] is not rules
+        or compiled[1] is not trash_weapon_ids
+    ):
+        index = TreasureRuleIndex(rules, load_weapon_profiles(), trash_weapon_ids)
+        logger.debug(f"已编译 {len(rules)} 条宝藏基质条件。")
+        compiled = _compiled = (rules, trash_weapon_ids, index)
+    return compiled[2]
@@ -0,0 +1,65 @@
+"""
+Clock abstraction so that timing-dependent logic can run on simulated time.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Protocol
+
+
+class Clock(Protocol):
+    """时钟，提供单调时间和等待功能。"""
+
+    def time(self) -> float:
+        """返回单调递增的当前时间（秒）。"""
+        ...
+
+    def sleep(self, seconds: float) -> None:
+        """等待指定的秒数。"""
+        ...
+
+
+class SystemClock:
+    """使用真实时间的时钟。"""
+
+    def time(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    模拟时钟，`sleep` 立即返回并将当前时间向前推进。
+
+    用于测试和基准测试，使依赖等待时间的逻辑无需真正等待即可运行。
+    """
+
+    def __init__(self, start: float = 0.0) -> None:
+        self._now: float = start
+        self._lock = threading.Lock()
+        self.total_slept: float = 0.0
+        """累计等待的模拟时间（秒）"""
+
+    def time(self) -> float:
+        with self._lock:
+            return self._now
+
+    def sleep(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        with self._lock:
+            self._now += seconds
+            self.total_slept += seconds
+
+    def advance(self, seconds: float) -> None:
+        """在不计入等待时间的情况下推进时间，用于模拟计算等耗时。"""
+        with self._lock:
+            self._now += seconds
+
+
+system_clock = SystemClock()
+"""全局真实时钟实例"""
@@ -62,6 +62,26 @@ def linear_operation(image: MatLike, min_value: int, max_value: int) -> MatLike:
     return np.clip(image, 0, 255).astype(np.uint8)
 
 
+def resize_by(image: MatLike, scale: float) -> MatLike:
+    """按比例缩放图像，缩小时使用区域插值以避免混叠。"""
+    if scale == 1:
+        return image
+    height, width = image.shape[:2]
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    return cv2.resize(image, size, interpolation=interpolation)
+
+
+def expand_scope(scope: Scope, margin: int, size: tuple[int, int]) -> Scope:
+    """将区域向四周扩展 `margin` 像素，并限制在 `size` (宽, 高) 之内。"""
+    (x0, y0), (x1, y1) = scope
+    width, height = size
+    return (
+        (max(0, x0 - margin), max(0, y0 - margin)),
+        (min(width, x1 + margin), min(height, y1 + margin)),
+    )
+
+
 def scope_to_slice(scope: Scope | None) -> Slice:
     """((x0, y0), (x1, y1)) -> (slice(y0, y1), slice(x0, x1))"""
     if scope is None:
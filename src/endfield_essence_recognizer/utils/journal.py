@@ -0,0 +1,66 @@
+"""
+Structured scan journal in JSON Lines format.
+
+Each scanned essence is written as one JSON object per line to
+`ROOT_DIR/logs/scan_journal.jsonl` by a background writer with size rotation.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from datetime import datetime
+from typing import Any
+
+from endfield_essence_recognizer.core.config import get_server_config
+from endfield_essence_recognizer.path import ROOT_DIR
+from endfield_essence_recognizer.utils.log import BackgroundFileWriter
+
+SCAN_JOURNAL_PATH = ROOT_DIR / "logs" / "scan_journal.jsonl"
+"""扫描日志文件路径"""
+
+
+class ScanJournal:
+    """将每个基质的识别结果和执行的操作记录为一行 JSON。"""
+
+    def __init__(self, writer: BackgroundFileWriter | None) -> None:
+        self._writer: BackgroundFileWriter | None = writer
+
+    @property
+    def enabled(self) -> bool:
+        return self._writer is not None
+
+    def record(self, **fields: Any) -> None:
+        """写入一条记录，自动加上当前时间。未启用时不做任何事。"""
+        if self._writer is None:
+            return
+        entry = {"time": datetime.now().isoformat(timespec="milliseconds"), **fields}
+        self._writer.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+_scan_journal: ScanJournal | None = None
+_scan_journal_lock = threading.Lock()
+
+
+def get_scan_journal() -> ScanJournal:
+    """获取全局扫描日志，首次调用时根据服务器配置创建。"""
+    global _scan_journal
+    with _scan_journal_lock:
+        if _scan_journal is None:
+            server_config = get_server_config()
+            writer = (
+                BackgroundFileWriter(
+                    SCAN_JOURNAL_PATH,
+                    max_bytes=server_config.log_max_bytes,
+                    retention=server_config.log_retention,
+                    compression=server_config.log_compression,
+                )
+                if server_config.scan_journal_enabled
+                else None
+            )
+            _scan_journal = ScanJournal(writer)
+        return _scan_journal
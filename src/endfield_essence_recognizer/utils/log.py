@@ -1,18 +1,29 @@
 """
 Logging utilities of the server process.
 
-Provides loguru logger configuration and a WebSocket log handler.
+Provides loguru logger configuration, a background file writer and a WebSocket log
+handler.
 """
 
 from __future__ import annotations
 
 import asyncio
+import atexit
+import gzip
 import inspect
 import logging
+import multiprocessing
+import queue
+import shutil
 import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO
 
 from loguru import logger
 
+from endfield_essence_recognizer.core.config import get_server_config
 from endfield_essence_recognizer.path import ROOT_DIR
 
 file_log_format = (
@@ -83,6 +94,184 @@ class WebSocketHandler:
 websocket_handler = WebSocketHandler()
 
 
+class BackgroundFileWriter:
+    """
+    在后台线程中写入日志文件的处理器，支持按日期和大小轮转、压缩和保留数量限制。
+
+    调用方只把格式化后的日志放入队列，磁盘写入、轮转和压缩都不会阻塞扫描线程。
+    没有使用 loguru 的 `enqueue=True`，因为它会在调用方线程中序列化每条日志记录，
+    开销比直接写文件还大。
+
+    `daily` 为 True 时实际写入 `{stem}_{日期}{suffix}`，日期变化后换用新文件。
+    文件超过 `max_bytes` 时重命名为 `{stem}.{时间}{suffix}`，并在另一个线程中压缩为
+    `.gz`；目录中匹配 `retention_glob` 的旧文件只保留最新的 `retention` 个。
+    写入、轮转或压缩出错时输出到标准错误，后台线程继续运行。
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = 0,
+        retention: int = 0,
+        compression: bool = False,
+        retention_glob: str | None = None,
+        daily: bool = False,
+    ) -> None:
+        """
+        Args:
+            path: 日志文件路径，`daily` 为 True 时文件名中还会加上日期
+            max_bytes: 单个文件的最大字节数，0 表示不轮转
+            retention: 保留的旧文件数量，0 表示不限制
+            compression: 是否压缩轮转后的文件
+            retention_glob: 旧文件的匹配模式，默认为 `{stem}.*`
+            daily: 是否每天使用一个新文件
+        """
+        self.base_path: Path = path
+        self.daily: bool = daily
+        self.path: Path = self._current_path()
+        """当前写入的文件"""
+        self.max_bytes: int = max_bytes
+        self.retention: int = retention
+        self.compression: bool = compression
+        self.retention_glob: str = retention_glob or f"{path.stem}.*"
+        self._queue: queue.SimpleQueue[str | None] = queue.SimpleQueue()
+        self._rotation_lock = threading.Lock()
+        """保证压缩和清理旧文件不会并发进行"""
+        self._thread = threading.Thread(
+            target=self._run, name="BackgroundFileWriter", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, message: str) -> None:
+        self._queue.put(str(message))
+
+    def _current_path(self) -> Path:
+        if not self.daily:
+            return self.base_path
+        return self.base_path.with_name(
+            f"{self.base_path.stem}_{datetime.now():%Y-%m-%d}{self.base_path.suffix}"
+        )
+
+    @staticmethod
+    def _report_error(action: str, path: Path, error: Exception) -> None:
+        """日志文件本身出错时无法再写入日志，只能输出到标准错误。"""
+        if sys.stderr:
+            print(f"{action}日志文件 {path} 时出错：{error!r}", file=sys.stderr)
+
+    def _rotate(self) -> None:
+        """将当前文件重命名为带时间的旧文件，并在后台压缩和清理旧文件。"""
+        rotated = self.path.with_name(
+            f"{self.path.stem}.{datetime.now():%Y-%m-%d_%H-%M-%S_%f}{self.path.suffix}"
+        )
+        self.path.rename(rotated)
+        threading.Thread(
+            target=self._finish_rotation,
+            args=(rotated,),
+            name="LogCompression",
+            daemon=True,
+        ).start()
+
+    def _finish_rotation(self, rotated: Path) -> None:
+        with self._rotation_lock:
+            try:
+                if self.compression:
+                    # 先写入临时文件，压缩完成后再替换，不会出现不完整的 .gz 文件
+                    compressed = rotated.with_name(f"{rotated.name}.gz")
+                    partial = rotated.with_name(f"{compressed.name}.tmp")
+                    with (
+                        rotated.open("rb") as source,
+                        gzip.open(partial, "wb") as target,
+                    ):
+                        shutil.copyfileobj(source, target)
+                    rotated.unlink()
+                    partial.replace(compressed)
+                self._apply_retention()
+            except Exception as e:
+                self._report_error("压缩", rotated, e)
+
+    def _apply_retention(self) -> None:
+        if self.retention <= 0:
+            return
+        old_files = sorted(
+            (
+                path
+                for path in self.path.parent.glob(self.retention_glob)
+                if path != self.path and path.is_file()
+            ),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        for path in old_files[self.retention :]:
+            path.unlink(missing_ok=True)
+
+    def _open(self) -> BinaryIO:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._apply_retention()
+        except OSError as e:
+            self._report_error("清理", self.path, e)
+        return self.path.open("ab")
+
+    def _run(self) -> None:
+        file: BinaryIO | None = None
+        size = 0
+        while (message := self._queue.get()) is not None:
+            try:
+                path = self._current_path()
+                if file is None or path != self.path:
+                    if file is not None:
+                        file.close()
+                        file = None
+                    self.path = path
+                    file = self._open()
+                    size = file.tell()
+                data = message.encode("utf-8")
+                if (
+                    self.max_bytes > 0
+                    and size > 0
+                    and size + len(data) > self.max_bytes
+                ):
+                    file.close()
+                    file = None
+                    try:
+                        self._rotate()
+                    except OSError as e:
+                        # 例如文件被其他程序占用；继续写入原文件，写满下一个
+                        # `max_bytes` 后再尝试轮转
+                        self._report_error("轮转", self.path, e)
+                    file = self._open()
+                    size = 0
+                file.write(data)
+                size += len(data)
+                if self._queue.empty():
+                    file.flush()
+            except Exception as e:
+                self._report_error("写入", self.path, e)
+        if file is not None:
+            file.close()
+
+    def close(self) -> None:
+        """写完队列中剩余的日志后停止后台线程。"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+
+log_profile = get_server_config().log_profile
+"""当前日志配置，见 `ServerConfig.log_profile`"""
+_trace_enabled = log_profile == "debug"
+
+
+def is_trace_enabled() -> bool:
+    """
+    是否记录识别热路径上的逐项 TRACE 日志。
+
+    热路径应在循环外调用一次，并在记录前检查结果，以免在不记录时构造日志字符串。
+    """
+    return _trace_enabled
+
+
 logger.remove()
 if sys.stderr:  # 打包后可能没有 stderr
     logger.add(
@@ -91,12 +280,6 @@ if sys.stderr:  # 打包后可能没有 stderr
         format=console_log_format,
         diagnose=True,
     )
-logger.add(
-    ROOT_DIR / "logs" / "log_{time:YYYY-MM-DD}.log",
-    level="TRACE",
-    format=file_log_format,
-    diagnose=True,
-)
 logger.add(
     websocket_handler,
     level="INFO",
@@ -105,3 +288,32 @@ logger.add(
     diagnose=True,
     filter=lambda record: record["extra"].get("module") != "uvicorn",
 )
+
+_file_log_writer: BackgroundFileWriter | None = None
+
+
+def setup_file_logging() -> None:
+    """
+    添加按日期轮转的日志文件输出，重复调用不做任何事。
+
+    只在主进程中生效：识别子进程和进程池中的进程不写日志文件，以免多个进程同时打开、
+    轮转和清理同一个文件。
+    """
+    global _file_log_writer
+    if _file_log_writer is not None or multiprocessing.parent_process() is not None:
+        return
+    server_config = get_server_config()
+    _file_log_writer = BackgroundFileWriter(
+        ROOT_DIR / "logs" / "log.log",
+        max_bytes=server_config.log_max_bytes,
+        retention=server_config.log_retention,
+        compression=server_config.log_compression,
+        retention_glob="log_*",
+        daily=True,
+    )
+    logger.add(
+        _file_log_writer,
+        level="TRACE" if log_profile == "debug" else "DEBUG",
+        format=file_log_format,
+        diagnose=log_profile == "debug",
+    )
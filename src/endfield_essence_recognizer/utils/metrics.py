@@ -0,0 +1,208 @@
+"""
+Lightweight in-process metrics: per-stage timing spans, counters and gauges.
+
+Spans are aggregated into rolling windows so that percentiles reflect recent
+scans. When disabled, `span()` returns a shared no-op context manager.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import threading
+import time
+from collections.abc import Callable
+from functools import wraps
+from typing import Any, ParamSpec, TypeVar
+
+import numpy as np
+import numpy.typing as npt
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+METRICS_WINDOW = 1024
+"""每个阶段保留的最近耗时样本数量"""
+METRICS_QUANTILES = (0.5, 0.95, 0.99)
+"""导出的分位数"""
+PROMETHEUS_PREFIX = "eer"
+"""Prometheus 指标名前缀"""
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class RollingHistogram:
+    """保留最近 `size` 个样本的耗时统计，计数和总和为累计值。"""
+
+    def __init__(self, size: int = METRICS_WINDOW) -> None:
+        self._values: npt.NDArray[np.float64] = np.zeros(size, dtype=np.float64)
+        self.count: int = 0
+        """累计样本数"""
+        self.sum: float = 0.0
+        """累计样本总和"""
+
+    def observe(self, value: float) -> None:
+        self._values[self.count % len(self._values)] = value
+        self.count += 1
+        self.sum += value
+
+    def window(self) -> npt.NDArray[np.float64]:
+        """最近的样本（顺序不保证）。"""
+        return self._values[: min(self.count, len(self._values))]
+
+    def summary(self) -> dict[str, float | int]:
+        window = self.window()
+        summary: dict[str, float | int] = {"count": self.count, "sum": self.sum}
+        if len(window) == 0:
+            return summary
+        quantiles = np.quantile(window, METRICS_QUANTILES)
+        summary["mean"] = float(window.mean())
+        summary["max"] = float(window.max())
+        for q, value in zip(METRICS_QUANTILES, quantiles):
+            summary[f"p{round(q * 100)}"] = float(value)
+        return summary
+
+
+class _Span:
+    __slots__ = ("_registry", "_name", "_start")
+
+    def __init__(self, registry: MetricsRegistry, name: str) -> None:
+        self._registry = registry
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self) -> _Span:
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._registry.observe(self._name, time.perf_counter() - self._start)
+
+
+class MetricsRegistry:
+    """
+    阶段耗时和计数器的集合，线程安全。
+
+    用法：
+
+        with metrics.span("capture"):
+            image = screenshot_window(window)
+        metrics.increment("essences_scanned")
+    """
+
+    def __init__(self, enabled: bool = True, window: int = METRICS_WINDOW) -> None:
+        self.enabled: bool = enabled
+        self._window: int = window
+        self._lock = threading.Lock()
+        self._histograms: dict[str, RollingHistogram] = {}
+        self._counters: dict[str, float] = {}
+        self._gauges: dict[str, float] = {}
+
+    def span(self, name: str) -> contextlib.AbstractContextManager[Any]:
+        """返回记录代码块耗时（秒）的上下文管理器，未启用时不做任何事。"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def timed(self, name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+        """记录函数每次调用耗时的装饰器。"""
+
+        def decorator(func: Callable[P, R]) -> Callable[P, R]:
+            @wraps(func)
+            def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+                with self.span(name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def observe(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = RollingHistogram(self._window)
+            histogram.observe(seconds)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """记录当前值，如队列深度。"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[name] = value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        导出当前统计。
+
+        Returns:
+            形如 `{"enabled": ..., "window": ..., "stages": {阶段: 统计}, "counters": {...},
+            "gauges": {...}}`
+            的字典，耗时单位为秒。
+        """
+        with self._lock:
+            stages = {
+                name: histogram.summary()
+                for name, histogram in sorted(self._histograms.items())
+            }
+            counters = dict(sorted(self._counters.items()))
+            gauges = dict(sorted(self._gauges.items()))
+        return {
+            "enabled": self.enabled,
+            "window": self._window,
+            "stages": stages,
+            "counters": counters,
+            "gauges": gauges,
+        }
+
+    def to_prometheus(self) -> str:
+        """以 Prometheus 文本格式导出当前统计。"""
+        snapshot = self.snapshot()
+        stage_metric = f"{PROMETHEUS_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {stage_metric} Duration of scan stages over the recent window.",
+            f"# TYPE {stage_metric} summary",
+        ]
+        for name, summary in snapshot["stages"].items():
+            for q in METRICS_QUANTILES:
+                value = summary.get(f"p{round(q * 100)}")
+                if value is not None:
+                    lines.append(
+                        f'{stage_metric}{{stage="{name}",quantile="{q}"}} {value}'
+                    )
+            lines.append(f'{stage_metric}_sum{{stage="{name}"}} {summary["sum"]}')
+            lines.append(f'{stage_metric}_count{{stage="{name}"}} {summary["count"]}')
+
+        counter_metric = f"{PROMETHEUS_PREFIX}_events_total"
+        lines += [
+            f"# HELP {counter_metric} Number of scanner events.",
+            f"# TYPE {counter_metric} counter",
+        ]
+        for name, value in snapshot["counters"].items():
+            lines.append(f'{counter_metric}{{event="{name}"}} {value}')
+
+        gauge_metric = f"{PROMETHEUS_PREFIX}_gauge_value"
+        lines += [
+            f"# HELP {gauge_metric} Current value of scanner gauges.",
+            f"# TYPE {gauge_metric} gauge",
+        ]
+        for name, value in snapshot["gauges"].items():
+            lines.append(f'{gauge_metric}{{gauge="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+"""全局指标实例"""
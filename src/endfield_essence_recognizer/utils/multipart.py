@@ -0,0 +1,122 @@
+"""
+Minimal parser for `multipart/form-data` request bodies.
+
+Only what `/api/recognize` needs: the request body is already buffered in memory,
+and the parts are returned as views into it instead of being spooled to temp files.
+Callers copy a part only when handing it on, e.g. to a recognition subprocess.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from urllib.parse import unquote
+
+_PARAM_PATTERN = re.compile(r';\s*([^\s=;]+)\s*=\s*("(?:[^"\\]|\\.)*"|[^;]*)')
+
+
+@dataclass
+class MultipartPart:
+    name: str | None
+    """表单字段名"""
+    filename: str | None
+    """上传的文件名，普通表单字段为 None"""
+    content_type: str | None
+    data: memoryview
+    """部分的内容，与请求体共用数据"""
+
+
+def parse_header_params(value: str) -> tuple[str, dict[str, str]]:
+    """
+    解析形如 `form-data; name="file"; filename="a.png"` 的首部值。
+
+    Returns:
+        (主值, 参数字典)，参数名为小写。`filename*` 按 RFC 5987 解码后存为 `filename`。
+    """
+    main, _, rest = value.partition(";")
+    params: dict[str, str] = {}
+    for key, raw in _PARAM_PATTERN.findall(";" + rest):
+        key = key.lower()
+        raw = raw.strip()
+        if raw.startswith('"'):
+            raw = re.sub(r"\\(.)", r"\1", raw[1:-1])
+        if key.endswith("*"):
+            # charset'language'percent-encoded
+            charset, _, encoded = raw.partition("'")
+            _, _, encoded = encoded.partition("'")
+            key = key[:-1]
+            raw = unquote(encoded, encoding=charset or "utf-8", errors="replace")
+        elif key in params:
+            # 已经有 filename* 给出的值
+            continue
+        params[key] = raw
+    return main.strip().lower(), params
+
+
+def get_boundary(content_type: str) -> bytes:
+    """
+    从 Content-Type 中取出分隔符。
+
+    Raises:
+        ValueError: 不是 multipart 类型或缺少 boundary 参数。
+    """
+    media_type, params = parse_header_params(content_type)
+    if not media_type.startswith("multipart/"):
+        raise ValueError(f"不是 multipart 请求：{media_type}")
+    boundary = params.get("boundary")
+    if not boundary:
+        raise ValueError("Content-Type 中缺少 boundary 参数")
+    return boundary.encode("latin-1")
+
+
+def parse_multipart(body: bytes, content_type: str) -> list[MultipartPart]:
+    """
+    将 multipart 请求体拆分为各个部分。
+
+    Args:
+        body: 完整的请求体
+        content_type: 请求的 Content-Type 首部
+
+    Raises:
+        ValueError: 请求体格式不正确。
+    """
+    boundary = b"--" + get_boundary(content_type)
+    delimiter = b"\r\n" + boundary
+    view = memoryview(body)
+
+    start = body.find(boundary)
+    if start < 0:
+        raise ValueError("请求体中没有 multipart 分隔符")
+    position = start + len(boundary)
+    parts: list[MultipartPart] = []
+    while not body.startswith(b"--", position):
+        # 分隔符所在行的剩余部分（允许有空白填充）
+        line_end = body.find(b"\r\n", position)
+        if line_end < 0:
+            raise ValueError("multipart 请求体不完整")
+        header_end = body.find(b"\r\n\r\n", line_end)
+        if header_end < 0:
+            raise ValueError("multipart 首部不完整")
+        data_start = header_end + 4
+        data_end = body.find(delimiter, data_start)
+        if data_end < 0:
+            raise ValueError("multipart 请求体不完整")
+
+        headers: dict[str, str] = {}
+        for line in (
+            body[line_end + 2 : header_end].decode("utf-8", "replace").split("\r\n")
+        ):
+            key, sep, value = line.partition(":")
+            if sep:
+                headers[key.strip().lower()] = value.strip()
+        _, disposition = parse_header_params(headers.get("content-disposition", ""))
+        parts.append(
+            MultipartPart(
+                name=disposition.get("name"),
+                filename=disposition.get("filename"),
+                content_type=headers.get("content-type"),
+                data=view[data_start:data_end],
+            )
+        )
+        position = data_end + len(delimiter)
+    return parts
@@ -0,0 +1,295 @@
+"""
+On-demand profiling of the running process.
+
+Supports a sampling profiler that writes speedscope JSON, `cProfile` around the scan
+loop that writes pstats, and `tracemalloc` snapshots. Every session is bounded in
+time and writes its output to `ROOT_DIR/logs`.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import Any, Literal
+
+from endfield_essence_recognizer.path import ROOT_DIR
+from endfield_essence_recognizer.utils.log import logger
+
+type ProfileMode = Literal["sampling", "cprofile"]
+
+PROFILE_DIR = ROOT_DIR / "logs"
+"""分析结果输出目录"""
+PROFILE_MAX_DURATION = 300.0
+"""单次分析的最长时间（秒），到时自动停止"""
+SAMPLING_INTERVAL = 0.005
+"""采样分析器的默认采样间隔（秒）"""
+SAMPLING_MAX_DEPTH = 128
+"""采样时记录的最大调用栈深度"""
+TRACEMALLOC_FRAMES = 16
+"""tracemalloc 为每次分配记录的调用栈深度"""
+
+
+def _output_path(prefix: str, suffix: str) -> Path:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    return PROFILE_DIR / f"{prefix}_{datetime.now():%Y-%m-%d_%H-%M-%S}{suffix}"
+
+
+class SamplingProfiler:
+    """
+    在后台线程中定期采集所有其他线程的调用栈，结果导出为 speedscope 格式。
+
+    采样不需要被分析的线程配合，开销只与采样频率和线程数有关。
+    """
+
+    def __init__(self, interval: float = SAMPLING_INTERVAL) -> None:
+        self.interval: float = interval
+        self._frames: list[dict[str, Any]] = []
+        self._frame_index: dict[tuple[str, str, int], int] = {}
+        self._samples: dict[int, list[list[int]]] = {}
+        self._weights: dict[int, list[float]] = {}
+        self._thread_names: dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _frame_id(self, frame: FrameType) -> int:
+        code = frame.f_code
+        key = (code.co_filename, code.co_qualname, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = len(self._frames)
+            self._frame_index[key] = index
+            self._frames.append(
+                {"name": key[1], "file": key[0], "line": code.co_firstlineno}
+            )
+        return index
+
+    def _sample(self, elapsed: float) -> None:
+        own_id = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack: list[int] = []
+            current: FrameType | None = frame
+            while current is not None and len(stack) < SAMPLING_MAX_DEPTH:
+                stack.append(self._frame_id(current))
+                current = current.f_back
+            stack.reverse()  # speedscope 要求从根到叶的顺序
+            self._samples.setdefault(thread_id, []).append(stack)
+            self._weights.setdefault(thread_id, []).append(elapsed)
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            self._sample(now - last)
+            last = now
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="SamplingProfiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread_names = {
+            thread.ident: thread.name
+            for thread in threading.enumerate()
+            if thread.ident is not None
+        }
+
+    def to_speedscope(self) -> dict[str, Any]:
+        """导出为 speedscope 文件格式，每个线程一个 profile。"""
+        profiles = [
+            {
+                "type": "sampled",
+                "name": self._thread_names.get(thread_id, f"Thread {thread_id}"),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(self._weights[thread_id]),
+                "samples": samples,
+                "weights": self._weights[thread_id],
+            }
+            for thread_id, samples in self._samples.items()
+        ]
+        # 样本最多的线程（通常是扫描线程）排在最前
+        profiles.sort(key=lambda profile: len(profile["samples"]), reverse=True)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": "endfield-essence-recognizer",
+            "exporter": "endfield-essence-recognizer",
+            "activeProfileIndex": 0,
+            "shared": {"frames": self._frames},
+            "profiles": profiles,
+        }
+
+    def dump(self, path: Path) -> None:
+        path.write_text(json.dumps(self.to_speedscope()), encoding="utf-8")
+
+
+@dataclass
+class ProfileSession:
+    mode: ProfileMode
+    duration: float
+    started_at: float = field(default_factory=time.monotonic)
+    sampler: SamplingProfiler | None = None
+    cprofile: cProfile.Profile | None = None
+    timer: threading.Timer | None = None
+
+
+class ProfilerManager:
+    """
+    管理进程内唯一的分析会话。
+
+    `cprofile` 模式只在扫描器处理基质期间（`scope()` 内）启用 `cProfile`，
+    扫描空闲时不产生分析开销。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._session: ProfileSession | None = None
+        self.last_result: dict[str, Any] | None = None
+        """最近一次分析的结果"""
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            session = self._session
+            if session is None:
+                return {"running": False, "last_result": self.last_result}
+            return {
+                "running": True,
+                "mode": session.mode,
+                "elapsed": time.monotonic() - session.started_at,
+                "duration": session.duration,
+                "last_result": self.last_result,
+            }
+
+    def start(
+        self,
+        mode: ProfileMode = "sampling",
+        duration: float = 30.0,
+        interval: float = SAMPLING_INTERVAL,
+    ) -> dict[str, Any]:
+        """
+        开始分析，`duration` 秒后自动停止。
+
+        Raises:
+            RuntimeError: 已有分析正在进行。
+        """
+        duration = min(max(duration, 0.1), PROFILE_MAX_DURATION)
+        with self._lock:
+            if self._session is not None:
+                raise RuntimeError("已有分析正在进行")
+            session = ProfileSession(mode=mode, duration=duration)
+            if mode == "sampling":
+                session.sampler = SamplingProfiler(max(interval, 0.001))
+                session.sampler.start()
+            else:
+                session.cprofile = cProfile.Profile()
+            session.timer = threading.Timer(duration, self.stop)
+            session.timer.daemon = True
+            session.timer.start()
+            self._session = session
+        logger.info(f"开始性能分析（{mode}），最长 {duration:.0f} 秒。")
+        return self.status()
+
+    def stop(self) -> dict[str, Any] | None:
+        """停止分析并写入结果文件，没有正在进行的分析时返回 None。"""
+        with self._lock:
+            session = self._session
+            if session is None:
+                return None
+            self._session = None
+            if session.timer is not None:
+                session.timer.cancel()
+
+            if session.sampler is not None:
+                session.sampler.stop()
+                path = _output_path("profile", ".speedscope.json")
+                session.sampler.dump(path)
+            else:
+                assert session.cprofile is not None
+                path = _output_path("profile", ".pstats")
+                session.cprofile.create_stats()
+                session.cprofile.dump_stats(path)
+
+            self.last_result = {
+                "mode": session.mode,
+                "path": str(path),
+                "elapsed": time.monotonic() - session.started_at,
+            }
+        logger.info(f"性能分析结果已保存：{path}")
+        return self.last_result
+
+    @contextlib.contextmanager
+    def scope(self) -> Iterator[None]:
+        """在 `cprofile` 会话期间分析代码块，否则不做任何事。"""
+        session = self._session
+        if session is None or session.cprofile is None:
+            yield
+            return
+        try:
+            session.cprofile.enable()
+        except ValueError:
+            # 其他线程已启用了分析器
+            yield
+            return
+        try:
+            yield
+        finally:
+            session.cprofile.disable()
+
+
+def take_tracemalloc_snapshot(duration: float, top: int = 20) -> dict[str, Any]:
+    """
+    跟踪内存分配 `duration` 秒后拍摄快照，保存为 tracemalloc 快照文件。
+
+    应在后台线程中调用。快照可用 `tracemalloc.Snapshot.load` 加载。
+
+    Returns:
+        包含快照路径和按代码行统计的前 `top` 项分配的字典。
+    """
+    duration = min(max(duration, 0.0), PROFILE_MAX_DURATION)
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    try:
+        time.sleep(duration)
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+
+    path = _output_path("tracemalloc", ".snapshot")
+    snapshot.dump(str(path))
+    logger.info(f"内存快照已保存：{path}")
+    return {
+        "path": str(path),
+        "current_bytes": current,
+        "peak_bytes": peak,
+        "top": [
+            {
+                "location": str(stat.traceback[0]),
+                "size_bytes": stat.size,
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:top]
+        ],
+    }
+
+
+profiler = ProfilerManager()
+"""全局分析会话管理器"""
@@ -1,168 +1,127 @@
 """
-Windows OS-specific window utilities.
+Window utilities with a pluggable platform backend.
+
+By default the Windows backend in `win32_window` is used. It is imported lazily so that
+modules depending on these utilities can be imported on other platforms, where a
+different backend (e.g. the simulated window in `fake_window`) can be installed with
+`set_window_backend`.
 """
 
+from __future__ import annotations
+
 from collections.abc import Container, Iterable
+from typing import Protocol
 
-import numpy as np
-import pyautogui
-import pygetwindow
-import win32con
-import win32gui  # ty:ignore[unresolved-import]
-import win32ui  # ty:ignore[unresolved-import]
 from cv2.typing import MatLike
 
 from endfield_essence_recognizer.utils.image import Scope
+from endfield_essence_recognizer.utils.metrics import metrics
 
 
-def _get_window_hwnd(window: pygetwindow.Window) -> int:
-    """获取 `pygetwindow` 窗口对象的窗口句柄"""
-    hwnd = window._hWnd
-    if not hwnd:
-        # 通过窗口标题查找窗口句柄
-        hwnd = win32gui.FindWindow(None, window.title)
-        if not hwnd:
-            # 如果找不到精确匹配，遍历所有窗口查找包含关键词的
-            def callback(h, extra):
-                if window.title in win32gui.GetWindowText(h):
-                    extra.append(h)
-
-            hwnds = []
-            win32gui.EnumWindows(callback, hwnds)
-            if hwnds:
-                hwnd = hwnds[0]
-            else:
-                raise RuntimeError(f"Cannot find hwnd of window {window}")
-    return hwnd
-
-
-def get_client_size(window: pygetwindow.Window) -> tuple[int, int]:
-    """获取窗口客户区的尺寸（宽度和高度）"""
-    hwnd = _get_window_hwnd(window)
-    client_left, client_top, client_right, client_bottom = win32gui.GetClientRect(hwnd)
-    width = client_right - client_left
-    height = client_bottom - client_top
-    return width, height
+class GameWindow(Protocol):
+    """窗口对象需要提供的属性和方法，与 `pygetwindow.Window` 兼容。"""
 
+    @property
+    def title(self) -> str: ...
 
-def _get_client_rect(window: pygetwindow.Window) -> Scope:
-    """获取窗口客户区的屏幕坐标（不包含标题栏和边框）"""
+    @property
+    def isMinimized(self) -> bool: ...
 
-    # 获取窗口句柄
-    hwnd = _get_window_hwnd(window)
+    @property
+    def isActive(self) -> bool: ...
 
-    # 获取客户区矩形
-    # GetClientRect 返回 (left, top, right, bottom)，客户区左上角为 (0, 0)
-    client_rect = win32gui.GetClientRect(hwnd)
-    client_left, client_top, client_right, client_bottom = client_rect
+    def restore(self) -> None: ...
 
-    # 将客户区左上角转换为屏幕坐标
-    left, top = win32gui.ClientToScreen(hwnd, (client_left, client_top))
-    # 将客户区右下角转换为屏幕坐标
-    right, bottom = win32gui.ClientToScreen(hwnd, (client_right, client_bottom))
+    def activate(self) -> None: ...
 
-    return ((left, top), (right, bottom))
 
+class WindowBackend(Protocol):
+    """窗口后端，负责查找窗口、截图和模拟鼠标操作。"""
 
-def _screenshot_by_win32ui(scope: Scope) -> MatLike:
-    """
-    截取屏幕指定区域，返回 BGR 格式的 numpy 图像。
+    def get_active_support_window(
+        self, supported_window_titles: Container[str]
+    ) -> GameWindow | None: ...
 
-    Args:
-        scope: 屏幕区域，格式为 ((left, top), (right, bottom))
+    def get_support_window(
+        self, supported_window_titles: Iterable[str]
+    ) -> GameWindow | None: ...
 
-    Returns:
-        numpy 数组（BGR 格式，OpenCV 兼容）
-    """
-    (left, top), (right, bottom) = scope
-    width, height = right - left, bottom - top
-    if width <= 0 or height <= 0:
-        raise ValueError(f"Try to screenshot with invalid rect: {scope}")
+    def get_client_size(self, window: GameWindow) -> tuple[int, int]: ...
 
-    # 创建设备上下文和位图
-    screen_dc = win32gui.GetDC(0)
-    img_dc = win32ui.CreateDCFromHandle(screen_dc)
-    mem_dc = img_dc.CreateCompatibleDC()
+    def get_game_version(self, window: GameWindow) -> str | None: ...
 
-    bitmap = win32ui.CreateBitmap()
-    bitmap.CreateCompatibleBitmap(img_dc, width, height)
-    mem_dc.SelectObject(bitmap)
+    def screenshot_window(
+        self, window: GameWindow, relative_region: Scope | None = None
+    ) -> MatLike: ...
 
-    # 复制屏幕区域到位图
-    mem_dc.BitBlt((0, 0), (width, height), img_dc, (left, top), win32con.SRCCOPY)
+    def click_on_window(
+        self, window: GameWindow, relative_x: int, relative_y: int
+    ) -> None: ...
 
-    # 读取位图像素数据
-    bmpinfo = bitmap.GetInfo()
-    bpp = bmpinfo["bmBitsPixel"] // 8  # 每像素字节数（通常为3或4）
-    stride = ((width * bpp + 3) // 4) * 4  # 4字节对齐的行宽
-    raw = bitmap.GetBitmapBits(True)
+    def scroll_on_window(
+        self, window: GameWindow, relative_x: int, relative_y: int, clicks: int
+    ) -> None: ...
 
-    # 转换为 numpy 数组
-    arr = np.frombuffer(raw, dtype=np.uint8)
-    arr = arr.reshape((height, stride))
-    arr = arr[:, : width * bpp]  # 移除对齐填充
-    arr = arr.reshape((height, width, bpp))
 
-    # 如果是 BGRA 格式，转换为 BGR
-    if bpp == 4:
-        arr = arr[:, :, :3]  # 丢弃 alpha 通道
+_backend: WindowBackend | None = None
 
-    # 释放 GDI 资源
-    mem_dc.DeleteDC()
-    img_dc.DeleteDC()
-    win32gui.ReleaseDC(0, screen_dc)
-    win32gui.DeleteObject(bitmap.GetHandle())
 
-    return arr.copy()
+def get_window_backend() -> WindowBackend:
+    """获取当前窗口后端，未设置时使用 Windows 后端。"""
+    global _backend
+    if _backend is None:
+        from endfield_essence_recognizer.utils.win32_window import Win32WindowBackend
 
+        _backend = Win32WindowBackend()
+    return _backend
 
-def screenshot_window(
-    window: pygetwindow.Window, relative_region: Scope | None = None
-) -> MatLike:
-    """
-    截取指定窗口的客户区，返回 BGR 格式的 numpy 图像。
 
-    Args:
-        window: pygetwindow 窗口对象
+def set_window_backend(backend: WindowBackend | None) -> None:
+    """设置窗口后端，传入 None 时恢复为默认的 Windows 后端。"""
+    global _backend
+    _backend = backend
+
+
+def get_client_size(window: GameWindow) -> tuple[int, int]:
+    """获取窗口客户区的尺寸（宽度和高度）"""
+    return get_window_backend().get_client_size(window)
+
 
-    Returns:
-        numpy 数组（BGR 格式，OpenCV 兼容）
-    """
-    client_rect = _get_client_rect(window)
-    (left, top), (_right, _bottom) = client_rect
-    if relative_region is not None:
-        (rx1, ry1), (rx2, ry2) = relative_region
-        scope = ((left + rx1, top + ry1), (left + rx2, top + ry2))
-    else:
-        scope = client_rect
-    return _screenshot_by_win32ui(scope)
+def get_game_version(window: GameWindow) -> str | None:
+    """获取窗口所属游戏客户端的版本号，无法获取时返回 None"""
+    return get_window_backend().get_game_version(window)
+
+
+def screenshot_window(
+    window: GameWindow, relative_region: Scope | None = None
+) -> MatLike:
+    """截取指定窗口的客户区（或客户区中的指定区域），返回 BGR 格式的 numpy 图像。"""
+    with metrics.span("capture"):
+        return get_window_backend().screenshot_window(window, relative_region)
 
 
 def get_active_support_window(
     supported_window_titles: Container[str],
-) -> pygetwindow.Window | None:
-    active_window = pygetwindow.getActiveWindow()
-    if active_window is not None and active_window.title in supported_window_titles:
-        return active_window
-    else:
-        return None
+) -> GameWindow | None:
+    """获取位于前台的受支持窗口，前台窗口不受支持时返回 None"""
+    return get_window_backend().get_active_support_window(supported_window_titles)
 
 
 def get_support_window(
     supported_window_titles: Iterable[str],
-) -> pygetwindow.Window | None:
-    for title in supported_window_titles:
-        windows = pygetwindow.getWindowsWithTitle(title)
-        if windows:
-            return windows[0]
-    return None
+) -> GameWindow | None:
+    """按标题查找受支持的窗口，找不到时返回 None"""
+    return get_window_backend().get_support_window(supported_window_titles)
 
 
-def click_on_window(
-    window: pygetwindow.Window, relative_x: int, relative_y: int
-) -> None:
+def click_on_window(window: GameWindow, relative_x: int, relative_y: int) -> None:
     """在指定窗口的客户区坐标 (x, y) 位置点击"""
-    (left, top), (_right, _bottom) = _get_client_rect(window)
-    screen_x = left + relative_x
-    screen_y = top + relative_y
-    pyautogui.click(screen_x, screen_y)
+    with metrics.span("click"):
+        get_window_backend().click_on_window(window, relative_x, relative_y)
+
+
+def scroll_on_window(
+    window: GameWindow, relative_x: int, relative_y: int, clicks: int
+) -> None:
+    """在指定窗口的客户区坐标 (x, y) 位置滚动鼠标滚轮，负数表示向下滚动"""
+    get_window_backend().scroll_on_window(window, relative_x, relative_y, clicks)
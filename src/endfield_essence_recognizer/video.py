@@ -0,0 +1,237 @@
+"""
+Streaming frame source for screen recordings of the inventory.
+
+Frames are decoded by `cv2.VideoCapture` in a background thread and compared by a
+downsampled signature of the detail panel. Only frames showing a new, settled
+selection are queued for recognition; the queue is bounded so memory does not grow
+with the length of the video.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+from cv2.typing import MatLike
+
+from endfield_essence_recognizer.essence_scanner import get_layout
+from endfield_essence_recognizer.utils.image import Scope, scope_to_slice, to_gray_image
+from endfield_essence_recognizer.utils.log import logger
+from endfield_essence_recognizer.utils.metrics import metrics
+
+VIDEO_QUEUE_SIZE = 8
+"""解码线程与识别之间的队列长度"""
+PANEL_SIGNATURE_SIZE = (104, 113)
+"""详情面板缩略图的尺寸 (宽, 高)，约为原尺寸的 1/4，足以区分单个等级图标"""
+PANEL_PIXEL_THRESHOLD = 32
+"""缩略图中灰度差超过此值的像素视为发生了变化，低于此值的差异视为压缩噪声"""
+PANEL_STILL_PIXELS = 2
+"""相邻两帧变化的像素不超过此数量时，认为面板静止"""
+PANEL_CHANGE_PIXELS = 3
+"""与上一次输出的帧相比变化的像素达到此数量时，认为选中了新的基质"""
+PANEL_STABLE_FRAMES = 2
+"""面板至少连续静止的帧数，用于跳过切换动画中的帧"""
+
+
+@dataclass
+class VideoFrame:
+    index: int
+    """帧序号（从 0 开始）"""
+    timestamp: float
+    """帧在视频中的时间（秒）"""
+    image: MatLike
+    """帧图像，保持视频的原始尺寸，识别时使用该尺寸对应的布局"""
+
+
+def panel_signature(frame: MatLike, panel: Scope) -> npt.NDArray[np.uint8]:
+    """详情面板的灰度缩略图。"""
+    gray = to_gray_image(frame[scope_to_slice(panel)])
+    return cv2.resize(gray, PANEL_SIGNATURE_SIZE, interpolation=cv2.INTER_AREA)
+
+
+def changed_pixels(
+    a: npt.NDArray[np.uint8],
+    b: npt.NDArray[np.uint8],
+    threshold: int = PANEL_PIXEL_THRESHOLD,
+) -> int:
+    """两张缩略图中灰度差超过 `threshold` 的像素数量。"""
+    return int(np.count_nonzero(cv2.absdiff(a, b) > threshold))
+
+
+class PanelDeduplicator:
+    """
+    根据面板缩略图判断一帧是否显示了新的选中基质。
+
+    比较的是变化像素的数量而不是平均差异：切换基质时通常只有几行文字不同，
+    平均到整个面板上与压缩噪声相差无几。
+
+    面板需要连续静止 `stable_frames` 帧，且与上一次输出的帧差异足够大，才会输出。
+    """
+
+    def __init__(
+        self,
+        still_pixels: int = PANEL_STILL_PIXELS,
+        change_pixels: int = PANEL_CHANGE_PIXELS,
+        stable_frames: int = PANEL_STABLE_FRAMES,
+    ) -> None:
+        self.still_pixels: int = still_pixels
+        self.change_pixels: int = change_pixels
+        self.stable_frames: int = stable_frames
+        self._previous: npt.NDArray[np.uint8] | None = None
+        self._emitted: npt.NDArray[np.uint8] | None = None
+        self._still_count: int = 0
+
+    def update(self, signature: npt.NDArray[np.uint8]) -> bool:
+        """输入下一帧的缩略图，返回该帧是否应被识别。"""
+        if (
+            self._previous is not None
+            and changed_pixels(signature, self._previous) <= self.still_pixels
+        ):
+            self._still_count += 1
+        else:
+            self._still_count = 1
+        self._previous = signature
+
+        if self._still_count < self.stable_frames:
+            return False
+        if (
+            self._emitted is not None
+            and changed_pixels(signature, self._emitted) < self.change_pixels
+        ):
+            return False
+        self._emitted = signature
+        return True
+
+
+class VideoFrameSource:
+    """
+    在后台线程中解码视频，逐个产出显示新选中基质的帧。
+
+    用法：
+
+        for frame in VideoFrameSource(path):
+            fields = frame_recognizer.recognize(frame.image)
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        frame_step: int = 1,
+        queue_size: int = VIDEO_QUEUE_SIZE,
+        deduplicator: PanelDeduplicator | None = None,
+    ) -> None:
+        """
+        Args:
+            path: 视频文件路径
+            frame_step: 每隔多少帧检查一次，跳过的帧只解码不比较
+            queue_size: 等待识别的帧的最大数量，队列满时解码线程等待
+            deduplicator: 帧去重器，为 None 时使用默认参数
+        """
+        self.path: Path = path
+        self.frame_step: int = max(1, frame_step)
+        self.deduplicator: PanelDeduplicator = deduplicator or PanelDeduplicator()
+        self.frames_read: int = 0
+        """已解码的帧数"""
+        self.frames_emitted: int = 0
+        """已输出的帧数"""
+        self.fps: float = 0.0
+        """视频的帧率，无法获取时为 0"""
+        self._queue: queue.Queue[VideoFrame | BaseException | None] = queue.Queue(
+            queue_size
+        )
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def duration(self) -> float:
+        """已解码部分的视频时长（秒）。"""
+        return self.frames_read / self.fps if self.fps > 0 else 0.0
+
+    def __iter__(self) -> Iterator[VideoFrame]:
+        self._thread = threading.Thread(
+            target=self._run, name="VideoFrameSource", daemon=True
+        )
+        self._thread.start()
+        try:
+            while (item := self._queue.get()) is not None:
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """停止解码线程。"""
+        self._stop.set()
+        if self._thread is None or self._thread is threading.current_thread():
+            return
+        # 取出队列中的帧，让阻塞在 put 上的解码线程退出
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        self._thread.join()
+
+    def _put(self, item: VideoFrame | BaseException | None) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self) -> None:
+        capture = cv2.VideoCapture(str(self.path))
+        try:
+            if not capture.isOpened():
+                self._put(OSError(f"无法打开视频文件：{self.path}"))
+                return
+            self.fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+            panel: Scope | None = None
+            index = -1
+            while not self._stop.is_set():
+                index += 1
+                if index % self.frame_step != 0:
+                    # 只解码不转换，比 read 更快
+                    if not capture.grab():
+                        break
+                    self.frames_read += 1
+                    continue
+                ok, image = capture.read()
+                if not ok:
+                    break
+                self.frames_read += 1
+                metrics.increment("video_frames_decoded")
+
+                if panel is None:
+                    height, width = image.shape[:2]
+                    panel = get_layout((width, height)).area
+                if not self.deduplicator.update(panel_signature(image, panel)):
+                    continue
+                timestamp = (
+                    index / self.fps
+                    if self.fps > 0
+                    else capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                )
+                self.frames_emitted += 1
+                metrics.increment("video_frames_emitted")
+                if not self._put(VideoFrame(index, timestamp, image)):
+                    return
+            logger.debug(
+                f"视频解码完成：共 {self.frames_read} 帧，"
+                f"输出 {self.frames_emitted} 帧：{self.path}"
+            )
+        except Exception as e:
+            self._put(e)
+            return
+        finally:
+            capture.release()
+        self._put(None)
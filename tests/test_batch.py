@@ -0,0 +1,71 @@
+import csv
+import io
+import json
+import zipfile
+
+import pytest
+
+from endfield_essence_recognizer.batch import (
+    CsvResultWriter,
+    JsonlResultWriter,
+    list_images,
+)
+
+RECORD = {
+    "index": 0,
+    "source": "a.png",
+    "stats": ["gat_a", None, "gst_c"],
+    "stat_names": ["A", None, "C"],
+    "levels": [1, None, 3],
+    "deprecated": "未弃用",
+    "locked": "已锁定",
+}
+
+
+def test_list_images_in_directory(tmp_path):
+    for name in ["b.png", "a.JPG", "sub/c.webp", "notes.txt"]:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+    (tmp_path / "dir.png").mkdir()
+
+    assert list_images(tmp_path) == ["a.JPG", "b.png", "sub/c.webp"]
+
+
+def test_list_images_in_zip_keeps_archive_order(tmp_path):
+    path = tmp_path / "captures.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        for name in ["2.png", "1.png", "__MACOSX/._1.png", "readme.md"]:
+            archive.writestr(name, b"")
+        archive.mkdir("empty.png")
+
+    assert list_images(path) == ["2.png", "1.png"]
+
+
+def test_list_images_rejects_other_files(tmp_path):
+    path = tmp_path / "capture.png"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        list_images(path)
+
+
+def test_jsonl_writer():
+    file = io.StringIO()
+    JsonlResultWriter(file).write(RECORD)
+    assert json.loads(file.getvalue()) == RECORD
+
+
+def test_csv_writer_flattens_lists():
+    file = io.StringIO()
+    writer = CsvResultWriter(file)
+    writer.write(RECORD)
+    writer.write({"index": 1, "source": "b.png", "error": "ValueError: broken"})
+
+    rows = list(csv.DictReader(io.StringIO(file.getvalue())))
+    assert rows[0]["stat_0"] == "gat_a"
+    assert rows[0]["stat_1"] == ""
+    assert rows[0]["stat_name_2"] == "C"
+    assert rows[0]["level_2"] == "3"
+    assert rows[0]["locked"] == "已锁定"
+    assert rows[1]["error"] == "ValueError: broken"
+    assert rows[1]["stat_0"] == ""
@@ -0,0 +1,176 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from endfield_essence_recognizer.calibration import (
+    LayoutCalibration,
+    LayoutCalibrationCache,
+    LayoutMeasurement,
+    measure_layout,
+)
+from endfield_essence_recognizer.essence_scanner import (
+    EssenceScanner,
+    set_layout_calibration,
+)
+from endfield_essence_recognizer.grid_scan import THUMBNAIL_SCOPE
+from endfield_essence_recognizer.layout import LayoutProfile
+from endfield_essence_recognizer.utils.journal import ScanJournal
+from endfield_essence_recognizer.utils.window import set_window_backend
+
+TEMPLATE_DIR = (
+    Path(__file__).parents[1] / "src/endfield_essence_recognizer/templates/screenshot"
+)
+
+LAYOUT = LayoutProfile(
+    size=(1920, 1080),
+    scale=1.0,
+    essence_icon_x_list=np.linspace(128, 1374, 9).astype(int),
+    essence_icon_y_list=np.linspace(196, 819, 5).astype(int),
+    essence_ui_roi=((38, 66), (143, 106)),
+    area=((1465, 79), (1883, 532)),
+    deprecate_button_pos=(1807, 284),
+    lock_button_pos=(1839, 286),
+    deprecate_button_roi=((1790, 270), (1823, 302)),
+    lock_button_roi=((1825, 270), (1857, 302)),
+    stats_rois=(((1508, 358), (1700, 390)),),
+    stats_level_icons=(((1503, 395), (1520, 395)),),
+    level_icon_sample_radius=2,
+)
+
+
+def load_template(name: str) -> np.ndarray:
+    data = np.fromfile(TEMPLATE_DIR / f"{name}.png", dtype=np.uint8)
+    return cv2.imdecode(data, cv2.IMREAD_GRAYSCALE)
+
+
+LOCK_TEMPLATES = [load_template("已锁定"), load_template("未锁定")]
+DEPRECATE_TEMPLATES = [load_template("已弃用"), load_template("未弃用")]
+
+
+def paste_centered(frame: np.ndarray, template: np.ndarray, scope, offset) -> None:
+    (x0, y0), (x1, y1) = scope
+    height, width = template.shape
+    left = round((x0 + x1) / 2 + offset[0] - width / 2)
+    top = round((y0 + y1) / 2 + offset[1] - height / 2)
+    frame[top : top + height, left : left + width] = template
+
+
+def render(grid_offset=(0, 0), panel_offset=(0, 0), cells=45) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    frame = np.full((1080, 1920), 30, dtype=np.uint8)
+    (tx0, ty0), (tx1, ty1) = THUMBNAIL_SCOPE
+    positions = [
+        (int(x) + grid_offset[0], int(y) + grid_offset[1])
+        for y in LAYOUT.essence_icon_y_list
+        for x in LAYOUT.essence_icon_x_list
+    ]
+    for x, y in positions[:cells]:
+        frame[y + ty0 : y + ty1, x + tx0 : x + tx1] = rng.integers(
+            90, 250, (ty1 - ty0, tx1 - tx0)
+        )
+    paste_centered(frame, LOCK_TEMPLATES[0], LAYOUT.lock_button_roi, panel_offset)
+    paste_centered(
+        frame, DEPRECATE_TEMPLATES[1], LAYOUT.deprecate_button_roi, panel_offset
+    )
+    return cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+
+
+def test_measures_grid_and_panel_offsets():
+    frame = render(grid_offset=(7, -5), panel_offset=(-12, 9))
+    measurement = measure_layout(frame, LAYOUT, LOCK_TEMPLATES, DEPRECATE_TEMPLATES)
+    assert measurement == LayoutMeasurement(grid_offset=(7, -5), panel_offset=(-12, 9))
+    assert measurement.moved
+
+    # Applying the measurement makes the frame match the shifted layout
+    calibration = measurement.apply_to(LayoutCalibration())
+    shifted = LAYOUT.shifted(calibration.grid_offset, calibration.panel_offset)
+    again = measure_layout(
+        frame, shifted, LOCK_TEMPLATES, DEPRECATE_TEMPLATES, margin=3
+    )
+    assert again == LayoutMeasurement(grid_offset=(0, 0), panel_offset=(0, 0))
+    assert not again.moved
+
+
+def test_unmeasurable_parts_are_none():
+    # A nearly empty grid has no edges to lock onto, and no buttons without a selection
+    frame = render(cells=0)
+    frame[:, 1465:] = 30
+    measurement = measure_layout(frame, LAYOUT, LOCK_TEMPLATES, DEPRECATE_TEMPLATES)
+    assert measurement == LayoutMeasurement(grid_offset=None, panel_offset=None)
+    assert not measurement.moved
+    assert not measurement.complete
+    base = LayoutCalibration(grid_offset=(2, 3), panel_offset=(4, 5))
+    assert measurement.apply_to(base) == base
+    # Nothing measured is not the same as a measured zero offset
+    assert not measurement.apply_to(LayoutCalibration()).measured
+    partial = LayoutMeasurement(grid_offset=(1, 0), panel_offset=None)
+    assert partial.apply_to(LayoutCalibration()) == LayoutCalibration(
+        grid_offset=(0, 0)
+    )
+
+
+def test_calibration_cache_round_trips(tmp_path: Path):
+    path = tmp_path / "layout_calibration.json"
+    cache = LayoutCalibrationCache(path)
+    calibration = LayoutCalibration(grid_offset=(3, -2), panel_offset=(0, 6))
+    cache.put((2560, 1440), "1.2.3.4", calibration)
+    cache.put((1600, 900), "1.2.3.4", LayoutCalibration(panel_offset=(1, 1)))
+
+    loaded = LayoutCalibrationCache(path)
+    assert loaded.get((2560, 1440), "1.2.3.4") == calibration
+    assert loaded.get((1600, 900), "1.2.3.4") == LayoutCalibration(panel_offset=(1, 1))
+    assert loaded.get((2560, 1440), "1.2.3.5") is None
+    assert loaded.get((1920, 1080), "1.2.3.4") is None
+
+    path.write_text("not json", encoding="utf-8")
+    assert LayoutCalibrationCache(path).get((2560, 1440), "1.2.3.4") is None
+
+
+class FrameBackend:
+    """Window backend whose screenshots are a fixed frame."""
+
+    def __init__(self, frame: np.ndarray) -> None:
+        self.frame = frame
+
+    def get_client_size(self, window):
+        return self.frame.shape[1], self.frame.shape[0]
+
+    def get_game_version(self, window):
+        return "1.0"
+
+    def screenshot_window(self, window, relative_region=None):
+        return self.frame
+
+
+@pytest.fixture
+def calibrate():
+    def calibrate(frame, cache):
+        set_window_backend(FrameBackend(frame))
+        scanner = EssenceScanner(
+            None, None, [], journal=ScanJournal(None), calibration_cache=cache
+        )
+        return scanner._calibrate_layout(None)
+
+    yield calibrate
+    set_window_backend(None)
+    set_layout_calibration((1920, 1080), None)
+
+
+def test_unmeasured_calibration_is_not_saved(calibrate, tmp_path):
+    path = tmp_path / "layout_calibration.json"
+    frame = render(cells=0)
+    frame[:, 1465:] = 30
+    calibrate(frame, LayoutCalibrationCache(path))
+    assert not path.exists()
+
+
+def test_validation_searches_again_when_parts_are_not_found(calibrate):
+    # A cached calibration that no longer matches: the panel moved further than the
+    # validation window, so the narrow search finds nothing
+    cache = LayoutCalibrationCache(None)
+    cache.put((1920, 1080), "1.0", LayoutCalibration((0, 0), (0, 0)))
+    layout = calibrate(render(panel_offset=(-12, 9)), cache)
+    assert cache.get((1920, 1080), "1.0") == LayoutCalibration((0, 0), (-12, 9))
+    assert layout.lock_button_roi == ((1813, 279), (1845, 311))
@@ -0,0 +1,45 @@
+import threading
+
+from endfield_essence_recognizer.utils.clock import SystemClock, VirtualClock
+
+
+def test_virtual_sleep_advances_time():
+    clock = VirtualClock(start=10.0)
+    clock.sleep(0.3)
+    clock.sleep(0.2)
+    assert clock.time() == 10.5
+    assert clock.total_slept == 0.5
+
+
+def test_virtual_sleep_ignores_non_positive_durations():
+    clock = VirtualClock()
+    clock.sleep(0)
+    clock.sleep(-1)
+    assert clock.time() == 0.0
+
+
+def test_advance_is_not_counted_as_sleep():
+    clock = VirtualClock()
+    clock.advance(2.0)
+    assert clock.time() == 2.0
+    assert clock.total_slept == 0.0
+
+
+def test_virtual_clock_is_thread_safe():
+    clock = VirtualClock()
+    threads = [
+        threading.Thread(target=lambda: [clock.sleep(1) for _ in range(1000)])
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert clock.time() == 4000
+
+
+def test_system_clock_is_monotonic():
+    clock = SystemClock()
+    start = clock.time()
+    clock.sleep(0.01)
+    assert clock.time() >= start + 0.01
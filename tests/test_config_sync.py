@@ -0,0 +1,114 @@
+import json
+import time
+
+import pytest
+
+from endfield_essence_recognizer import config as config_module
+from endfield_essence_recognizer import treasure_rules
+from endfield_essence_recognizer.config import Config
+from endfield_essence_recognizer.config_sync import ConfigFileSync
+
+
+@pytest.fixture(autouse=True)
+def no_game_data(monkeypatch):
+    monkeypatch.setattr(treasure_rules, "load_weapon_profiles", lambda: ())
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def write_external(path, **fields) -> None:
+    """Simulate an edit by another program, making sure the file stamp changes."""
+    data = json.loads(path.read_text(encoding="utf-8")) | fields
+    text = json.dumps(data, indent=2)
+    while len(text.encode()) == path.stat().st_size:
+        text += "\n"
+    path.write_text(text, encoding="utf-8")
+
+
+def test_update_swaps_all_fields_at_once():
+    target = Config()
+    snapshot = target.model_copy()
+    target.update_from_model(Config(trash_action="lock", joint_decoding_enabled=True))
+    assert (target.trash_action, target.joint_decoding_enabled) == ("lock", True)
+    assert (snapshot.trash_action, snapshot.joint_decoding_enabled) == ("unlock", False)
+
+
+def test_save_replaces_file(tmp_path):
+    path = tmp_path / "config.json"
+    Config(treasure_action="deprecate").save(path)
+    assert (
+        json.loads(path.read_text(encoding="utf-8"))["treasure_action"] == "deprecate"
+    )
+    assert [file.name for file in tmp_path.iterdir()] == ["config.json"]
+
+
+def test_reload_external_edits(tmp_path):
+    path = tmp_path / "config.json"
+    target = Config()
+    target.save(path)
+    sync = ConfigFileSync(target, path)
+    assert not sync.reload_if_changed()
+
+    write_external(path, trash_action="keep")
+    assert sync.reload_if_changed()
+    assert target.trash_action == "keep"
+    assert not sync.reload_if_changed()
+
+    # Invalid files keep the current config
+    path.write_text("{", encoding="utf-8")
+    assert not sync.reload_if_changed()
+    path.write_text(
+        json.dumps({"version": Config._VERSION, "trash_action": "burn"}),
+        encoding="utf-8",
+    )
+    assert not sync.reload_if_changed()
+    path.write_text(json.dumps({"version": -1}), encoding="utf-8")
+    assert not sync.reload_if_changed()
+    assert target.trash_action == "keep"
+
+
+def test_background_sync(tmp_path):
+    path = tmp_path / "config.json"
+    target = Config()
+    target.save(path)
+    sync = ConfigFileSync(target, path, poll_interval=0.01, save_delay=0.05)
+    sync.start()
+    try:
+        for action in ("lock", "deprecate", "keep"):
+            target.update_from_model(Config(treasure_action=action))
+            sync.request_save()
+        wait_until(
+            lambda: (
+                json.loads(path.read_text(encoding="utf-8"))["treasure_action"]
+                == "keep"
+            )
+        )
+
+        write_external(path, trash_action="lock")
+        wait_until(lambda: target.trash_action == "lock")
+
+        # Pending changes are written on stop, even before the delay has passed
+        sync.save_delay = 60
+        target.update_from_model(target.model_copy(update={"trash_action": "keep"}))
+        sync.request_save()
+    finally:
+        sync.stop()
+    assert not sync.is_alive()
+    assert json.loads(path.read_text(encoding="utf-8"))["trash_action"] == "keep"
+
+
+def test_load_without_saving(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    monkeypatch.setattr(config_module, "config_path", path)
+    assert Config.load(save_defaults=False) == Config()
+    assert not path.exists()
+
+    # An outdated file is ignored but left untouched
+    path.write_text(json.dumps({"version": -1}), encoding="utf-8")
+    assert Config.load(save_defaults=False) == Config()
+    assert json.loads(path.read_text(encoding="utf-8")) == {"version": -1}
@@ -0,0 +1,191 @@
+import importlib.resources
+import json
+
+import pytest
+
+if not (
+    importlib.resources.files("endfield_essence_recognizer")
+    / "data/endfielddata/TableCfg"
+).is_dir():
+    pytest.skip("game data is not available", allow_module_level=True)
+
+from endfield_essence_recognizer import (
+    essence_scanner,
+    generated_template_dir,
+    screenshot_template_dir,
+)
+from endfield_essence_recognizer.calibration import LayoutCalibrationCache
+from endfield_essence_recognizer.config import config
+from endfield_essence_recognizer.essence_scanner import EssenceScanner
+from endfield_essence_recognizer.fake_window import FakeGameWindow, FakeWindowBackend
+from endfield_essence_recognizer.game_data.weapon import (
+    all_attribute_stats,
+    all_secondary_stats,
+    all_skill_stats,
+)
+from endfield_essence_recognizer.icon_classifier import IconStateClassifier
+from endfield_essence_recognizer.recognizer import Recognizer
+from endfield_essence_recognizer.synthetic import SyntheticEssence
+from endfield_essence_recognizer.utils.clock import VirtualClock
+from endfield_essence_recognizer.utils.journal import ScanJournal
+from endfield_essence_recognizer.utils.log import BackgroundFileWriter
+from endfield_essence_recognizer.utils.window import set_window_backend
+
+
+@pytest.fixture(scope="module")
+def recognizers() -> tuple[Recognizer, Recognizer]:
+    text_recognizer = Recognizer(
+        all_attribute_stats + all_secondary_stats + all_skill_stats,
+        generated_template_dir,
+    )
+    icon_recognizer = Recognizer(
+        ["已弃用", "未弃用", "已锁定", "未锁定"],
+        screenshot_template_dir,
+        classifier=IconStateClassifier(),
+    )
+    return text_recognizer, icon_recognizer
+
+
+@pytest.fixture
+def clock() -> VirtualClock:
+    return VirtualClock()
+
+
+def make_window(
+    count: int, clock: VirtualClock, client_size: tuple[int, int] = (1920, 1080)
+) -> FakeGameWindow:
+    essences = [
+        SyntheticEssence(
+            stats=(
+                all_attribute_stats[i % len(all_attribute_stats)],
+                all_secondary_stats[i % len(all_secondary_stats)],
+                all_skill_stats[i % len(all_skill_stats)],
+            ),
+            seed=i,
+        )
+        for i in range(count)
+    ]
+    window = FakeGameWindow(essences=essences, clock=clock, client_size=client_size)
+    set_window_backend(FakeWindowBackend(window))
+    return window
+
+
+@pytest.fixture(autouse=True)
+def restore_backend():
+    yield
+    set_window_backend(None)
+
+
+@pytest.fixture(autouse=True)
+def grid_prescan(monkeypatch):
+    # The scans below rely on the pre-scan to stop at the end of the inventory
+    monkeypatch.setattr(config, "grid_prescan_enabled", True)
+
+
+def test_scans_every_essence_on_virtual_time(recognizers, clock, tmp_path):
+    window = make_window(12, clock)
+    journal_path = tmp_path / "scan_journal.jsonl"
+    journal = ScanJournal(BackgroundFileWriter(journal_path))
+    scanner = EssenceScanner(
+        *recognizers,
+        ["Endfield"],
+        clock=clock,
+        journal=journal,
+        calibration_cache=LayoutCalibrationCache(None),
+    )
+    scanner.run()
+    journal.close()
+
+    assert scanner.essence_count == 12
+    assert scanner.skipped_count == 0
+    assert [event.index for event in window.events_of("select")] == list(range(12))
+    # Every essence waits 0.3 s after the click, all on simulated time
+    assert clock.total_slept == pytest.approx(12 * 0.3)
+
+    entries = [
+        json.loads(line) for line in journal_path.read_text("utf-8").splitlines()
+    ]
+    assert [(entry["row"], entry["column"]) for entry in entries] == [
+        (0, j) for j in range(9)
+    ] + [(1, j) for j in range(3)]
+    assert [entry["stats"] for entry in entries] == [
+        list(essence.stats) for essence in window.essences
+    ]
+
+
+def test_multi_page_scan_visits_each_essence_once(recognizers, clock):
+    window = make_window(60, clock)
+    scanner = EssenceScanner(
+        *recognizers,
+        ["Endfield"],
+        multi_page=True,
+        clock=clock,
+        journal=ScanJournal(None),
+        calibration_cache=LayoutCalibrationCache(None),
+    )
+    scanner.run()
+
+    selected = [event.index for event in window.events_of("select")]
+    assert sorted(selected) == list(range(60))
+    assert window.events_of("scroll")
+
+
+def test_multi_page_scan_stops_when_pages_never_align(recognizers, clock, monkeypatch):
+    window = make_window(150, clock)
+    monkeypatch.setattr(essence_scanner, "find_row_offset", lambda *args: None)
+    monkeypatch.setattr(essence_scanner, "GRID_MAX_ALIGN_FAILURES", 2)
+    scanner = EssenceScanner(
+        *recognizers,
+        ["Endfield"],
+        multi_page=True,
+        clock=clock,
+        journal=ScanJournal(None),
+        calibration_cache=LayoutCalibrationCache(None),
+    )
+    scanner.run()
+
+    # Every failed alignment rescans a full page, until the limit is reached
+    assert len(window.events_of("scroll")) == 2
+    assert scanner._page == 2
+
+
+def run_scan(recognizers, clock, client_size):
+    window = make_window(10, clock, client_size)
+    for essence in window.essences[::3]:
+        essence.locked = True
+    scanner = EssenceScanner(
+        *recognizers,
+        ["Endfield"],
+        clock=clock,
+        journal=ScanJournal(None),
+        calibration_cache=LayoutCalibrationCache(None),
+    )
+    scanner.run()
+    return window, scanner
+
+
+@pytest.mark.parametrize("client_size", [(1600, 900), (2560, 1440)])
+def test_scans_at_other_16_9_resolutions(recognizers, client_size):
+    reference, _ = run_scan(recognizers, VirtualClock(), (1920, 1080))
+    window, scanner = run_scan(recognizers, VirtualClock(), client_size)
+
+    assert scanner.essence_count == 10
+    assert scanner.retry_histogram == {0: 10}
+    # Same selections and lock/deprecate actions as at the reference resolution
+    assert [(e.kind, e.index) for e in window.events if e.kind != "click"] == [
+        (e.kind, e.index) for e in reference.events if e.kind != "click"
+    ]
+
+
+def test_rejects_other_aspect_ratios(recognizers, clock):
+    window = make_window(3, clock, (1920, 1200))
+    scanner = EssenceScanner(
+        *recognizers,
+        ["Endfield"],
+        clock=clock,
+        journal=ScanJournal(None),
+        calibration_cache=LayoutCalibrationCache(None),
+    )
+    scanner.run()
+    assert scanner.essence_count == 0
+    assert not window.events_of("click")
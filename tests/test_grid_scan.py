@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from endfield_essence_recognizer.grid_scan import (
+    GridCell,
+    action_changes_state,
+    analyze_grid,
+    find_row_offset,
+    parse_hex_color,
+    row_fingerprints,
+    skip_reason,
+)
+
+XS = np.linspace(128, 1374, 9).astype(int)
+YS = np.linspace(196, 819, 5).astype(int)
+
+
+@pytest.fixture
+def frame() -> np.ndarray:
+    """Grid with the first 11 cells filled; cell (0, 1) has a lock badge."""
+    rng = np.random.default_rng(0)
+    image = np.full((1080, 1920, 3), 40, dtype=np.uint8)
+    for index in range(11):
+        x, y = XS[index % 9], YS[index // 9]
+        image[y - 60 : y + 60, x - 60 : x + 60] = rng.integers(
+            0, 150, (120, 120, 3), dtype=np.uint8
+        )
+    x, y = XS[1], YS[0]
+    image[y - 58 : y - 42, x - 58 : x - 42] = 255
+    return image
+
+
+def test_parse_hex_color():
+    assert parse_hex_color("FF8000") == (0, 128, 255)
+    assert parse_hex_color("#FF8000FF") == (0, 128, 255)
+
+
+def test_analyze_grid(frame):
+    cells = analyze_grid(frame, XS, YS)
+    assert len(cells) == 45
+    assert [cell.empty for cell in cells] == [False] * 11 + [True] * 34
+    assert cells[1].locked is True
+    assert cells[0].locked is False
+
+
+def test_skips_empty_and_already_handled(frame):
+    cells = analyze_grid(frame, XS, YS)
+    planned = [cell for cell in cells if skip_reason(cell, "lock", "keep") is None]
+    assert [(cell.row, cell.column) for cell in planned] == [
+        (0, 0),
+        *((0, j) for j in range(2, 9)),
+        (1, 0),
+        (1, 1),
+    ]
+
+
+def test_unknown_state_is_always_clicked():
+    cell = GridCell(0, 0, 0, 0, empty=False, locked=None, deprecated=None)
+    assert skip_reason(cell, "lock", "keep") is None
+    assert not action_changes_state("keep", None, None)
+
+
+def test_find_row_offset_after_scroll(frame):
+    previous = row_fingerprints(frame, XS, YS)
+    assert find_row_offset(previous, previous) == 0
+
+    # Scroll the grid up by one row pitch: row 1 is now at row 0
+    pitch = YS[1] - YS[0]
+    scrolled = np.full_like(frame, 40)
+    scrolled[: frame.shape[0] - pitch] = frame[pitch:]
+    assert find_row_offset(previous, row_fingerprints(scrolled, XS, YS)) == 1
+
+
+def test_find_row_offset_without_overlap(frame):
+    previous = row_fingerprints(frame, XS, YS)
+    other = np.random.default_rng(1).integers(0, 255, frame.shape, dtype=np.uint8)
+    assert find_row_offset(previous, row_fingerprints(other, XS, YS)) is None
+
+
+def test_skip_reasons():
+    def cell(**state):
+        return GridCell(0, 0, 0, 0, **({"empty": False} | state))
+
+    assert skip_reason(cell(empty=True, locked=None, deprecated=None), "lock", "keep")
+    reason = skip_reason(cell(locked=True, deprecated=False), "lock", "keep")
+    assert reason is not None and "已锁定" in reason
+    assert skip_reason(cell(locked=False, deprecated=False), "lock", "keep") is None
@@ -0,0 +1,101 @@
+import importlib.resources
+
+import cv2
+import numpy as np
+import pytest
+
+from endfield_essence_recognizer.icon_classifier import IconStateClassifier
+from endfield_essence_recognizer.recognizer import Recognizer
+from endfield_essence_recognizer.utils.image import load_image
+
+ICON_LABELS = ["已弃用", "未弃用", "已锁定", "未锁定"]
+
+
+@pytest.fixture(scope="module")
+def templates() -> dict[str, list[np.ndarray]]:
+    screenshot_dir = (
+        importlib.resources.files("endfield_essence_recognizer")
+        / "templates/screenshot"
+    )
+    return {
+        label: [
+            load_image(
+                (screenshot_dir / f"{label}.png").read_bytes(), cv2.IMREAD_GRAYSCALE
+            )
+        ]
+        for label in ICON_LABELS
+    }
+
+
+@pytest.fixture(scope="module")
+def classifier(templates) -> IconStateClassifier:
+    classifier = IconStateClassifier()
+    classifier.fit(templates)
+    return classifier
+
+
+def make_roi(template: np.ndarray, top: int, left: int) -> np.ndarray:
+    """Place the template inside a 32x33 button ROI at the given offset."""
+    height, width = template.shape
+    return cv2.copyMakeBorder(
+        template,
+        top,
+        32 - height - top,
+        left,
+        33 - width - left,
+        cv2.BORDER_REPLICATE,
+    )
+
+
+def test_unfitted_classifier_is_unsure():
+    assert IconStateClassifier().classify(np.zeros((32, 33), np.uint8)) == (None, 0.0)
+
+
+@pytest.mark.parametrize("label", ICON_LABELS)
+@pytest.mark.parametrize("offset", [(2, 2), (4, 4), (6, 3)])
+def test_classifies_shifted_icons(classifier, templates, label, offset):
+    roi = make_roi(templates[label][0], *offset)
+    result, confidence = classifier.classify(roi)
+    assert result == label
+    assert confidence >= classifier.min_confidence
+
+
+def test_unknown_content_falls_back(classifier):
+    """Content unlike any template is left to template matching."""
+    roi = np.zeros((32, 33), np.uint8)
+    roi[:, ::2] = 255
+    assert classifier.classify(roi)[0] is None
+    assert classifier.candidates(roi, 3) == []
+
+
+def test_certain_classification_is_a_single_candidate(classifier, templates):
+    # A certain result already beats the runner-up, so only it needs verifying
+    roi = make_roi(templates["已锁定"][0], 4, 4)
+    assert classifier.candidates(roi, 3) == ["已锁定"]
+    assert IconStateClassifier().candidates(roi, 3) == []
+
+
+def test_recognizer_verifies_only_the_classified_label(templates, monkeypatch):
+    screenshot_dir = (
+        importlib.resources.files("endfield_essence_recognizer")
+        / "templates/screenshot"
+    )
+    recognizer = Recognizer(
+        ICON_LABELS, screenshot_dir, classifier=IconStateClassifier()
+    )
+    recognizer.load_templates()
+    matched: list[str] = []
+    match_label = recognizer._match_label
+    monkeypatch.setattr(
+        recognizer,
+        "_match_label",
+        # Trace logging would look up label names in game data
+        lambda gray, label, trace: (
+            matched.append(label) or match_label(gray, label, False)
+        ),
+    )
+
+    scores = recognizer._scores(make_roi(templates["未弃用"][0], 4, 4))
+
+    assert scores.argmax() == ICON_LABELS.index("未弃用")
+    assert matched == ["未弃用"]
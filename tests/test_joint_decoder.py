@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from endfield_essence_recognizer.joint_decoder import JointDecoder
+
+LABELS = ["attr_a", "attr_b", "sec_a", "sec_b", "skill_a", "skill_b"]
+
+
+@pytest.fixture
+def decoder() -> JointDecoder:
+    return JointDecoder(
+        labels=LABELS,
+        combinations=[
+            ("attr_a", "sec_a", "skill_a"),
+            ("attr_b", "sec_b", "skill_b"),
+            ("attr_a", None, "skill_b"),  # incomplete combinations are ignored
+        ],
+        high_thresh=0.75,
+        low_thresh=0.5,
+    )
+
+
+def make_scores(*slots: dict[str, float]) -> np.ndarray:
+    scores = np.full((len(slots), len(LABELS)), 0.1, dtype=np.float32)
+    for row, slot in enumerate(slots):
+        for label, score in slot.items():
+            scores[row, LABELS.index(label)] = score
+    return scores
+
+
+def test_incomplete_combinations_are_ignored(decoder: JointDecoder):
+    assert decoder.combination_count == 2
+
+
+def test_confident_slots_use_independent_result(decoder: JointDecoder):
+    """Confident reads are returned as-is, even if no weapon uses the triple."""
+    scores = make_scores(
+        {"attr_a": 0.95},
+        {"sec_b": 0.95},
+        {"skill_a": 0.95},
+    )
+    assert decoder.decode(scores) == ["attr_a", "sec_b", "skill_a"]
+
+
+def test_ambiguous_slot_is_resolved_by_known_combination(decoder: JointDecoder):
+    """A close call in one slot is decided by the combinations that exist."""
+    scores = make_scores(
+        {"attr_b": 0.95},
+        {"sec_a": 0.62, "sec_b": 0.60},
+        {"skill_b": 0.95},
+    )
+    assert decoder.decode(scores) == ["attr_b", "sec_b", "skill_b"]
+
+
+def test_low_slot_below_threshold_is_recovered(decoder: JointDecoder):
+    scores = make_scores(
+        {"attr_a": 0.95},
+        {"sec_a": 0.45},
+        {"skill_a": 0.95},
+    )
+    assert decoder.decode(scores) == ["attr_a", "sec_a", "skill_a"]
+
+
+def test_large_deficit_falls_back_to_independent(decoder: JointDecoder):
+    """The decoder does not overrule a slot that clearly reads as something else."""
+    scores = make_scores(
+        {"attr_a": 0.95},
+        {"sec_b": 0.70, "sec_a": 0.45},
+        {"skill_a": 0.95},
+    )
+    assert decoder.decode(scores) == ["attr_a", "sec_b", "skill_a"]
+
+
+def test_fixed_scores_pin_known_slots(decoder: JointDecoder):
+    scores = np.stack(
+        [
+            decoder.fixed_scores("attr_b"),
+            make_scores({"sec_a": 0.55, "sec_b": 0.52})[0],
+            decoder.fixed_scores("skill_b"),
+        ]
+    )
+    assert decoder.decode(scores) == ["attr_b", "sec_b", "skill_b"]
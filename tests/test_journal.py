@@ -0,0 +1,24 @@
+import json
+
+from endfield_essence_recognizer.utils.journal import ScanJournal
+from endfield_essence_recognizer.utils.log import BackgroundFileWriter
+
+
+def test_records_one_json_object_per_line(tmp_path):
+    path = tmp_path / "scan_journal.jsonl"
+    journal = ScanJournal(BackgroundFileWriter(path))
+    journal.record(row=0, column=1, stats=["a", None, "c"], quality="trash")
+    journal.record(row=0, column=2, stats=["d", "e", "f"], quality="treasure")
+    journal.close()
+
+    entries = [json.loads(line) for line in path.read_text("utf-8").splitlines()]
+    assert [entry["column"] for entry in entries] == [1, 2]
+    assert entries[0]["stats"] == ["a", None, "c"]
+    assert "time" in entries[0]
+
+
+def test_disabled_journal_is_a_no_op():
+    journal = ScanJournal(None)
+    assert not journal.enabled
+    journal.record(row=0)
+    journal.close()
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from endfield_essence_recognizer.layout import LayoutProfile
+
+REFERENCE = LayoutProfile(
+    size=(1920, 1080),
+    scale=1.0,
+    essence_icon_x_list=np.array([128, 284]),
+    essence_icon_y_list=np.array([196, 351]),
+    essence_ui_roi=((38, 66), (143, 106)),
+    area=((1465, 79), (1883, 532)),
+    deprecate_button_pos=(1807, 284),
+    lock_button_pos=(1839, 286),
+    deprecate_button_roi=((1790, 270), (1823, 302)),
+    lock_button_roi=((1825, 270), (1857, 302)),
+    stats_rois=(((1508, 358), (1700, 390)),),
+    stats_level_icons=(((1503, 395), (1520, 395)),),
+    level_icon_sample_radius=2,
+)
+
+
+def test_scaled_layout_scales_every_position():
+    layout = REFERENCE.scaled_to((3840, 2160))
+    assert layout.scale == 2
+    assert layout.essence_icon_x_list.tolist() == [256, 568]
+    assert layout.lock_button_pos == (3678, 572)
+    assert layout.stats_rois == (((3016, 716), (3400, 780)),)
+    assert layout.stats_level_icons == (((3006, 790), (3040, 790)),)
+    assert layout.level_icon_sample_radius == 4
+    assert REFERENCE.scaled_to((1920, 1080)) is REFERENCE
+
+    small = REFERENCE.scaled_to((1600, 900))
+    assert small.match_scale == pytest.approx(5 / 6)
+    assert small.deprecate_button_roi == ((1492, 225), (1519, 252))
+
+
+def test_crop_normalizes_large_frames_to_reference_size():
+    frame = np.zeros((2160, 3840, 3), dtype=np.uint8)
+    layout = REFERENCE.scaled_to((3840, 2160))
+    assert layout.match_scale == 1
+    assert layout.crop(frame, layout.stats_rois[0]).shape == (32, 192, 3)
+
+    frame = np.zeros((900, 1600, 3), dtype=np.uint8)
+    layout = REFERENCE.scaled_to((1600, 900))
+    assert layout.crop(frame, layout.stats_rois[0]).shape == (27, 160, 3)
+
+
+def test_other_aspect_ratios_are_rejected():
+    with pytest.raises(ValueError):
+        REFERENCE.scaled_to((1920, 1200))
+    # 1366x768 is 16:9 up to rounding
+    assert REFERENCE.scaled_to((1366, 768)).size == (1366, 768)
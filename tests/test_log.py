@@ -0,0 +1,102 @@
+import gzip
+import time
+
+from endfield_essence_recognizer.utils.log import BackgroundFileWriter
+
+
+def test_background_writer_flushes_on_close(tmp_path):
+    path = tmp_path / "logs" / "test.log"
+    writer = BackgroundFileWriter(path)
+    for i in range(100):
+        writer.write(f"line {i}\n")
+    writer.close()
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert lines == [f"line {i}" for i in range(100)]
+
+
+def test_background_writer_appends(tmp_path):
+    path = tmp_path / "test.log"
+    path.write_text("existing\n", encoding="utf-8")
+    writer = BackgroundFileWriter(path)
+    writer.write("new\n")
+    writer.close()
+    assert path.read_text(encoding="utf-8") == "existing\nnew\n"
+
+
+def wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_background_writer_rotates_and_compresses(tmp_path):
+    path = tmp_path / "test.log"
+    writer = BackgroundFileWriter(path, max_bytes=1000, compression=True)
+    line = "x" * 99 + "\n"
+    for _ in range(25):
+        writer.write(line)
+    writer.close()
+
+    assert path.stat().st_size <= 1000
+    assert wait_for(lambda: len(list(tmp_path.glob("test.*.log.gz"))) == 2)
+    assert not list(tmp_path.glob("test.*.log"))
+    total = path.read_text(encoding="utf-8")
+    for rotated in tmp_path.glob("test.*.log.gz"):
+        with gzip.open(rotated, "rt", encoding="utf-8") as file:
+            total += file.read()
+    assert total == line * 25
+
+
+def test_background_writer_keeps_retention_limit(tmp_path):
+    path = tmp_path / "test.log"
+    writer = BackgroundFileWriter(path, max_bytes=100, retention=2)
+    for _ in range(10):
+        writer.write("y" * 99 + "\n")
+    writer.close()
+
+    assert wait_for(lambda: len(list(tmp_path.glob("test.*.log"))) == 2)
+    assert path.is_file()
+
+
+def test_background_writer_rolls_over_daily(tmp_path, monkeypatch):
+    from datetime import datetime
+
+    from endfield_essence_recognizer.utils import log
+
+    class FakeDatetime:
+        current = datetime(2026, 1, 1, 23, 59)
+
+        @classmethod
+        def now(cls) -> datetime:
+            return cls.current
+
+    monkeypatch.setattr(log, "datetime", FakeDatetime)
+    writer = BackgroundFileWriter(tmp_path / "log.log", daily=True)
+    writer.write("first\n")
+    assert wait_for(lambda: (tmp_path / "log_2026-01-01.log").is_file())
+    FakeDatetime.current = datetime(2026, 1, 2, 0, 1)
+    writer.write("second\n")
+    writer.close()
+
+    assert (tmp_path / "log_2026-01-01.log").read_text(encoding="utf-8") == "first\n"
+    assert (tmp_path / "log_2026-01-02.log").read_text(encoding="utf-8") == "second\n"
+
+
+def test_background_writer_survives_errors(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "test.log"
+    writer = BackgroundFileWriter(path, max_bytes=100)
+
+    def fail() -> None:
+        raise PermissionError("file is in use")
+
+    # e.g. another process holds the file open on Windows
+    monkeypatch.setattr(writer, "_rotate", fail)
+    for _ in range(5):
+        writer.write("z" * 60 + "\n")
+    writer.close()
+
+    assert path.read_text(encoding="utf-8") == ("z" * 60 + "\n") * 5
+    assert "file is in use" in capsys.readouterr().err
@@ -0,0 +1,73 @@
+import pytest
+
+from endfield_essence_recognizer.utils.metrics import MetricsRegistry, RollingHistogram
+
+
+def test_rolling_histogram_keeps_recent_window():
+    histogram = RollingHistogram(size=4)
+    for value in [100, 100, 1, 2, 3, 4]:
+        histogram.observe(value)
+    summary = histogram.summary()
+    assert summary["count"] == 6
+    assert summary["sum"] == 210
+    assert summary["max"] == 4
+    assert summary["p50"] == pytest.approx(2.5)
+
+
+def test_span_records_duration():
+    registry = MetricsRegistry()
+    with registry.span("capture"):
+        pass
+    with registry.span("capture"):
+        pass
+    stage = registry.snapshot()["stages"]["capture"]
+    assert stage["count"] == 2
+    assert 0 <= stage["p50"] <= stage["p99"] <= stage["max"]
+
+
+def test_timed_decorator():
+    registry = MetricsRegistry()
+
+    @registry.timed("judge")
+    def judge(x: int) -> int:
+        return x * 2
+
+    assert judge(3) == 6
+    assert registry.snapshot()["stages"]["judge"]["count"] == 1
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    with registry.span("capture"):
+        pass
+    registry.increment("essences_scanned")
+    registry.set_gauge("api_recognize_queue_depth", 3)
+    snapshot = registry.snapshot()
+    assert snapshot["stages"] == {}
+    assert snapshot["counters"] == {}
+    assert snapshot["gauges"] == {}
+
+
+def test_prometheus_export():
+    registry = MetricsRegistry()
+    registry.observe("stat_match", 0.25)
+    registry.increment("essences_scanned", 3)
+    registry.set_gauge("api_recognize_queue_depth", 2)
+    registry.set_gauge("api_recognize_queue_depth", 0)
+    text = registry.to_prometheus()
+    assert "# TYPE eer_stage_duration_seconds summary" in text
+    assert 'eer_stage_duration_seconds{stage="stat_match",quantile="0.95"} 0.25' in text
+    assert 'eer_stage_duration_seconds_count{stage="stat_match"} 1' in text
+    assert 'eer_events_total{event="essences_scanned"} 3' in text
+    assert "# TYPE eer_gauge_value gauge" in text
+    assert 'eer_gauge_value{gauge="api_recognize_queue_depth"} 0' in text
+    assert text.endswith("\n")
+
+
+def test_reset_clears_everything():
+    registry = MetricsRegistry()
+    registry.observe("click", 0.1)
+    registry.increment("action_lock")
+    registry.reset()
+    assert registry.snapshot()["stages"] == {}
+    assert registry.snapshot()["counters"] == {}
@@ -0,0 +1,60 @@
+import pytest
+
+from endfield_essence_recognizer.utils.multipart import (
+    get_boundary,
+    parse_header_params,
+    parse_multipart,
+)
+
+CONTENT_TYPE = 'multipart/form-data; boundary="----eer"'
+
+
+def build_body(*parts: tuple[bytes, bytes]) -> bytes:
+    body = b"preamble\r\n"
+    for headers, data in parts:
+        body += b"------eer\r\n" + headers + b"\r\n\r\n" + data + b"\r\n"
+    return body + b"------eer--\r\n"
+
+
+def test_header_params():
+    main, params = parse_header_params(
+        'form-data; name="files"; filename="a \\"b\\".png"; filename*=UTF-8\'\'%E5%9F%BA%E8%B4%A8.png'
+    )
+    assert main == "form-data"
+    assert params == {"name": "files", "filename": "基质.png"}
+    assert get_boundary(CONTENT_TYPE) == b"----eer"
+    with pytest.raises(ValueError):
+        get_boundary("image/png")
+    with pytest.raises(ValueError):
+        get_boundary("multipart/form-data")
+
+
+def test_parse_multipart_returns_views_into_body():
+    png = b"\x89PNG\r\n\r\n------e\x00data"
+    body = build_body(
+        (
+            b'Content-Disposition: form-data; name="files"; filename="a.png"\r\n'
+            b"Content-Type: image/png",
+            png,
+        ),
+        (b'Content-Disposition: form-data; name="note"', b"hello"),
+        (b'Content-Disposition: form-data; name="files"; filename="b.png"', b""),
+    )
+    parts = parse_multipart(body, CONTENT_TYPE)
+    assert [(p.name, p.filename, p.content_type) for p in parts] == [
+        ("files", "a.png", "image/png"),
+        ("note", None, None),
+        ("files", "b.png", None),
+    ]
+    assert bytes(parts[0].data) == png
+    assert parts[0].data.obj is body
+    assert bytes(parts[1].data) == b"hello"
+    assert bytes(parts[2].data) == b""
+
+
+def test_parse_multipart_rejects_truncated_body():
+    body = build_body((b'Content-Disposition: form-data; name="a"', b"x"))
+    with pytest.raises(ValueError):
+        parse_multipart(body[:-20], CONTENT_TYPE)
+    with pytest.raises(ValueError):
+        parse_multipart(b"no boundary here", CONTENT_TYPE)
@@ -0,0 +1,32 @@
+import threading
+import time
+
+from endfield_essence_recognizer.utils.profiling import SamplingProfiler
+
+
+def busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_sampling_profiler_exports_speedscope():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="worker")
+    worker.start()
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    time.sleep(0.1)
+    profiler.stop()
+    stop.set()
+    worker.join()
+
+    data = profiler.to_speedscope()
+    frames = data["shared"]["frames"]
+    profile = next(p for p in data["profiles"] if p["name"] == "worker")
+    assert profile["type"] == "sampled"
+    assert len(profile["samples"]) == len(profile["weights"]) > 0
+    assert profile["endValue"] == sum(profile["weights"])
+    # Stacks are root-to-leaf and must contain the busy loop
+    names = {frames[index]["name"] for stack in profile["samples"] for index in stack}
+    assert "busy_loop" in names
+    assert all(0 <= index < len(frames) for s in profile["samples"] for index in s)
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from endfield_essence_recognizer import recognition_pool
+from endfield_essence_recognizer.config import Config
+from endfield_essence_recognizer.recognition_pool import (
+    AsyncRecognitionPool,
+    RecognitionBatchTooLarge,
+    RecognitionPoolUnavailable,
+    RecognitionQueueFull,
+    recognize_image_bytes,
+)
+
+IMAGES = [(f"{i}.png", b"") for i in range(3)]
+
+
+def test_batch_larger_than_queue_is_rejected():
+    pool = AsyncRecognitionPool(workers=1, max_queue=2)
+    # Rejected even though nothing is queued, and before any process is started
+    with pytest.raises(RecognitionBatchTooLarge):
+        asyncio.run(pool.recognize(IMAGES))
+    assert pool.queue_depth == 0
+    assert pool._pool is None
+
+
+def test_full_queue_is_rejected():
+    pool = AsyncRecognitionPool(workers=1, max_queue=4)
+    pool._queued = 2
+    with pytest.raises(RecognitionQueueFull):
+        asyncio.run(pool.recognize(IMAGES))
+    assert pool._pool is None
+
+
+def test_tasks_carry_the_current_config(monkeypatch):
+    monkeypatch.setattr(recognition_pool, "_config_data", None)
+    applied = []
+    monkeypatch.setattr(
+        Config,
+        "update_from_dict",
+        lambda self, data: applied.append(data["trash_action"]),
+    )
+    for action in ("keep", "keep", "lock"):
+        record = recognize_image_bytes(
+            ("a.png", b""), Config(trash_action=action).model_dump()
+        )
+        assert "error" in record
+    # Unchanged configs are not validated again
+    assert applied == ["keep", "lock"]
+
+
+def test_broken_pool_is_reported_and_recreated(monkeypatch):
+    class BrokenExecutor:
+        shut_down = False
+
+        def submit(self, fn, *args):
+            raise recognition_pool.BrokenProcessPool("worker died")
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shut_down = True
+
+    broken = BrokenExecutor()
+    monkeypatch.setattr(
+        recognition_pool, "create_recognition_pool", lambda *args, **kwargs: broken
+    )
+    pool = AsyncRecognitionPool(workers=1, max_queue=4)
+    with pytest.raises(RecognitionPoolUnavailable):
+        asyncio.run(pool.recognize(IMAGES[:1]))
+    # The broken pool is released so the next request starts a new one
+    assert broken.shut_down
+    assert pool._pool is None
+    assert pool.queue_depth == 0
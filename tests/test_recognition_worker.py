@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+
+from endfield_essence_recognizer import stat_language
+from endfield_essence_recognizer.config import config
+from endfield_essence_recognizer.layout import LayoutProfile
+from endfield_essence_recognizer.recognition_worker import (
+    RecognitionWorker,
+    SharedFrameRing,
+)
+
+
+class SummingRecognizer:
+    """Reports the pixel sum and shape so tests can check what the worker received."""
+
+    def recognize(self, frame, previous=None, layout=None):
+        if frame.shape[0] == 0:
+            raise ValueError("empty frame")
+        stats = [str(int(frame.sum())), "x".join(map(str, frame.shape)), None]
+        return stats, [1, 2, 3], "未弃用", "retry" if previous else "未锁定"
+
+
+def create_summing_recognizer():
+    return SummingRecognizer()
+
+
+class CroppingRecognizer:
+    """Reports the first stat ROI it was given and the pixel sum of its crop."""
+
+    def recognize(self, frame, previous=None, layout=None):
+        if layout is None:
+            return [None, None, None], [None] * 3, None, None
+        roi = layout.stats_rois[0]
+        return (
+            [str(roi), str(int(layout.crop(frame, roi).sum())), None],
+            [0] * 3,
+            "",
+            "",
+        )
+
+
+def create_cropping_recognizer():
+    return CroppingRecognizer()
+
+
+class ConfigReportingRecognizer:
+    """Reports the config seen by the worker and counts failed language detections."""
+
+    def recognize(self, frame, previous=None, layout=None):
+        failed = stat_language._failed_attempts
+        stat_language._failed_attempts += 1
+        stats = [config.stat_language, str(config.joint_decoding_enabled), str(failed)]
+        return stats, [0] * 3, "", ""
+
+
+def create_config_reporting_recognizer():
+    return ConfigReportingRecognizer()
+
+
+def make_layout(size: tuple[int, int]) -> LayoutProfile:
+    return LayoutProfile(
+        size=size,
+        scale=1.0,
+        essence_icon_x_list=np.array([4]),
+        essence_icon_y_list=np.array([4]),
+        essence_ui_roi=((0, 0), (4, 4)),
+        area=((0, 0), size),
+        deprecate_button_pos=(0, 0),
+        lock_button_pos=(0, 0),
+        deprecate_button_roi=((0, 0), (4, 4)),
+        lock_button_roi=((0, 0), (4, 4)),
+        stats_rois=(((0, 0), (4, 4)),),
+        stats_level_icons=((),),
+        level_icon_sample_radius=1,
+    )
+
+
+def test_ring_round_trip():
+    ring = SharedFrameRing(slots=2, slot_bytes=64)
+    try:
+        frame = np.arange(48, dtype=np.uint8).reshape(4, 4, 3)
+        shape = ring.write(1, frame)
+        view = ring.read(1, shape)
+        assert np.array_equal(view, frame)
+        # slots do not overlap
+        ring.write(0, np.zeros((4, 4, 3), dtype=np.uint8))
+        assert np.array_equal(ring.read(1, shape), frame)
+        del view
+
+        assert not ring.fits(np.zeros((8, 8, 3), dtype=np.uint8))
+        with pytest.raises(ValueError):
+            ring.write(0, np.zeros((8, 8, 3), dtype=np.uint8))
+    finally:
+        ring.close()
+
+
+def test_worker_recognizes_frames_in_shared_memory():
+    worker = RecognitionWorker(create_summing_recognizer, slots=2, slot_bytes=300)
+    worker.start()
+    try:
+        frames = [np.full((10, 10, 3), i, dtype=np.uint8) for i in range(5)]
+        futures = [worker.submit(frame) for frame in frames]
+        results = [future.result(timeout=10) for future in futures]
+        assert [stats[0] for stats, *_ in results] == [str(i * 300) for i in range(5)]
+
+        # frames larger than a slot are sent through the pipe instead
+        stats, levels, _, locked = worker.recognize(
+            np.ones((20, 20, 3), dtype=np.uint8), previous=results[0]
+        )
+        assert stats[:2] == ["1200", "20x20x3"]
+        assert levels == [1, 2, 3]
+        assert locked == "retry"
+
+        with pytest.raises(RuntimeError):
+            worker.recognize(np.zeros((0, 1, 3), dtype=np.uint8))
+        assert worker.is_alive
+    finally:
+        worker.stop()
+    assert not worker.is_alive
+    with pytest.raises(RuntimeError):
+        worker.submit(np.zeros((1, 1, 3), dtype=np.uint8))
+
+
+def test_calibrated_layout_reaches_worker():
+    worker = RecognitionWorker(create_cropping_recognizer, slots=1, slot_bytes=4800)
+    worker.start()
+    try:
+        frame = np.zeros((40, 40, 3), dtype=np.uint8)
+        frame[10:14, 10:14] = 1
+        layout = make_layout((40, 40))
+        calibrated = layout.shifted((0, 0), (10, 10))
+
+        stats, *_ = worker.recognize(frame, layout=calibrated)
+        assert stats[:2] == [str(((10, 10), (14, 14))), "48"]
+        stats, *_ = worker.recognize(
+            frame, previous=([None] * 3, [None] * 3, "", ""), layout=layout
+        )
+        assert stats[:2] == [str(((0, 0), (4, 4))), "0"]
+    finally:
+        worker.stop()
+
+
+def test_config_and_scan_start_reach_worker(monkeypatch):
+    monkeypatch.setattr(config, "stat_language", "EN")
+    worker = RecognitionWorker(
+        create_config_reporting_recognizer, slots=1, slot_bytes=300
+    )
+    worker.start()
+    try:
+        frame = np.zeros((10, 10, 3), dtype=np.uint8)
+        assert worker.recognize(frame)[0] == ["EN", "False", "0"]
+
+        monkeypatch.setattr(config, "stat_language", "JP")
+        monkeypatch.setattr(config, "joint_decoding_enabled", True)
+        assert worker.recognize(frame)[0] == ["JP", "True", "1"]
+
+        worker.start_scan()
+        assert worker.recognize(frame)[0] == ["JP", "True", "0"]
+    finally:
+        worker.stop()
@@ -0,0 +1,185 @@
+import math
+
+import cv2
+import numpy as np
+import pytest
+
+from endfield_essence_recognizer import recognizer as recognizer_module
+from endfield_essence_recognizer.recognizer import Recognizer
+from endfield_essence_recognizer.utils.image import save_image
+
+LABELS = ["a", "b", "c", "d"]
+
+
+@pytest.fixture(autouse=True)
+def plain_label_names(monkeypatch):
+    # Label names come from game data, which these tests do not need
+    monkeypatch.setattr(recognizer_module, "get_label_name", lambda label: label)
+
+
+@pytest.fixture
+def templates(tmp_path) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(0)
+    templates = {}
+    # "d" has no template on disk
+    for label in LABELS[:3]:
+        image = rng.integers(0, 256, (8, 16), dtype=np.uint8)
+        image = cv2.resize(image, (32, 16), interpolation=cv2.INTER_NEAREST)
+        save_image(image, tmp_path / f"{label}.png")
+        templates[label] = image
+    return templates
+
+
+@pytest.fixture
+def recognizer(tmp_path, templates) -> Recognizer:
+    return Recognizer(LABELS, tmp_path)
+
+
+def make_roi(template: np.ndarray) -> np.ndarray:
+    roi = np.full((32, 64), 128, np.uint8)
+    roi[8:24, 16:48] = template
+    return roi
+
+
+def with_scores(recognizer: Recognizer, scores: list[float]) -> Recognizer:
+    vector = np.array(scores, dtype=np.float32)
+    recognizer._score_vector = lambda roi_image: vector.copy()
+    return recognizer
+
+
+def test_scores_follow_label_order(recognizer, templates):
+    detail = recognizer.recognize_roi_detailed(make_roi(templates["b"]))
+    assert detail.label == "b"
+    assert detail.score == pytest.approx(1.0, abs=1e-4)
+    assert detail.scores.shape == (len(LABELS),)
+    assert detail.scores[LABELS.index("b")] == detail.score
+    assert detail.scores[LABELS.index("d")] == -np.inf
+
+
+def test_top_k_is_sorted_and_skips_missing_templates(recognizer, templates):
+    detail = recognizer.recognize_roi_detailed(make_roi(templates["a"]), k=10)
+    assert [label for label, _ in detail.top_k][0] == "a"
+    assert "d" not in [label for label, _ in detail.top_k]
+    scores = [score for _, score in detail.top_k]
+    assert scores == sorted(scores, reverse=True)
+    assert detail.margin == pytest.approx(scores[0] - scores[1])
+    assert (
+        len(recognizer.recognize_roi_detailed(make_roi(templates["a"]), k=1).top_k) == 1
+    )
+
+
+def test_thresholds(recognizer):
+    high, low = recognizer.high_thresh, recognizer.low_thresh
+    roi = np.zeros((32, 64), np.uint8)
+
+    detail = with_scores(recognizer, [high, 0.1, 0.2, -np.inf]).recognize_roi_detailed(
+        roi
+    )
+    assert (detail.label, detail.score) == ("a", pytest.approx(high))
+    assert detail.margin == pytest.approx(high - 0.2)
+
+    # Between the thresholds the label is kept, below the low threshold it is dropped
+    assert with_scores(recognizer, [low, 0, 0, 0]).recognize_roi(roi)[0] == "a"
+    below = np.nextafter(np.float32(low), np.float32(0))
+    assert with_scores(recognizer, [below, 0, 0, 0]).recognize_roi(roi)[0] is None
+
+
+def test_ties_keep_label_order(recognizer):
+    roi = np.zeros((32, 64), np.uint8)
+    detail = with_scores(recognizer, [0.5, 0.9, 0.9, 0.1]).recognize_roi_detailed(roi)
+    assert [label for label, _ in detail.top_k] == ["b", "c", "a"]
+    assert detail.label == "b"
+    assert detail.margin == 0
+
+
+def test_without_candidates(recognizer):
+    roi = np.zeros((32, 64), np.uint8)
+    detail = with_scores(recognizer, [-np.inf] * 4).recognize_roi_detailed(roi)
+    assert detail.label is None
+    assert detail.top_k == []
+    assert detail.score == -math.inf and detail.margin == math.inf
+
+    detail = with_scores(
+        recognizer, [0.9, -np.inf, -np.inf, -np.inf]
+    ).recognize_roi_detailed(roi)
+    assert detail.top_k == [("a", pytest.approx(0.9))]
+    assert detail.margin == math.inf
+
+
+def test_score_matrix(recognizer, templates):
+    rois = [make_roi(templates[label]) for label in ("c", "a")]
+    matrix = recognizer.score_matrix(rois)
+    assert matrix.shape == (2, len(LABELS))
+    assert list(np.argmax(matrix, axis=1)) == [2, 0]
+    assert [detail.label for detail in recognizer.recognize_rois_detailed(rois)] == [
+        "c",
+        "a",
+    ]
+    assert recognizer.score_matrix([]).shape == (0, len(LABELS))
+
+
+def test_score_matrix_matches_single_rois(recognizer, templates):
+    rng = np.random.default_rng(1)
+    rois = [
+        make_roi(templates["b"]),
+        rng.integers(0, 256, (20, 40), dtype=np.uint8),
+        # Narrower than the templates: every score is -inf
+        np.full((32, 24), 128, np.uint8),
+        cv2.cvtColor(make_roi(templates["a"]), cv2.COLOR_GRAY2BGR),
+    ]
+    matrix = recognizer.score_matrix(rois)
+    expected = np.stack([recognizer._score_vector(roi) for roi in rois])
+    np.testing.assert_allclose(matrix, expected, atol=1e-5)
+    assert np.all(matrix[2] == -np.inf)
+
+
+class StubClassifier:
+    def __init__(self, candidates: list[str]) -> None:
+        self.result = candidates
+        self.fitted_labels: list[str] = []
+
+    def fit(self, templates) -> None:
+        self.fitted_labels = list(templates)
+
+    def candidates(self, roi_image, k: int) -> list[str]:
+        return self.result[:k]
+
+
+def test_classifier_candidates_are_verified(tmp_path, templates):
+    classifier = StubClassifier(["b", "a", "c"])
+    recognizer = Recognizer(LABELS, tmp_path, classifier=classifier)
+    plain = Recognizer(LABELS, tmp_path)
+    roi = make_roi(templates["b"])
+
+    detail = recognizer.recognize_roi_detailed(roi)
+    expected = plain.recognize_roi_detailed(roi)
+    assert classifier.fitted_labels[:3] == ["a", "b", "c"]
+    assert detail.label == "b"
+    # The verified candidates keep their real scores, so alternatives survive
+    assert detail.top_k == pytest.approx(expected.top_k)
+    assert detail.margin == pytest.approx(expected.margin)
+    assert recognizer.recognize_roi(roi) == ("b", pytest.approx(expected.score))
+
+
+def test_wrong_classifier_result_falls_back(tmp_path, templates):
+    recognizer = Recognizer(LABELS, tmp_path, classifier=StubClassifier(["a", "b"]))
+    roi = make_roi(templates["b"])
+    detail = recognizer.recognize_roi_detailed(roi)
+    assert detail.label == "b"
+    # Falling back matches every template
+    assert np.isfinite(detail.scores).sum() == 3
+    assert recognizer.recognize_roi(roi)[0] == "b"
+
+    # An uncertain classifier also falls back
+    recognizer = Recognizer(LABELS, tmp_path, classifier=StubClassifier([]))
+    assert recognizer.recognize_roi(roi)[0] == "b"
+
+
+def test_classifier_runner_up_must_be_beaten(tmp_path, templates):
+    # Two identical templates: the classifier's pick cannot be told apart from the
+    # runner-up, so the full score vector is used instead
+    save_image(templates["a"], tmp_path / "c.png")
+    recognizer = Recognizer(LABELS, tmp_path, classifier=StubClassifier(["c", "a"]))
+    detail = recognizer.recognize_roi_detailed(make_roi(templates["a"]))
+    assert np.isfinite(detail.scores).sum() == 3
+    assert detail.margin == pytest.approx(0, abs=1e-4)
@@ -0,0 +1,200 @@
+import numpy as np
+import pytest
+
+from endfield_essence_recognizer import essence_scanner
+from endfield_essence_recognizer.calibration import LayoutCalibrationCache
+from endfield_essence_recognizer.essence_scanner import (
+    EssenceScanner,
+    recapture_failed_fields,
+)
+from endfield_essence_recognizer.joint_decoder import JointDecoder
+from endfield_essence_recognizer.recognizer import RecognitionDetail, Recognizer
+from endfield_essence_recognizer.utils.clock import VirtualClock
+from endfield_essence_recognizer.utils.journal import ScanJournal
+from endfield_essence_recognizer.utils.log import logger
+from endfield_essence_recognizer.utils.window import set_window_backend
+
+LABELS = ["a", "b", "c"]
+GOOD = (["a", "b", "c"], [1, 2, 3], "未弃用", "未锁定")
+
+
+class StubWindow:
+    title = "Endfield"
+    isMinimized = False
+    isActive = True
+
+    def restore(self) -> None:
+        pass
+
+    def activate(self) -> None:
+        pass
+
+
+class StubBackend:
+    """Counts screenshots and clicks; every screenshot is a blank frame."""
+
+    def __init__(self) -> None:
+        self.screenshots = 0
+        self.clicks: list[tuple[int, int]] = []
+
+    def screenshot_window(self, window, relative_region=None):
+        self.screenshots += 1
+        return np.zeros((1080, 1920, 3), np.uint8)
+
+    def click_on_window(self, window, relative_x, relative_y) -> None:
+        self.clicks.append((relative_x, relative_y))
+
+
+class ScriptedRecognizer:
+    """Returns the scripted results in order and records what it was asked."""
+
+    def __init__(self, *results) -> None:
+        self.results = list(results)
+        self.calls: list[tuple] = []
+
+    def recognize(self, frame, previous=None, layout=None):
+        self.calls.append((previous, layout))
+        return self.results.pop(0)
+
+
+@pytest.fixture
+def backend():
+    backend = StubBackend()
+    set_window_backend(backend)
+    yield backend
+    set_window_backend(None)
+
+
+@pytest.fixture
+def logs():
+    messages: list[str] = []
+    handler = logger.add(lambda message: messages.append(message.record["message"]))
+    yield messages
+    logger.remove(handler)
+
+
+@pytest.fixture(autouse=True)
+def no_game_data(monkeypatch):
+    # Judging and logging need stat names from game data, which these tests do not use
+    monkeypatch.setattr(essence_scanner, "log_essence_result", lambda *args: None)
+    monkeypatch.setattr(
+        essence_scanner, "judge_essence_quality", lambda *args: "treasure"
+    )
+    monkeypatch.setattr(essence_scanner.config, "treasure_action", "keep")
+
+
+def make_scanner(tmp_path, clock, recognizer, **kwargs) -> EssenceScanner:
+    stub = Recognizer(LABELS, tmp_path)
+    return EssenceScanner(
+        stub,
+        stub,
+        ["Endfield"],
+        clock=clock,
+        journal=ScanJournal(None),
+        frame_recognizer=recognizer,
+        calibration_cache=LayoutCalibrationCache(None),
+        **kwargs,
+    )
+
+
+def test_failed_fields_are_recaptured(tmp_path, backend):
+    clock = VirtualClock()
+    partial = (["a", None, "c"], [1, 2, 3], "未弃用", None)
+    recognizer = ScriptedRecognizer(partial, partial, GOOD)
+    scanner = make_scanner(tmp_path, clock, recognizer, recapture_backoff=0.1)
+
+    scanner._scan_essence(StubWindow(), 0, 0)
+
+    # Each retry passes the previous result and the scanner's layout
+    assert [previous for previous, _ in recognizer.calls] == [None, partial, partial]
+    assert all(layout is scanner._layout for _, layout in recognizer.calls)
+    assert backend.screenshots == 3
+    # Settle wait, then a backoff growing with the retry count
+    assert clock.total_slept == pytest.approx(0.3 + 0.1 + 0.2)
+    assert scanner.retry_histogram == {2: 1}
+    assert scanner.skipped_count == 0
+
+
+def test_essence_is_skipped_after_max_retries(tmp_path, backend):
+    clock = VirtualClock()
+    failed = ([None, None, None], [None] * 3, None, None)
+    recognizer = ScriptedRecognizer(*[failed] * 3)
+    scanner = make_scanner(tmp_path, clock, recognizer, max_recapture=2)
+
+    scanner._scan_essence(StubWindow(), 1, 2)
+
+    assert len(recognizer.calls) == 3
+    assert scanner.retry_histogram == {2: 1}
+    assert scanner.skipped_count == 1
+    # Only the essence icon was clicked, no lock or deprecate buttons
+    assert backend.clicks == [
+        (scanner._layout.essence_icon_x_list[2], scanner._layout.essence_icon_y_list[1])
+    ]
+
+
+@pytest.mark.parametrize("joint_decoding", [False, True])
+def test_recapture_only_rerecognizes_failed_fields(
+    tmp_path, monkeypatch, joint_decoding
+):
+    text_recognizer = Recognizer(LABELS, tmp_path)
+    monkeypatch.setattr(
+        essence_scanner.config, "joint_decoding_enabled", joint_decoding
+    )
+
+    def get_joint_decoder(recognizer):
+        # Building the decoder loads weapon data, so only joint decoding may do it
+        assert joint_decoding
+        return JointDecoder(LABELS, [], 0.8, 0.6)
+
+    monkeypatch.setattr(essence_scanner, "get_joint_decoder", get_joint_decoder)
+    recognized: list[str] = []
+
+    def recognize_stat(frame, k, recognizer, layout):
+        recognized.append(f"stat_{k}")
+        scores = np.array([0.1, 0.9, 0.1], np.float32)
+        return RecognitionDetail("b", 0.9, scores, [("b", 0.9)], 0.8), 4
+
+    def recognize_lock_state(frame, recognizer, layout):
+        recognized.append("lock")
+        return "已锁定"
+
+    monkeypatch.setattr(essence_scanner, "recognize_stat", recognize_stat)
+    monkeypatch.setattr(essence_scanner, "recognize_lock_state", recognize_lock_state)
+    monkeypatch.setattr(
+        essence_scanner,
+        "recognize_deprecate_state",
+        lambda *args: pytest.fail("deprecate state was already recognized"),
+    )
+
+    fields = recapture_failed_fields(
+        np.zeros((1080, 1920, 3), np.uint8),
+        text_recognizer,
+        text_recognizer,
+        ["a", None, "c"],
+        [1, 2, 3],
+        "未弃用",
+        None,
+    )
+
+    assert recognized == ["stat_1", "lock"]
+    assert fields == (["a", "b", "c"], [1, 4, 3], "未弃用", "已锁定")
+
+
+def test_scan_summary(tmp_path, logs):
+    clock = VirtualClock()
+    scanner = make_scanner(tmp_path, clock, ScriptedRecognizer())
+    scanner.log_scan_summary()
+    assert logs == []
+
+    scanner.essence_count = 4
+    scanner.retry_histogram.update({0: 3, 2: 1})
+    scanner.skipped_count = 1
+    # No time has passed on the virtual clock
+    scanner.log_scan_summary()
+    assert "用时 0.0 秒。" in logs[0]
+    assert "0 次 3 个、2 次 1 个" in logs[1]
+    assert "跳过 1 个" in logs[1]
+
+    clock.advance(30)
+    scanner.log_scan_summary()
+    assert "平均每分钟 8.0 个" in logs[2]
@@ -0,0 +1,126 @@
+import importlib.resources
+
+import cv2
+import numpy as np
+import pytest
+
+from endfield_essence_recognizer import generated_template_dir
+from endfield_essence_recognizer.stat_classifier import (
+    STAT_CLASSIFIER_WEIGHTS_FILENAME,
+    StatClassifier,
+    augment_template,
+    templates_fingerprint,
+)
+from endfield_essence_recognizer.utils.image import load_image
+
+SHIPPED_WEIGHTS = generated_template_dir / STAT_CLASSIFIER_WEIGHTS_FILENAME
+HAS_GAME_DATA = (
+    importlib.resources.files("endfield_essence_recognizer")
+    / "data/endfielddata/TableCfg"
+).is_dir()
+
+
+@pytest.fixture(scope="module")
+def templates() -> dict[str, list[np.ndarray]]:
+    return {
+        path.name.removesuffix(".png"): [
+            load_image(path.read_bytes(), cv2.IMREAD_GRAYSCALE)
+        ]
+        for path in sorted(generated_template_dir.iterdir(), key=lambda path: path.name)
+        if path.name.endswith(".png")
+    }
+
+
+@pytest.fixture(scope="module")
+def classifier(templates) -> StatClassifier:
+    classifier = StatClassifier(SHIPPED_WEIGHTS)
+    classifier.fit(templates)
+    return classifier
+
+
+def make_roi(template: np.ndarray, top: int, left: int) -> np.ndarray:
+    """Place the template inside a 192x32 stat ROI on a dark background."""
+    roi = np.full((32, 192), 20, np.uint8)
+    height, width = template.shape
+    roi[top : top + height, left : left + width] = np.maximum(template, 20)
+    return roi
+
+
+def test_shipped_weights_match_templates(templates):
+    # Regenerate with scripts/train_stat_classifier.py when the templates change
+    classifier = StatClassifier(SHIPPED_WEIGHTS)
+    assert classifier.load()
+    assert classifier.fingerprint == templates_fingerprint(templates)
+    assert sorted(classifier.labels) == sorted(templates)
+
+
+@pytest.mark.parametrize("offset", [(0, 0), (4, 10), (8, 30)])
+def test_classifies_every_stat(classifier, templates, offset):
+    for label, images in templates.items():
+        result, confidence = classifier.classify(make_roi(images[0], *offset))
+        assert result == label
+        assert confidence >= classifier.min_confidence
+
+
+def test_classifies_degraded_rois(classifier, templates):
+    rng = np.random.default_rng(1)
+    for label, images in templates.items():
+        for _ in range(5):
+            assert classifier.classify(augment_template(images[0], rng))[0] in (
+                label,
+                None,
+            )
+
+
+def test_blank_roi_falls_back(classifier):
+    assert classifier.classify(np.full((32, 192), 60, np.uint8)) == (None, 0.0)
+    assert StatClassifier(weights_path=None).classify(np.zeros((32, 192))) == (
+        None,
+        0.0,
+    )
+
+
+def test_retrains_when_templates_change(templates, tmp_path):
+    subset = dict(list(templates.items())[:5])
+    classifier = StatClassifier(SHIPPED_WEIGHTS)
+    classifier.fit(subset)
+    assert classifier.labels == list(subset)
+
+    path = tmp_path / "weights.npz"
+    classifier.save(path)
+    loaded = StatClassifier(weights_path=path)
+    assert loaded.load()
+    assert loaded.labels == classifier.labels
+    assert loaded.fingerprint == classifier.fingerprint
+    label = next(iter(subset))
+    assert loaded.classify(make_roi(subset[label][0], 4, 10))[0] == label
+
+
+@pytest.mark.skipif(not HAS_GAME_DATA, reason="game data is not available")
+def test_recognizer_verifies_classifier_result(templates):
+    from endfield_essence_recognizer.recognizer import Recognizer
+
+    labels = list(templates)
+    plain = Recognizer(labels, generated_template_dir)
+    classified = Recognizer(
+        labels, generated_template_dir, classifier=StatClassifier(SHIPPED_WEIGHTS)
+    )
+    roi = make_roi(templates[labels[3]][0], 4, 10)
+
+    detail = classified.recognize_roi_detailed(roi)
+    expected = plain.recognize_roi_detailed(roi)
+    assert detail.label == expected.label == labels[3]
+    assert detail.score == pytest.approx(expected.score)
+    # Only the classifier's top candidates were matched, with their real scores
+    assert np.isfinite(detail.scores).sum() == len(detail.top_k) == 3
+    assert detail.margin == pytest.approx(expected.margin, abs=0.2)
+    assert classified.recognize_roi(roi) == (labels[3], pytest.approx(expected.score))
+
+
+def test_candidates_follow_confidence(classifier, templates):
+    label = next(iter(templates))
+    roi = make_roi(templates[label][0], 4, 10)
+    candidates = classifier.candidates(roi, 3)
+    assert candidates[0] == label
+    assert len(candidates) == 3
+    assert classifier.candidates(np.full((32, 192), 60, np.uint8), 3) == []
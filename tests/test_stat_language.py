@@ -0,0 +1,140 @@
+import importlib.resources
+import shutil
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+if not (
+    importlib.resources.files("endfield_essence_recognizer")
+    / "data/endfielddata/TableCfg"
+).is_dir():
+    pytest.skip("game data is not available", allow_module_level=True)
+
+from endfield_essence_recognizer import generated_template_dir, stat_language
+from endfield_essence_recognizer.config import config
+from endfield_essence_recognizer.utils.image import load_image, save_image
+
+
+@pytest.fixture
+def banks(tmp_path: Path, monkeypatch) -> dict[str, dict[str, np.ndarray]]:
+    """A CN bank copied from the package and a fake EN bank of mirrored templates."""
+    cn_dir = tmp_path / "CN"
+    with importlib.resources.as_file(generated_template_dir) as source:
+        shutil.copytree(source, cn_dir)
+    en_dir = tmp_path / "EN"
+    banks: dict[str, dict[str, np.ndarray]] = {"CN": {}, "EN": {}}
+    for path in sorted(cn_dir.glob("*.png")):
+        image = load_image(path, cv2.IMREAD_GRAYSCALE)
+        banks["CN"][path.stem] = image
+        banks["EN"][path.stem] = cv2.flip(image, 1)
+        save_image(banks["EN"][path.stem], en_dir / path.name)
+
+    monkeypatch.setattr(stat_language, "generated_template_root", tmp_path)
+    monkeypatch.setattr(stat_language, "_detected_language", None)
+    monkeypatch.setattr(stat_language, "_failed_attempts", 0)
+    monkeypatch.setattr(config, "stat_language", "auto")
+    return banks
+
+
+def make_rois(templates: dict[str, np.ndarray], labels: list[str]) -> list[np.ndarray]:
+    rois = []
+    for label in labels:
+        roi = np.zeros((32, 192), np.uint8)
+        template = templates[label]
+        roi[4 : 4 + template.shape[0], 6 : 6 + template.shape[1]] = template
+        rois.append(roi)
+    return rois
+
+
+def test_detects_language_once(banks):
+    labels = list(banks["CN"])
+    assert stat_language.available_stat_languages() == ["CN", "EN"]
+
+    recognizer = stat_language.create_stat_recognizer(labels)
+    assert recognizer.language == "CN"
+
+    # An empty panel is not enough to decide
+    stat_language.resolve_stat_language(
+        recognizer, lambda: [np.zeros((32, 192), np.uint8)] * 3
+    )
+    assert recognizer.language == "CN"
+
+    rois = make_rois(banks["EN"], labels[:3])
+    stat_language.resolve_stat_language(recognizer, lambda: rois)
+    assert recognizer.language == "EN"
+    assert recognizer.recognize_roi_detailed(rois[1]).label == labels[1]
+
+    # The choice is cached: later frames are not scored against the banks again
+    def fail() -> list[np.ndarray]:
+        raise AssertionError("language detection ran twice")
+
+    stat_language.resolve_stat_language(recognizer, fail)
+    assert stat_language.create_stat_recognizer(labels).language == "EN"
+
+
+def test_configured_language_skips_detection(banks, monkeypatch):
+    labels = list(banks["CN"])
+    monkeypatch.setattr(config, "stat_language", "EN")
+    recognizer = stat_language.create_stat_recognizer(labels)
+    assert recognizer.language == "EN"
+    rois = make_rois(banks["EN"], labels[5:6])
+    assert recognizer.recognize_roi_detailed(rois[0]).label == labels[5]
+
+    # Switching languages in the config takes effect on the next frame
+    monkeypatch.setattr(config, "stat_language", "CN")
+    stat_language.resolve_stat_language(recognizer, lambda: [])
+    assert recognizer.language == "CN"
+    rois = make_rois(banks["CN"], labels[5:6])
+    assert recognizer.recognize_roi_detailed(rois[0]).label == labels[5]
+
+    # A language without a bank falls back to the default bank, without reloading
+    monkeypatch.setattr(config, "stat_language", "KR")
+    stat_language.resolve_stat_language(recognizer, lambda: [])
+    assert recognizer.language == "KR"
+    assert recognizer.recognize_roi_detailed(rois[0]).label == labels[5]
+
+
+def test_failed_detection_is_cached(banks):
+    labels = list(banks["CN"])
+    recognizer = stat_language.create_stat_recognizer(labels)
+    calls = []
+
+    def empty_panel() -> list[np.ndarray]:
+        calls.append(None)
+        return [np.zeros((32, 192), np.uint8)] * 3
+
+    for _ in range(stat_language.STAT_LANGUAGE_MAX_ATTEMPTS + 2):
+        stat_language.resolve_stat_language(recognizer, empty_panel)
+    # The banks are not matched again once detection has given up
+    assert len(calls) == stat_language.STAT_LANGUAGE_MAX_ATTEMPTS
+    assert recognizer.language == "CN"
+
+    # A new scan tries again
+    stat_language.reset_stat_language_detection()
+    rois = make_rois(banks["EN"], labels[:3])
+    stat_language.resolve_stat_language(recognizer, lambda: rois)
+    assert recognizer.language == "EN"
+
+
+def test_single_bank_is_still_scored(banks, tmp_path, monkeypatch):
+    labels = list(banks["CN"])
+    shutil.rmtree(tmp_path / "EN")
+    cn_only = tmp_path / "cn_only"
+    shutil.move(tmp_path / "CN", cn_only / "CN")
+    monkeypatch.setattr(stat_language, "generated_template_root", cn_only)
+    assert stat_language.available_stat_languages() == ["CN"]
+    recognizer = stat_language.create_stat_recognizer(labels)
+
+    # A client language without a bank is not mistaken for the only one installed
+    rois = make_rois(banks["EN"], labels[:3])
+    assert stat_language.detect_stat_language(rois, recognizer) is None
+    rois = make_rois(banks["CN"], labels[:3])
+    assert stat_language.detect_stat_language(rois, recognizer) == "CN"
+
+
+def test_installed_languages_are_scanned_once(banks, tmp_path):
+    assert stat_language.available_stat_languages() == ["CN", "EN"]
+    shutil.rmtree(tmp_path / "EN")
+    assert stat_language.available_stat_languages() == ["CN", "EN"]
@@ -0,0 +1,71 @@
+import importlib.resources
+
+import numpy as np
+import pytest
+
+if not (
+    importlib.resources.files("endfield_essence_recognizer")
+    / "data/endfielddata/TableCfg"
+).is_dir():
+    pytest.skip("game data is not available", allow_module_level=True)
+
+from endfield_essence_recognizer.essence_scanner import (
+    STATS_LEVEL_ICONS,
+    STATS_ROIS,
+    recognize_level_from_icon_points,
+)
+from endfield_essence_recognizer.synthetic import (
+    PANEL_SCOPE,
+    Augmentation,
+    generate_frames,
+)
+from endfield_essence_recognizer.utils.image import scope_to_slice
+
+
+def test_same_seed_generates_same_frames():
+    first = [
+        (sample.essence, sample.image.copy()) for sample in generate_frames(3, seed=7)
+    ]
+    second = [
+        (sample.essence, sample.image.copy()) for sample in generate_frames(3, seed=7)
+    ]
+    for (essence_a, image_a), (essence_b, image_b) in zip(first, second):
+        assert essence_a == essence_b
+        assert np.array_equal(image_a, image_b)
+
+
+def test_reused_buffer_is_shared_between_frames():
+    images = [sample.image for sample in generate_frames(3)]
+    assert images[0] is images[1] is images[2]
+
+    images = [sample.image for sample in generate_frames(3, reuse_buffer=False)]
+    assert images[0] is not images[1]
+
+
+def test_augmentation_only_touches_the_panel():
+    augmentation = Augmentation(noise_sigma=8, blur_sigma=1, brightness=20)
+    clean = next(generate_frames(1, seed=1)).image.copy()
+    augmented = next(generate_frames(1, seed=1, augmentation=augmentation)).image
+
+    outside = np.ones(clean.shape[:2], dtype=bool)
+    outside[scope_to_slice(PANEL_SCOPE)] = False
+    assert np.array_equal(clean[outside], augmented[outside])
+    assert not np.array_equal(clean, augmented)
+
+
+def test_levels_are_readable_from_generated_frames():
+    for sample in generate_frames(20, seed=2):
+        levels = [
+            recognize_level_from_icon_points(sample.image, icon_points)
+            for icon_points in STATS_LEVEL_ICONS
+        ]
+        assert levels == list(sample.essence.levels)
+
+
+def test_ground_truth_matches_recognizer_labels():
+    sample = next(generate_frames(1))
+    truth = sample.essence.ground_truth()
+    assert truth["stats"] == list(sample.essence.stats)
+    assert truth["locked"] in ("已锁定", "未锁定")
+    assert truth["deprecated"] in ("已弃用", "未弃用")
+    assert len(STATS_ROIS) == len(truth["levels"])
@@ -0,0 +1,86 @@
+from endfield_essence_recognizer import treasure_rules
+from endfield_essence_recognizer.config import ANY_STAT, EssenceStats, config
+from endfield_essence_recognizer.treasure_rules import TreasureRuleIndex, WeaponProfile
+
+WEAPONS = [
+    WeaponProfile("sword_6", ("str", "atk", "burst"), 6, 1),
+    WeaponProfile("sword_5", ("str", "atk", "crit"), 5, 1),
+    WeaponProfile("gun_6", ("agi", "atk", "crit"), 6, 2),
+]
+
+
+def rule(attribute, secondary, skill, **kwargs) -> EssenceStats:
+    return EssenceStats(attribute=attribute, secondary=secondary, skill=skill, **kwargs)
+
+
+def test_exact_and_wildcard_slots():
+    exact = rule("str", "atk", "burst")
+    any_skill = rule("agi", "atk", ANY_STAT)
+    index = TreasureRuleIndex([exact, any_skill], WEAPONS)
+
+    assert index.match(["str", "atk", "burst"]) is exact
+    assert index.match(["str", "atk", "crit"]) is None
+    assert index.match(["agi", "atk", "heal"]) is any_skill
+    assert index.match(["agi", "hp", "heal"]) is None
+    assert TreasureRuleIndex([], WEAPONS).match(["str", "atk", "burst"]) is None
+
+
+def test_first_matching_rule_wins():
+    deny = rule("str", ANY_STAT, "crit", quality="trash")
+    allow = rule("str", ANY_STAT, ANY_STAT)
+    index = TreasureRuleIndex([deny, allow], WEAPONS)
+    assert index.match(["str", "atk", "crit"]) is deny
+    assert index.match(["str", "atk", "burst"]) is allow
+
+    index = TreasureRuleIndex([allow, deny], WEAPONS)
+    assert index.match(["str", "atk", "crit"]) is allow
+
+
+def test_minimum_levels():
+    high = rule(ANY_STAT, "atk", ANY_STAT, min_levels=(0, 3, 0))
+    index = TreasureRuleIndex([high], WEAPONS)
+    assert index.match(["str", "atk", "burst"], [1, 3, 1]) is high
+    assert index.match(["str", "atk", "burst"], [1, 9, 1]) is high
+    assert index.match(["str", "atk", "burst"], [4, 2, 4]) is None
+    # Unknown levels never satisfy a minimum
+    assert index.match(["str", "atk", "burst"], [1, None, 1]) is None
+    assert index.match(["str", "atk", "burst"]) is None
+
+
+def test_weapon_filters():
+    six_star = rule(ANY_STAT, ANY_STAT, ANY_STAT, weapon_rarities=[6])
+    six_star_gun = rule(
+        ANY_STAT, ANY_STAT, ANY_STAT, weapon_rarities=[6], weapon_types=[2]
+    )
+    index = TreasureRuleIndex([six_star_gun, six_star], WEAPONS)
+
+    assert index.match(["agi", "atk", "crit"]) is six_star_gun
+    assert index.match(["str", "atk", "burst"]) is six_star
+    assert index.match(["str", "atk", "crit"]) is None
+    # Combinations without an implemented weapon fail every weapon filter
+    assert index.match(["agi", "hp", "heal"]) is None
+
+
+def test_matched_weapon_ids():
+    index = TreasureRuleIndex([], WEAPONS, trash_weapon_ids=["sword_5"])
+    assert index.matched_weapon_ids(["str", "atk", "crit"]) == ["sword_5"]
+    assert index.matched_weapon_ids(["str", "hp", "crit"]) == []
+    assert index.trash_weapon_ids == {"sword_5"}
+
+
+def test_index_recompiled_only_when_config_changes(monkeypatch):
+    monkeypatch.setattr(treasure_rules, "load_weapon_profiles", lambda: WEAPONS)
+    monkeypatch.setattr(treasure_rules, "_compiled", None)
+    monkeypatch.setattr(config, "treasure_essence_stats", [rule("str", "atk", "burst")])
+    monkeypatch.setattr(config, "trash_weapon_ids", [])
+
+    index = treasure_rules.get_treasure_rule_index()
+    assert treasure_rules.get_treasure_rule_index() is index
+    assert index.match(["str", "atk", "burst"]) is not None
+
+    config.update_from_dict(
+        config.model_dump() | {"treasure_essence_stats": [], "trash_weapon_ids": []}
+    )
+    updated = treasure_rules.get_treasure_rule_index()
+    assert updated is not index
+    assert updated.match(["str", "atk", "burst"]) is None
@@ -0,0 +1,90 @@
+import importlib.resources
+
+import numpy as np
+import pytest
+
+if not (
+    importlib.resources.files("endfield_essence_recognizer")
+    / "data/endfielddata/TableCfg"
+).is_dir():
+    pytest.skip("game data is not available", allow_module_level=True)
+
+import cv2
+
+from endfield_essence_recognizer.essence_scanner import RESOLUTION
+from endfield_essence_recognizer.synthetic import FrameComposer, generate_frames
+from endfield_essence_recognizer.video import PanelDeduplicator, VideoFrameSource
+
+
+def write_video(path, frames, size=RESOLUTION, fps=30.0):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+    assert writer.isOpened()
+    for frame in frames:
+        if frame.shape[1::-1] != size:
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        writer.write(frame)
+    writer.release()
+
+
+def recording(samples, hold=4):
+    """Each selection is held for `hold` frames, separated by a transition frame."""
+    frames = []
+    for previous, sample in zip([None, *samples], samples):
+        if previous is not None:
+            frames.append(cv2.addWeighted(previous.image, 0.5, sample.image, 0.5, 0))
+        frames += [sample.image] * hold
+    return frames
+
+
+def test_deduplicator_waits_for_settled_new_panel():
+    dedup = PanelDeduplicator(still_pixels=1, change_pixels=3, stable_frames=2)
+    a = np.zeros((4, 4), dtype=np.uint8)
+    b = np.full((4, 4), 200, dtype=np.uint8)
+    # compression noise below the pixel threshold
+    c = np.full((4, 4), 210, dtype=np.uint8)
+    results = [dedup.update(x) for x in [a, a, a, c, b, b, b, c, c, a]]
+    # a settles on the second frame; c and b count as the same settled panel
+    assert [i for i, emitted in enumerate(results) if emitted] == [1, 4]
+
+
+@pytest.mark.parametrize("size", [RESOLUTION, (960, 540)])
+def test_video_source_emits_one_frame_per_selection(tmp_path, size):
+    samples = list(
+        generate_frames(4, seed=7, composer=FrameComposer(), reuse_buffer=False)
+    )
+    path = tmp_path / "inventory.avi"
+    write_video(path, recording(samples), size)
+
+    source = VideoFrameSource(path, queue_size=2)
+    frames = list(source)
+
+    assert len(frames) == len(samples)
+    assert [frame.index for frame in frames] == [1, 6, 11, 16]
+    assert frames[1].timestamp == pytest.approx(6 / 30)
+    # Frames keep the size of the video
+    assert all(frame.image.shape[1::-1] == size for frame in frames)
+    assert source.frames_read == 4 * 4 + 3
+
+
+def test_video_source_stops_early(tmp_path):
+    samples = list(generate_frames(3, seed=1, reuse_buffer=False))
+    path = tmp_path / "inventory.avi"
+    write_video(path, recording(samples))
+
+    source = VideoFrameSource(path, queue_size=1)
+    for frame in source:
+        break
+    assert not source._thread.is_alive()
+
+
+def test_video_source_reports_missing_file(tmp_path):
+    with pytest.raises(OSError):
+        list(VideoFrameSource(tmp_path / "missing.mp4"))
+
+
+def test_video_source_rejects_other_aspect_ratios(tmp_path):
+    samples = list(generate_frames(1, seed=3, reuse_buffer=False))
+    path = tmp_path / "inventory.avi"
+    write_video(path, recording(samples), (800, 600))
+    with pytest.raises(ValueError):
+        list(VideoFrameSource(path))